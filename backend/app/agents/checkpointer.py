@@ -0,0 +1,288 @@
+import base64
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, Sequence, Tuple
+from uuid import UUID
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+
+from app.database import AsyncSessionLocal, SessionLocal
+from app.services.db_service import async_db_service, db_service
+
+
+class DatabaseCheckpointSaver(BaseCheckpointSaver):
+    """
+    LangGraph checkpointer backed by the `checkpoints` table.
+
+    The graph thread id is the case id, so every checkpoint row hangs off its
+    case. Each row stores the serialized checkpoint, its metadata, the parent
+    checkpoint id and any pending writes inside `checkpoint_data`.
+    """
+
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        async_session_factory=AsyncSessionLocal,
+        **kwargs
+    ):
+        super().__init__(**kwargs)
+        self.session_factory = session_factory
+        self.async_session_factory = async_session_factory
+
+    # Serialization helpers
+    def _dump(self, value: Any) -> Dict[str, str]:
+        """Serialize a value into a JSON-safe typed payload."""
+        type_, data = self.serde.dumps_typed(value)
+        return {"type": type_, "data": base64.b64encode(data).decode("ascii")}
+
+    def _load(self, payload: Dict[str, str]) -> Any:
+        """Deserialize a payload produced by `_dump`."""
+        return self.serde.loads_typed((payload["type"], base64.b64decode(payload["data"])))
+
+    @staticmethod
+    def _config(thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> RunnableConfig:
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint_id,
+            }
+        }
+
+    def _checkpoint_data(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+    ) -> Dict[str, Any]:
+        return {
+            "checkpoint": self._dump(checkpoint),
+            "metadata": self._dump(get_checkpoint_metadata(config, metadata)),
+            "parent_checkpoint_id": config["configurable"].get("checkpoint_id"),
+            "writes": [],
+        }
+
+    def _new_writes(
+        self,
+        row,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str,
+    ) -> list:
+        """Serialize writes not already stored on the checkpoint row."""
+        existing = {(w["task_id"], w["idx"]) for w in row.checkpoint_data.get("writes", [])}
+        new_writes = []
+        for idx, (channel, value) in enumerate(writes):
+            write_idx = WRITES_IDX_MAP.get(channel, idx)
+            if write_idx >= 0 and (task_id, write_idx) in existing:
+                continue
+            new_writes.append({
+                "task_id": task_id,
+                "idx": write_idx,
+                "channel": channel,
+                "value": self._dump(value),
+                "task_path": task_path,
+            })
+        return new_writes
+
+    def _filtered(
+        self,
+        thread_id: str,
+        checkpoint_ns: str,
+        rows,
+        filter: Optional[Dict[str, Any]],
+        limit: Optional[int],
+    ) -> Iterator[CheckpointTuple]:
+        count = 0
+        for row in rows:
+            checkpoint_tuple = self._to_tuple(thread_id, checkpoint_ns, row)
+            if filter and not all(
+                checkpoint_tuple.metadata.get(k) == v for k, v in filter.items()
+            ):
+                continue
+            yield checkpoint_tuple
+            count += 1
+            if limit is not None and count >= limit:
+                break
+
+    def _to_tuple(self, thread_id: str, checkpoint_ns: str, row) -> CheckpointTuple:
+        """Build a CheckpointTuple from a stored checkpoint row."""
+        data = row.checkpoint_data
+        parent_id = data.get("parent_checkpoint_id")
+        return CheckpointTuple(
+            config=self._config(thread_id, checkpoint_ns, row.checkpoint_id),
+            checkpoint=self._load(data["checkpoint"]),
+            metadata=self._load(data["metadata"]),
+            parent_config=(
+                self._config(thread_id, checkpoint_ns, parent_id) if parent_id else None
+            ),
+            pending_writes=[
+                (w["task_id"], w["channel"], self._load(w["value"]))
+                for w in data.get("writes", [])
+            ],
+        )
+
+    # Sync API
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """Get the requested checkpoint, or the latest one for the thread."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        with self.session_factory() as db:
+            row = db_service.get_checkpoint(
+                db, UUID(thread_id), checkpoint_ns, get_checkpoint_id(config)
+            )
+            if row is None:
+                return None
+            return self._to_tuple(thread_id, checkpoint_ns, row)
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        """List checkpoints for a thread, newest first."""
+        if config is None:
+            return
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        before_id = get_checkpoint_id(before) if before else None
+        with self.session_factory() as db:
+            rows = db_service.list_checkpoints(
+                db, UUID(thread_id), checkpoint_ns, before_id=before_id
+            )
+            yield from self._filtered(thread_id, checkpoint_ns, rows, filter, limit)
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """Store a checkpoint and return the config pointing at it."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        with self.session_factory() as db:
+            db_service.save_checkpoint(
+                db,
+                UUID(thread_id),
+                self._checkpoint_data(config, checkpoint, metadata),
+                checkpoint_ns=checkpoint_ns,
+                checkpoint_id=checkpoint["id"],
+            )
+        return self._config(thread_id, checkpoint_ns, checkpoint["id"])
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """Attach pending writes to the checkpoint they were produced from."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        with self.session_factory() as db:
+            row = db_service.get_checkpoint(db, UUID(thread_id), checkpoint_ns, checkpoint_id)
+            if row is None:
+                return
+            new_writes = self._new_writes(row, writes, task_id, task_path)
+            if new_writes:
+                db_service.append_checkpoint_writes(db, row, new_writes)
+
+    def delete_thread(self, thread_id: str) -> None:
+        """Delete every checkpoint stored for a thread."""
+        with self.session_factory() as db:
+            db_service.delete_checkpoints(db, UUID(thread_id))
+
+    # Async API
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """Async version of `get_tuple`."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        async with self.async_session_factory() as db:
+            row = await async_db_service.get_checkpoint(
+                db, UUID(thread_id), checkpoint_ns, get_checkpoint_id(config)
+            )
+            if row is None:
+                return None
+            return self._to_tuple(thread_id, checkpoint_ns, row)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        """Async version of `list`."""
+        if config is None:
+            return
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        before_id = get_checkpoint_id(before) if before else None
+        async with self.async_session_factory() as db:
+            rows = await async_db_service.list_checkpoints(
+                db, UUID(thread_id), checkpoint_ns, before_id=before_id
+            )
+        for checkpoint_tuple in self._filtered(thread_id, checkpoint_ns, rows, filter, limit):
+            yield checkpoint_tuple
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """Async version of `put`."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        async with self.async_session_factory() as db:
+            await async_db_service.save_checkpoint(
+                db,
+                UUID(thread_id),
+                self._checkpoint_data(config, checkpoint, metadata),
+                checkpoint_ns=checkpoint_ns,
+                checkpoint_id=checkpoint["id"],
+            )
+        return self._config(thread_id, checkpoint_ns, checkpoint["id"])
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """Async version of `put_writes`."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        async with self.async_session_factory() as db:
+            row = await async_db_service.get_checkpoint(
+                db, UUID(thread_id), checkpoint_ns, checkpoint_id
+            )
+            if row is None:
+                return
+            new_writes = self._new_writes(row, writes, task_id, task_path)
+            if new_writes:
+                await async_db_service.append_checkpoint_writes(db, row, new_writes)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        """Async version of `delete_thread`."""
+        async with self.async_session_factory() as db:
+            await async_db_service.delete_checkpoints(db, UUID(thread_id))
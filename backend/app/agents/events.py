@@ -0,0 +1,53 @@
+import asyncio
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Set, Tuple
+
+# Events that end a case's stream
+TERMINAL_EVENTS = {"done", "error"}
+
+
+class AgentEventBroker:
+    """
+    In-process pub/sub for agent progress events, keyed by case id.
+
+    Background workers publish node transitions and letter tokens; SSE
+    handlers subscribe per case. Each subscriber gets a bounded queue, and
+    token events are dropped for a subscriber that falls behind rather than
+    buffering without limit.
+    """
+
+    def __init__(self, max_queue_size: int = 1000):
+        self.max_queue_size = max_queue_size
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+
+    def publish(self, case_id: Any, event: str, data: Dict[str, Any]) -> None:
+        """Deliver an event to every subscriber of a case."""
+        for queue in list(self._subscribers.get(str(case_id), ())):
+            try:
+                queue.put_nowait((event, data))
+            except asyncio.QueueFull:
+                if event != "token":
+                    # Make room for state changes; tokens are best-effort
+                    queue.get_nowait()
+                    queue.put_nowait((event, data))
+
+    def has_subscribers(self, case_id: Any) -> bool:
+        return bool(self._subscribers.get(str(case_id)))
+
+    @asynccontextmanager
+    async def subscribe(self, case_id: Any) -> AsyncIterator["asyncio.Queue[Tuple[str, Dict[str, Any]]]"]:
+        """Subscribe to a case's events for the duration of the context."""
+        key = str(case_id)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._subscribers[key].add(queue)
+        try:
+            yield queue
+        finally:
+            self._subscribers[key].discard(queue)
+            if not self._subscribers[key]:
+                del self._subscribers[key]
+
+
+# Singleton broker shared by workers and routers
+agent_events = AgentEventBroker()
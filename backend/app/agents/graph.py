@@ -1,13 +1,13 @@
-from langgraph.graph import StateGraph, END
-from typing import TypedDict, Any, Dict, List, Optional
-from app.agents.nodes import (
-    statutory_research_node,
-    generate_letter_node,
-    mail_dispatch_node
-)
+from typing import TYPE_CHECKING, TypedDict, Any, Dict, List, Optional
+from app.config import settings
 from datetime import date
 from decimal import Decimal
 
+if TYPE_CHECKING:
+    from langgraph.graph import StateGraph
+    from app.agents.checkpointer import DatabaseCheckpointSaver
+    from app.providers import Providers
+
 
 class CaseState(TypedDict):
     """State schema for the legal agent workflow."""
@@ -44,6 +44,7 @@ class CaseState(TypedDict):
     human_approved: bool
     edited_letter_html: Optional[str]
     needs_approval: bool
+    redraft_letter: bool  # a draft exists (e.g. was rejected): don't reuse a cached letter
     
     # Mailing results
     lob_mail_id: Optional[str]
@@ -53,57 +54,82 @@ class CaseState(TypedDict):
     # Status tracking
     status: str  # draft, analyzing, analyzed, awaiting_approval, mailed, error
     error: Optional[str]
+    
+    # Per-case cost and timing (see app.services.metrics.CaseMetrics)
+    metrics: Optional[Dict[str, Any]]
+    
+    # Ties together the log records of one execution, across resumes
+    correlation_id: Optional[str]
 
 
-def should_continue_to_mail(state: CaseState) -> str:
-    """
-    Conditional edge: Decide if we should proceed to mailing.
-    
-    Returns "mail" if approved, "end" otherwise.
-    """
-    if state.get("human_approved", False):
-        return "mail"
-    else:
-        return "end"
+def thread_config(case_id: Any) -> Dict[str, Any]:
+    """Graph config addressing the checkpoint thread of a case."""
+    return {"configurable": {"thread_id": str(case_id)}}
 
 
-def create_agent_graph() -> StateGraph:
+def create_agent_graph(
+    providers: "Providers",
+    checkpointer: Optional["DatabaseCheckpointSaver"] = None,
+    fused: Optional[bool] = None
+) -> "StateGraph":
     """
     Create the LangGraph state machine for legal agent workflow.
     
     Workflow:
         START → Research → Generate Letter → [Human Approval Gate] → Mail → END
     
+    In fused mode research and letter generation are one Claude call, made
+    by a single "generate" node:
+        START → Generate (analysis + letter) → [Human Approval Gate] → Mail → END
+    
+    The graph is checkpointed per case and interrupts before the mail node.
+    Approval records the decision on the paused thread and resumes it, so
+    research and letter generation are never re-run for the same draft.
+    
+    LangGraph and the nodes are imported here, not at module level, so
+    importing this module (for CaseState or thread_config) stays cheap; the
+    app builds its graph on first use through app.providers.
+    
+    Args:
+        providers: Container the Claude nodes get their client from (on each call)
+        checkpointer: Checkpoint saver (defaults to the database-backed saver)
+        fused: Use the single-call path (defaults to settings.CLAUDE_FUSED_DRAFTING)
+    
     Returns:
         Compiled StateGraph ready for execution
     """
+    from functools import partial
+    from langgraph.graph import StateGraph, END
+    from app.agents.checkpointer import DatabaseCheckpointSaver
+    from app.agents.nodes import (
+        timed_node,
+        statutory_research_node,
+        generate_letter_node,
+        case_package_node,
+        mail_dispatch_node
+    )
+    
+    if fused is None:
+        fused = settings.CLAUDE_FUSED_DRAFTING
+    
     # Initialize graph with state schema
     workflow = StateGraph(CaseState)
     
-    # Add nodes
-    workflow.add_node("research", statutory_research_node)
-    workflow.add_node("generate", generate_letter_node)
-    workflow.add_node("mail", mail_dispatch_node)
-    
-    # Define edges
-    workflow.set_entry_point("research")
-    workflow.add_edge("research", "generate")
-    
-    # Conditional edge: only proceed to mail if approved
-    workflow.add_conditional_edges(
-        "generate",
-        should_continue_to_mail,
-        {
-            "mail": "mail",
-            "end": END
-        }
-    )
-    
+    # Add nodes and edges; both variants end at "generate" before the gate
+    if fused:
+        workflow.add_node("generate", timed_node("generate", partial(case_package_node, providers=providers)))
+        workflow.set_entry_point("generate")
+    else:
+        workflow.add_node("research", timed_node("research", partial(statutory_research_node, providers=providers)))
+        workflow.add_node("generate", timed_node("generate", partial(generate_letter_node, providers=providers)))
+        workflow.set_entry_point("research")
+        workflow.add_edge("research", "generate")
+    workflow.add_node("mail", timed_node("mail", mail_dispatch_node))
+    workflow.add_edge("generate", "mail")
     workflow.add_edge("mail", END)
     
-    # Compile graph (no checkpointing here - we'll handle it in the router)
-    return workflow.compile()
-
-
-# Create singleton graph instance
-agent_graph = create_agent_graph()
+    # Compile graph with the human approval gate in front of mailing
+    return workflow.compile(
+        checkpointer=checkpointer or DatabaseCheckpointSaver(),
+        interrupt_before=["mail"]
+    )
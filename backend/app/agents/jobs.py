@@ -0,0 +1,246 @@
+import asyncio
+import logging
+from datetime import date
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+from uuid import UUID, uuid4
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.agents.events import agent_events
+from app.agents.graph import thread_config
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.database import AgentJob, Case
+from app.services.case_locks import CaseLockedError, case_locks
+from app.services.db_service import async_db_service
+from app.services.structured_logging import log_context
+from app.services.tracing import SpanContext, tracer
+
+if TYPE_CHECKING:
+    from app.providers import Providers
+
+logger = logging.getLogger(__name__)
+
+
+def build_initial_state(db_case: Case) -> Dict[str, Any]:
+    """Build the starting CaseState for a case."""
+    return {
+        "case_id": str(db_case.id),
+        "tenant_name": db_case.tenant_name,
+        "landlord_name": db_case.landlord_name,
+        "deposit_amount": db_case.deposit_amount,
+        "withheld_amount": db_case.withheld_amount,
+        "move_out_date": db_case.move_out_date.isoformat(),
+        "days_elapsed": (date.today() - db_case.move_out_date).days,
+        "tenant_address": db_case.tenant_address,
+        "landlord_address": db_case.landlord_address,
+        "dispute_description": db_case.dispute_description,
+        "evidence_urls": db_case.evidence_urls,
+        "statutory_analysis": None,
+        "violation_findings": [],
+        "demand_letter_draft": None,
+        "human_approved": False,
+        "edited_letter_html": None,
+        "redraft_letter": False,
+        "needs_approval": False,
+        "lob_mail_id": None,
+        "tracking_url": None,
+        "expected_delivery": None,
+        "status": "analyzing",
+        "error": None,
+        "metrics": None,
+        "correlation_id": uuid4().hex
+    }
+
+
+async def execute_case(case_id: UUID, graph: Any) -> Dict[str, Any]:
+    """
+    Run research and letter generation for a case.
+
+    The graph stops at the human approval gate. Progress is written to the
+    case after every node (the analysis and letter to their own tables, the
+    step to agent_state), so GET /status can report it while the run is
+    still in flight, and node transitions and letter tokens are published to
+    SSE subscribers as they happen.
+
+    Args:
+        case_id: Case to execute
+        graph: Compiled agent graph to run
+
+    Returns:
+        Final agent state
+    """
+    async with AsyncSessionLocal() as db:
+        db_case = await async_db_service.get_case(db, case_id)
+        if not db_case:
+            raise ValueError(f"Case {case_id} not found")
+
+        state = build_initial_state(db_case)
+        # Re-executing a case (its letter was rejected) must draft a new
+        # letter: the cached one was drafted from the same request
+        state["redraft_letter"] = await async_db_service.has_letter_draft(db, case_id)
+
+        async for mode, chunk in graph.astream(
+            state, thread_config(case_id), stream_mode=["updates", "custom"]
+        ):
+            if mode == "custom":
+                agent_events.publish(case_id, "token", {"text": chunk["token"]})
+                continue
+            for node, node_state in chunk.items():
+                if node.startswith("__"):
+                    # Interrupt marker emitted at the approval gate
+                    continue
+                state = {**state, **node_state}
+                pointer = await async_db_service.save_agent_state(
+                    db,
+                    case_id,
+                    "analyzing",
+                    jsonable_encoder({**state, "current_step": node})
+                )
+                # Carry the new analysis / letter ids so they're stored once
+                state = {**state, **pointer}
+                agent_events.publish(case_id, "node", {"node": node, "status": state["status"]})
+
+        await async_db_service.save_agent_state(
+            db,
+            case_id,
+            state["status"],
+            jsonable_encoder({**state, "current_step": state["status"]})
+        )
+        agent_events.publish(case_id, "done", {"status": state["status"]})
+        return state
+
+
+class AgentJobQueue:
+    """
+    In-process worker pool for agent executions.
+
+    Jobs are persisted as `agent_jobs` rows before they are queued, and a
+    fixed number of asyncio workers drain the queue. Jobs left queued or
+    running by a previous process are re-queued on start.
+
+    Several server processes may each run a queue over the same table, so a
+    job runs under its case's lock and is claimed with a conditional update;
+    a job another process is already running is skipped.
+
+    Queue items carry the span that submitted the job, so a run is traced
+    under the request that queued it. Jobs run on the graph of the provider
+    container the queue was started with (or constructed with).
+    """
+
+    def __init__(self, concurrency: Optional[int] = None, providers: Optional["Providers"] = None):
+        self.concurrency = concurrency or settings.per_worker(settings.AGENT_WORKER_CONCURRENCY)
+        self.providers = providers
+        self._queue: Optional["asyncio.Queue[Tuple[UUID, Optional[SpanContext]]]"] = None
+        self._workers: List[asyncio.Task] = []
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers)
+
+    async def start(self, providers: "Providers") -> None:
+        """Start the workers on `providers`' agent graph and re-queue unfinished jobs."""
+        if self.running:
+            return
+        self.providers = providers
+        self._queue = asyncio.Queue()
+        self._workers = [
+            asyncio.create_task(self._worker()) for _ in range(self.concurrency)
+        ]
+        async with AsyncSessionLocal() as db:
+            for job in await async_db_service.list_unfinished_jobs(db):
+                self._queue.put_nowait((job.id, None))
+
+    async def stop(self) -> None:
+        """Cancel the workers; unfinished jobs stay persisted for the next start."""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+
+    async def submit(self, db: AsyncSession, case_id: UUID) -> AgentJob:
+        """Persist an execute job for a case and queue it."""
+        if not self.running:
+            raise RuntimeError("Agent job queue is not running")
+        job = await async_db_service.create_job(db, case_id)
+        self._queue.put_nowait((job.id, tracer.current_context()))
+        return job
+
+    async def submit_many(self, db: AsyncSession, case_ids: List[UUID]) -> List[AgentJob]:
+        """Persist execute jobs for several cases in one transaction and queue them."""
+        if not self.running:
+            raise RuntimeError("Agent job queue is not running")
+        jobs = await async_db_service.create_jobs(db, case_ids)
+        parent = tracer.current_context()
+        for job in jobs:
+            self._queue.put_nowait((job.id, parent))
+        return jobs
+
+    async def join(self) -> None:
+        """Wait until every queued job has been processed."""
+        await self._queue.join()
+
+    async def _worker(self) -> None:
+        while True:
+            job_id, parent = await self._queue.get()
+            try:
+                with tracer.start_span("agent.job", {"job.id": str(job_id)}, parent=parent):
+                    await self._run(job_id)
+            except Exception:
+                logger.exception("Agent job crashed", extra={"job_id": str(job_id)})
+            finally:
+                self._queue.task_done()
+
+    def _requeue(self, job_id: UUID) -> None:
+        if self._queue is not None:
+            self._queue.put_nowait((job_id, None))
+
+    async def _run(self, job_id: UUID) -> None:
+        async with AsyncSessionLocal() as db:
+            job = await async_db_service.get_job(db, job_id)
+        if job is None or job.status not in ("queued", "running"):
+            return
+
+        span = tracer.current_span()
+        if span is not None:
+            span.set_attribute("case.id", str(job.case_id))
+        try:
+            async with case_locks.hold(job.case_id, "execute", wait=settings.CASE_LOCK_WAIT_SECONDS):
+                await self._run_locked(job_id)
+        except CaseLockedError:
+            # Usually another process running this same job; look again once
+            # its lease could have lapsed, in case it died
+            logger.info("Case is locked elsewhere, deferring job", extra={"job_id": str(job_id)})
+            asyncio.get_running_loop().call_later(case_locks.ttl_seconds, self._requeue, job_id)
+
+    async def _run_locked(self, job_id: UUID) -> None:
+        async with AsyncSessionLocal() as db:
+            job = await async_db_service.claim_job(db, job_id)
+        if job is None:
+            # Finished by another process while this one waited for the lock
+            return
+
+        try:
+            with log_context(case_id=str(job.case_id), job_id=str(job_id)):
+                await execute_case(job.case_id, self.providers.graph)
+        except Exception as e:
+            logger.error("Agent run failed: %s", e, extra={"case_id": str(job.case_id), "job_id": str(job_id)})
+            async with AsyncSessionLocal() as db:
+                await async_db_service.update_case_status(
+                    db,
+                    job.case_id,
+                    "error",
+                    agent_state={"error": str(e)}
+                )
+                await async_db_service.update_job_status(db, job_id, "failed", error=str(e))
+            agent_events.publish(job.case_id, "error", {"error": str(e)})
+            return
+
+        async with AsyncSessionLocal() as db:
+            await async_db_service.update_job_status(db, job_id, "succeeded")
+
+
+# Singleton queue, started with the app
+agent_job_queue = AgentJobQueue()
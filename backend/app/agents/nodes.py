@@ -1,22 +1,75 @@
-from typing import Dict, Any
-from app.services.claude_service import claude_service
-from app.services.lob_service import lob_service
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, Any
+from langgraph.config import get_stream_writer
+from app.services.lob_service import lob_idempotency_key
+from app.services.mail_outbox import mail_sender
+from app.services.address_verification import address_verifier
+from app.services.damages import calculate_damages
+from app.services.metrics import case_metrics, metrics
+from app.services.structured_logging import log_context
+from app.services.tracing import tracer
 from datetime import date
+import functools
+import logging
+import time
 
+if TYPE_CHECKING:
+    from app.providers import Providers
 
-async def statutory_research_node(state: Dict[str, Any]) -> Dict[str, Any]:
+logger = logging.getLogger(__name__)
+
+Node = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+
+def timed_node(name: str, node: Node) -> Node:
+    """
+    Wrap a node so its cost is measured.
+    
+    Wall time, Claude tokens, Lob calls and DB time spent inside the node are
+    exported to /metrics and added to the case's running totals in
+    state["metrics"]. The node also runs in an `agent.node.<name>` span, so
+    the Claude, Lob and database calls it makes appear as its children, and
+    with the case id and state["correlation_id"] bound to its log records.
+    
+    Args:
+        name: Graph node name used as the metric label
+        node: Node function
+    
+    Returns:
+        Instrumented node function
+    """
+    @functools.wraps(node)
+    async def run(state: Dict[str, Any]) -> Dict[str, Any]:
+        attributes = {"agent.node": name, "case.id": state.get("case_id")}
+        with tracer.start_span(f"agent.node.{name}", attributes) as span, \
+                log_context(case_id=state.get("case_id"), correlation_id=state.get("correlation_id")), \
+                case_metrics(state.get("metrics")) as collected:
+            started = time.perf_counter()
+            try:
+                state = await node(state)
+            finally:
+                metrics.observe_node(name, time.perf_counter() - started)
+            span.set_attribute("agent.status", state.get("status"))
+        state["metrics"] = collected.to_dict()
+        return state
+    
+    return run
+
+
+async def statutory_research_node(state: Dict[str, Any], providers: "Providers") -> Dict[str, Any]:
     """
     Node 1: Research Texas Property Code violations.
     
-    Analyzes the case against statutory requirements and calculates damages.
+    Damages are computed locally by the Chapter 92 rules engine; Claude
+    identifies violations and writes the summary.
     
     Args:
         state: Current agent state
+        providers: App's provider container, for the Claude client
         
     Returns:
         Updated state with analysis results
     """
-    print(f"[AGENT] Starting statutory research for case {state['case_id']}")
+    logger.info("Starting statutory research")
     
     # Prepare case data for Claude
     case_data = {
@@ -29,21 +82,26 @@ async def statutory_research_node(state: Dict[str, Any]) -> Dict[str, Any]:
         "landlord_address": state["landlord_address"]
     }
     
+    # Deterministic damages from case facts
+    damages = calculate_damages(state["withheld_amount"], state["move_out_date"])
+    
     # Call Claude for statutory analysis
-    analysis = await claude_service.analyze_statutory_compliance(case_data)
+    analysis = await providers.claude.analyze_statutory_compliance(case_data, damages)
     
     # Update state
     state["statutory_analysis"] = analysis.model_dump()
     state["violation_findings"] = [v.model_dump() for v in analysis.violations]
     state["status"] = "analyzed"
     
-    print(f"[AGENT] Analysis complete: {len(analysis.violations)} violations found")
-    print(f"[AGENT] Total damages: ${analysis.total_damages}")
+    logger.info(
+        "Analysis complete",
+        extra={"violations": len(analysis.violations), "total_damages": str(analysis.total_damages)}
+    )
     
     return state
 
 
-async def generate_letter_node(state: Dict[str, Any]) -> Dict[str, Any]:
+async def generate_letter_node(state: Dict[str, Any], providers: "Providers") -> Dict[str, Any]:
     """
     Node 2: Generate demand letter using Claude.
     
@@ -51,11 +109,12 @@ async def generate_letter_node(state: Dict[str, Any]) -> Dict[str, Any]:
     
     Args:
         state: Current agent state with analysis results
+        providers: App's provider container, for the Claude client
         
     Returns:
         Updated state with draft letter
     """
-    print(f"[AGENT] Generating demand letter for case {state['case_id']}")
+    logger.info("Generating demand letter")
     
     # Prepare data
     from app.models.schemas import StatutoryAnalysis, ViolationFinding
@@ -86,35 +145,92 @@ async def generate_letter_node(state: Dict[str, Any]) -> Dict[str, Any]:
         "move_out_date": state["move_out_date"]
     }
     
-    # Generate letter
-    letter = await claude_service.generate_demand_letter(case_data, analysis)
+    # Generate letter, forwarding tokens to stream_mode="custom" consumers
+    writer = get_stream_writer()
+    letter = await providers.claude.generate_demand_letter(
+        case_data,
+        analysis,
+        on_text=lambda text: writer({"token": text}),
+        refresh=state.get("redraft_letter", False)
+    )
     
     # Update state
     state["demand_letter_draft"] = letter.model_dump()
     state["status"] = "awaiting_approval"
     state["needs_approval"] = True
     
-    print(f"[AGENT] Letter generated, awaiting human approval")
+    logger.info("Letter generated, awaiting human approval")
+    
+    return state
+
+
+async def case_package_node(state: Dict[str, Any], providers: "Providers") -> Dict[str, Any]:
+    """
+    Fused alternative to nodes 1 and 2 (settings.CLAUDE_FUSED_DRAFTING).
+    
+    Analyzes the case and drafts the demand letter in a single Claude call.
+    
+    Args:
+        state: Current agent state
+        providers: App's provider container, for the Claude client
+        
+    Returns:
+        Updated state with analysis results and draft letter
+    """
+    logger.info("Drafting analysis and letter")
+    
+    case_data = {
+        "tenant_name": state["tenant_name"],
+        "landlord_name": state["landlord_name"],
+        "tenant_address": state["tenant_address"],
+        "landlord_address": state["landlord_address"],
+        "deposit_amount": float(state["deposit_amount"]),
+        "withheld_amount": float(state["withheld_amount"]),
+        "move_out_date": state["move_out_date"],
+        "dispute_description": state["dispute_description"]
+    }
+    damages = calculate_damages(state["withheld_amount"], state["move_out_date"])
+    
+    writer = get_stream_writer()
+    analysis, letter = await providers.claude.draft_case_package(
+        case_data,
+        damages,
+        on_text=lambda text: writer({"token": text}),
+        refresh=state.get("redraft_letter", False)
+    )
+    
+    state["statutory_analysis"] = analysis.model_dump()
+    state["violation_findings"] = [v.model_dump() for v in analysis.violations]
+    state["demand_letter_draft"] = letter.model_dump()
+    state["status"] = "awaiting_approval"
+    state["needs_approval"] = True
+    
+    logger.info(
+        "Letter generated, awaiting human approval",
+        extra={"violations": len(analysis.violations), "total_damages": str(analysis.total_damages)}
+    )
     
     return state
 
 
 async def mail_dispatch_node(state: Dict[str, Any]) -> Dict[str, Any]:
     """
-    Node 3: Send certified mail via Lob API.
+    Node 3: Queue certified mail for the Lob sender.
     
-    Only executes if human_approved = True.
+    Only executes if human_approved = True. The approved letter is committed
+    to the mail outbox together with the case's move to "mail_queued"; the
+    background mail sender makes the Lob call and marks the case "mailed".
     
     Args:
         state: Current agent state with approved letter
         
     Returns:
-        Updated state with mailing results
+        Updated state with the outbox entry
     """
-    print(f"[AGENT] Dispatching certified mail for case {state['case_id']}")
+    logger.info("Queuing certified mail")
     
     if not state.get("human_approved", False):
-        print("[AGENT] ERROR: Letter not approved, cannot send mail")
+        logger.error("Letter not approved, cannot send mail")
         state["status"] = "error"
         state["error"] = "Letter must be approved before mailing"
         return state
@@ -122,27 +238,23 @@ async def mail_dispatch_node(state: Dict[str, Any]) -> Dict[str, Any]:
     # Get letter content
     letter_html = state.get("edited_letter_html") or state["demand_letter_draft"]["letter_html"]
     
-    # Send via Lob
     try:
-        result = await lob_service.send_certified_letter(
-            to_address=state["landlord_address"],
-            from_address=state["tenant_address"],
-            letter_html=letter_html,
+        state["status"] = "mail_queued"
+        state["needs_approval"] = False
+        # Addresses were verified at intake; this only reads the cached correction
+        mail = await mail_sender.enqueue(
+            state,
+            letter_html,
+            idempotency_key=lob_idempotency_key(state["case_id"], letter_html),
+            to_address=await address_verifier.resolve(state["landlord_address"]),
+            from_address=await address_verifier.resolve(state["tenant_address"]),
             description=f"Demand Letter - Case {state['case_id']}"
         )
         
-        # Update state
-        state["lob_mail_id"] = result.lob_id
-        state["tracking_url"] = result.tracking_url
-        state["expected_delivery"] = result.expected_delivery
-        state["status"] = "mailed"
-        state["needs_approval"] = False
-        
-        print(f"[AGENT] Mail sent successfully: {result.lob_id}")
-        print(f"[AGENT] Tracking: {result.tracking_url}")
+        logger.info("Mail queued", extra={"outbox_id": str(mail.id)})
         
     except Exception as e:
-        print(f"[AGENT] ERROR sending mail: {e}")
+        logger.exception("Failed to queue mail")
         state["status"] = "error"
         state["error"] = str(e)
     
@@ -150,4 +262,10 @@ async def mail_dispatch_node(state: Dict[str, Any]) -> Dict[str, Any]:
 
 
 # Export node functions
-__all__ = ["statutory_research_node", "generate_letter_node", "mail_dispatch_node"]
+__all__ = [
+    "timed_node",
+    "statutory_research_node",
+    "generate_letter_node",
+    "case_package_node",
+    "mail_dispatch_node"
+]
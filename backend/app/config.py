@@ -1,16 +1,20 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import List
+from typing import List, Optional, Union
 
 
 class Settings(BaseSettings):
     """Application configuration settings loaded from environment variables."""
     
-    # Database
+    # Database (pool sizes are totals, split across worker processes)
     DATABASE_URL: str
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800  # seconds; recycle before server-side idle timeouts
     
-    # API Keys
-    ANTHROPIC_API_KEY: str
-    LOB_API_KEY: str
+    # API Keys (checked when Claude / Lob are first used, not at import)
+    ANTHROPIC_API_KEY: Optional[str] = None
+    LOB_API_KEY: Optional[str] = None
     
     # Application
     APP_NAME: str = "DepositGuard AI"
@@ -22,6 +26,71 @@ class Settings(BaseSettings):
     
     # Model Configuration
     CLAUDE_MODEL: str = "claude-sonnet-4-20250514"
+    CLAUDE_BASE_URL: Optional[str] = None  # Override for proxies or local stub servers
+    CLAUDE_FUSED_DRAFTING: bool = False  # One call returns analysis and letter (see draft_case_package)
+    CLAUDE_REPAIR_ATTEMPTS: int = 1  # Re-asks for fields that fail validation before giving up
+    
+    # Claude response cache (in-memory LRU + database tier)
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_MEMORY_SIZE: int = 256
+    LLM_CACHE_MAX_ENTRIES: int = 10000
+    LLM_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+    
+    # Response compression (brotli when installed, else gzip)
+    RESPONSE_COMPRESSION_MIN_BYTES: int = 1024  # smaller bodies are sent as-is
+    RESPONSE_GZIP_LEVEL: int = 6
+    RESPONSE_BROTLI_QUALITY: int = 4
+    
+    # Case progress cache behind GET /api/agent/cases/{id}/progress (per process)
+    STATUS_CACHE_TTL_SECONDS: float = 5.0  # bounds staleness when another worker wrote the case
+    STATUS_CACHE_MAX_ENTRIES: int = 10000
+    STATUS_LONG_POLL_MAX_SECONDS: float = 30.0
+    
+    # Background agent workers (total, split across worker processes)
+    AGENT_WORKER_CONCURRENCY: int = 4
+    
+    # Multi-process serving (python -m app.serve)
+    WEB_CONCURRENCY: int = 0  # worker processes; 0 = one per available CPU, up to WEB_MAX_WORKERS
+    WEB_MAX_WORKERS: int = 8
+    CASE_LOCK_TTL_SECONDS: int = 300  # lease on a case's execute/approve lock; renewed while held
+    CASE_LOCK_WAIT_SECONDS: float = 10.0  # how long an agent job waits for a busy case
+    
+    # Bulk case import
+    CASE_IMPORT_CHUNK_SIZE: int = 500  # rows per multi-row INSERT / transaction
+    
+    # Lob REST API and address verification
+    LOB_BASE_URL: str = "https://api.lob.com/v1"  # Override for local stub servers
+    LOB_TIMEOUT_SECONDS: float = 30.0
+    LOB_MAX_RETRIES: int = 4
+    LOB_RETRY_BASE_DELAY: float = 0.5  # seconds; doubles per attempt, with full jitter
+    LOB_RETRY_MAX_DELAY: float = 8.0
+    LOB_RATE_LIMIT_PER_SECOND: float = 25.0  # stay under Lob's 150 requests / 5 s (total across workers)
+    LOB_RATE_LIMIT_BURST: int = 10
+    ADDRESS_VERIFICATION_ENABLED: bool = True  # Pre-verify addresses at case intake
+    ADDRESS_VERIFICATION_TTL_SECONDS: int = 90 * 24 * 3600
+    
+    # Mail outbox sender
+    MAIL_OUTBOX_BATCH_SIZE: int = 20
+    MAIL_OUTBOX_POLL_SECONDS: float = 1.0
+    MAIL_OUTBOX_MAX_ATTEMPTS: int = 5
+    MAIL_OUTBOX_LEASE_SECONDS: int = 300  # reclaim rows left "sending" by a crashed sender
+    
+    # Claude HTTP client pool and concurrency limits (totals, split across worker processes)
+    CLAUDE_MAX_CONNECTIONS: int = 20
+    CLAUDE_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    CLAUDE_MAX_CONCURRENT_REQUESTS: int = 10
+    CLAUDE_TIMEOUT_SECONDS: float = 120.0
+    CLAUDE_MAX_RETRIES: int = 2
+    
+    # Logging: JSON lines on stdout, written by a background thread
+    LOG_LEVEL: str = "INFO"
+    LOG_DEBUG_SAMPLE_RATE: float = 0.1  # fraction of DEBUG output kept, sampled per case run
+    LOG_QUEUE_SIZE: int = 10000  # records buffered before new ones are dropped
+    
+    # Tracing: comma-separated span exporters ("console", "file"); empty disables export
+    TRACING_EXPORTERS: str = ""
+    TRACING_FILE: str = "traces.jsonl"  # JSON lines, one span per line
+    TRACING_QUEUE_SIZE: int = 10000  # spans buffered for the file writer before new ones are dropped
     
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -29,6 +98,37 @@ class Settings(BaseSettings):
         case_sensitive=False
     )
     
+    @property
+    def async_database_url(self) -> str:
+        """DATABASE_URL rewritten for the async drivers (asyncpg / aiosqlite)."""
+        url = self.DATABASE_URL
+        for prefix, async_prefix in (
+            ("postgresql+psycopg2://", "postgresql+asyncpg://"),
+            ("postgresql://", "postgresql+asyncpg://"),
+            ("postgres://", "postgresql+asyncpg://"),
+            ("sqlite://", "sqlite+aiosqlite://"),
+        ):
+            if url.startswith(prefix):
+                return async_prefix + url[len(prefix):]
+        return url
+    
+    @property
+    def worker_count(self) -> int:
+        """Worker processes serving the app (app.serve exports the resolved count)."""
+        return max(1, self.WEB_CONCURRENCY)
+    
+    def per_worker(self, total: Union[int, float]) -> Union[int, float]:
+        """
+        One worker process's share of a process-wide limit.
+        
+        Connection pools, concurrency limits and the Lob rate limit are
+        configured as totals so that adding workers doesn't multiply the load
+        on PostgreSQL, Claude or Lob. Each worker gets at least 1.
+        """
+        if isinstance(total, float):
+            return total / self.worker_count
+        return max(1, total // self.worker_count)
+    
     @property
     def cors_origins(self) -> List[str]:
         """Parse ALLOWED_ORIGINS into list."""
@@ -1,21 +1,57 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import NullPool
 from app.config import settings
-from app.models.database import Base
-from typing import Generator
+from app.migrations.runner import BASE, check_schema, downgrade, upgrade
+from app.services.metrics import metrics
+from typing import AsyncGenerator, Generator
+
+IS_SQLITE = settings.DATABASE_URL.startswith("sqlite")
+
+if IS_SQLITE:
+    # SQLite (tests) needs connections shareable across threads; no pool sizing
+    engine_options = {"connect_args": {"check_same_thread": False}}
+else:
+    # Each worker process has its own pools, so they share the configured totals
+    engine_options = {
+        "pool_size": settings.per_worker(settings.DB_POOL_SIZE),
+        "max_overflow": settings.per_worker(settings.DB_MAX_OVERFLOW),
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE
+    }
 
 # Create database engine
 engine = create_engine(
     settings.DATABASE_URL,
     echo=settings.DEBUG,
     pool_pre_ping=True,
-    pool_size=5,
-    max_overflow=10
+    **engine_options
 )
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine for request handlers (asyncpg / aiosqlite)
+async_engine = create_async_engine(
+    settings.async_database_url,
+    echo=settings.DEBUG,
+    pool_pre_ping=True,
+    **({"poolclass": NullPool} if IS_SQLITE else engine_options)
+)
+
+# Statement timings for /metrics and per-case agent_state metrics
+metrics.instrument_engine(engine)
+metrics.instrument_engine(async_engine.sync_engine)
+
+# Async session factory; objects stay usable after commit
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 
 def get_db() -> Generator[Session, None, None]:
     """
@@ -31,11 +67,36 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency for FastAPI routes to get an async database session.
+    
+    Yields:
+        Async database session
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 def init_db():
-    """Initialize database tables."""
-    Base.metadata.create_all(bind=engine)
+    """Bring the database schema up to date (same as `python -m app.migrate upgrade`)."""
+    upgrade(engine)
+
+
+async def check_db_schema() -> str:
+    """
+    Verify the schema is at the code's head revision, with one query.
+    
+    Returns:
+        The current revision
+    
+    Raises:
+        SchemaOutOfDateError: If migrations haven't been applied
+    """
+    async with async_engine.connect() as connection:
+        return await connection.run_sync(check_schema)
 
 
 def drop_db():
-    """Drop all database tables (use with caution!)."""
-    Base.metadata.drop_all(bind=engine)
+    """Drop all database tables by reverting every migration (use with caution!)."""
+    downgrade(engine, BASE)
@@ -1,8 +1,57 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
+import logging
+from app.compression import CompressionMiddleware
 from app.config import settings
-from app.database import init_db
+from app.database import check_db_schema
+from app.responses import APIJSONResponse
 from app.routers import cases, agent
+from app.agents.jobs import agent_job_queue
+from app.providers import Providers
+from app.services.mail_outbox import mail_sender
+from app.services.metrics import PROMETHEUS_CONTENT_TYPE, metrics
+from app.services.structured_logging import configure_logging, shutdown_logging
+from app.services.tracing import format_traceparent, parse_traceparent, tracer
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Start structured logging, check the schema version and run the background workers.
+    
+    Claude, Lob and the agent graph live in a provider container built here
+    (each service on first use) and kept on app.state: routes get it through
+    the dependencies in app.providers, and the agent job queue and mail
+    sender are started with it. On shutdown the workers are stopped, pooled
+    HTTP connections released, and logs and spans flushed.
+    """
+    configure_logging()
+    logger.info("Starting %s", settings.APP_NAME)
+    # Migrations are applied by `python -m app.migrate upgrade`, not here
+    revision = await check_db_schema()
+    logger.info("Database schema is current", extra={"schema_revision": revision})
+    
+    providers = Providers()
+    app.state.providers = providers
+    await agent_job_queue.start(providers)
+    await mail_sender.start(providers)
+    logger.info(
+        "Startup complete",
+        extra={"claude_model": settings.CLAUDE_MODEL, "agent_workers": agent_job_queue.concurrency}
+    )
+    try:
+        yield
+    finally:
+        await agent_job_queue.stop()
+        await mail_sender.stop()
+        await providers.aclose()
+        tracer.shutdown()
+        shutdown_logging()
+
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -10,7 +59,9 @@ app = FastAPI(
     description="AI-powered security deposit dispute resolution for Texas tenants",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=APIJSONResponse,
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -20,23 +71,53 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "traceparent", "ETag"],
+)
+
+# Compress JSON bodies above the threshold (case payloads carry whole letters)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.RESPONSE_COMPRESSION_MIN_BYTES,
+    gzip_level=settings.RESPONSE_GZIP_LEVEL,
+    brotli_quality=settings.RESPONSE_BROTLI_QUALITY
 )
 
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """
+    Open a span per request; nodes, Claude, Lob and DB calls nest under it.
+
+    Joins the caller's trace when a W3C traceparent header is sent, and
+    returns the request span's traceparent so a client can find its trace.
+    """
+    attributes = {"http.method": request.method, "http.target": request.url.path}
+    with tracer.start_span(
+        f"{request.method} {request.url.path}",
+        attributes,
+        parent=parse_traceparent(request.headers.get("traceparent"))
+    ) as span:
+        response = await call_next(request)
+        route = request.scope.get("route")
+        if route is not None:
+            # Name by route template so spans group across case ids
+            span.name = f"{request.method} {route.path}"
+            span.set_attribute("http.route", route.path)
+        case_id = request.path_params.get("case_id")
+        if case_id:
+            span.set_attribute("case.id", case_id)
+        span.set_attribute("http.status_code", response.status_code)
+        if response.status_code >= 500:
+            span.status = "error"
+        response.headers["traceparent"] = format_traceparent(span.context)
+        return response
+
+
 # Include routers
 app.include_router(cases.router, prefix="/api/cases", tags=["Cases"])
 app.include_router(agent.router, prefix="/api/agent", tags=["Agent"])
 
 
-@app.on_event("startup")
-async def startup_event():
-    """Initialize database on startup."""
-    print(f"🚀 Starting {settings.APP_NAME}...")
-    print(f"📊 Initializing database...")
-    init_db()
-    print(f"✅ Database initialized")
-    print(f"🤖 Claude model: {settings.CLAUDE_MODEL}")
-
-
 @app.get("/", tags=["Root"])
 async def root():
     """Root endpoint."""
@@ -57,6 +138,12 @@ async def health_check():
     }
 
 
+@app.get("/metrics", tags=["Health"])
+async def prometheus_metrics():
+    """Node, Claude, Lob and database timings and token counts for Prometheus."""
+    return Response(content=metrics.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
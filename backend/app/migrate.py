@@ -0,0 +1,52 @@
+"""
+Apply or inspect database schema migrations.
+
+Usage (from backend/):
+    python -m app.migrate upgrade [REVISION]     apply pending revisions (default: head)
+    python -m app.migrate downgrade REVISION     revert to REVISION ("base" = empty)
+    python -m app.migrate current                show the database's revision
+    python -m app.migrate history                list revisions, oldest first
+    python -m app.migrate stamp REVISION         mark REVISION applied without running it
+
+Run `upgrade` before starting (or restarting) the API with new code; the
+server only checks that the schema is at the head revision and refuses to
+start otherwise. Revisions live in app/migrations/versions/.
+"""
+from app.database import engine
+from app.migrations import runner
+import argparse
+import sys
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("upgrade").add_argument("revision", nargs="?", default="head")
+    commands.add_parser("downgrade").add_argument("revision")
+    commands.add_parser("current")
+    commands.add_parser("history")
+    commands.add_parser("stamp").add_argument("revision")
+    args = parser.parse_args(argv)
+
+    if args.command == "upgrade":
+        applied = runner.upgrade(engine, args.revision)
+        print(f"Applied {', '.join(applied)}" if applied else "Already up to date")
+    elif args.command == "downgrade":
+        reverted = runner.downgrade(engine, args.revision)
+        print(f"Reverted {', '.join(reverted)}" if reverted else "Nothing to revert")
+    elif args.command == "current":
+        with engine.connect() as connection:
+            current = runner.current_revision(connection)
+        head = runner.head_revision()
+        print(f"{current or runner.BASE}{' (head)' if current == head else f' (head is {head})'}")
+    elif args.command == "history":
+        for revision in runner.load_revisions():
+            print(f"{revision.down_revision or runner.BASE} -> {revision.id}  {revision.description}")
+    elif args.command == "stamp":
+        runner.stamp(engine, args.revision)
+        print(f"Stamped {args.revision}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,209 @@
+"""
+Versioned schema migrations.
+
+Each module in app/migrations/versions/ is one revision, in the style of an
+Alembic script: it sets `revision` and `down_revision` and defines
+`upgrade(connection)` and `downgrade(connection)`. The applied revision is
+stored in an `alembic_version` table (same layout as Alembic's), so the
+server can check it with a single query at startup instead of reflecting
+and creating every table.
+
+Revisions run one per transaction. A revision that sets `transactional =
+False` (e.g. to build indexes with CREATE INDEX CONCURRENTLY) runs in
+autocommit mode instead.
+"""
+from pathlib import Path
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import DBAPIError
+from types import ModuleType
+from typing import Dict, List, NamedTuple, Optional
+import importlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+VERSION_TABLE = "alembic_version"
+VERSIONS_PACKAGE = "app.migrations.versions"
+VERSIONS_DIR = Path(__file__).parent / "versions"
+
+# Target meaning "no revisions applied"
+BASE = "base"
+
+
+class MigrationError(Exception):
+    """Raised for a broken revision chain or an unknown target revision."""
+
+
+class SchemaOutOfDateError(RuntimeError):
+    """Raised at startup when the database isn't at the code's head revision."""
+
+    def __init__(self, current: Optional[str], head: str):
+        super().__init__(
+            f"Database schema is at revision {current or 'base'}, this code needs {head}; "
+            f"run `python -m app.migrate upgrade`"
+        )
+        self.current = current
+        self.head = head
+
+
+class Revision(NamedTuple):
+    id: str
+    down_revision: Optional[str]
+    description: str
+    module: ModuleType
+
+    @property
+    def transactional(self) -> bool:
+        return getattr(self.module, "transactional", True)
+
+
+def load_revisions() -> List[Revision]:
+    """
+    Import every revision module and order them from first to head.
+
+    Raises:
+        MigrationError: If the revisions don't form a single linear chain
+    """
+    by_parent: Dict[Optional[str], Revision] = {}
+    for path in sorted(VERSIONS_DIR.glob("[0-9]*.py")):
+        module = importlib.import_module(f"{VERSIONS_PACKAGE}.{path.stem}")
+        revision = Revision(
+            module.revision,
+            module.down_revision,
+            (module.__doc__ or path.stem).strip().splitlines()[0],
+            module
+        )
+        if revision.down_revision in by_parent:
+            raise MigrationError(
+                f"Revisions {by_parent[revision.down_revision].id} and {revision.id} "
+                f"both follow {revision.down_revision or 'base'}"
+            )
+        by_parent[revision.down_revision] = revision
+
+    chain: List[Revision] = []
+    parent: Optional[str] = None
+    while parent in by_parent:
+        chain.append(by_parent[parent])
+        parent = chain[-1].id
+    if len(chain) != len(by_parent):
+        orphans = {r.id for r in by_parent.values()} - {r.id for r in chain}
+        raise MigrationError(f"Revisions not reachable from base: {sorted(orphans)}")
+    return chain
+
+
+def head_revision() -> Optional[str]:
+    """Latest revision in the code."""
+    revisions = load_revisions()
+    return revisions[-1].id if revisions else None
+
+
+def current_revision(connection: Connection) -> Optional[str]:
+    """Revision the database is at (None before the first migration)."""
+    try:
+        return connection.execute(text(f"SELECT version_num FROM {VERSION_TABLE}")).scalar()
+    except DBAPIError:
+        # No version table yet
+        connection.rollback()
+        return None
+
+
+def check_schema(connection: Connection) -> str:
+    """
+    Verify the database is at the head revision (one query).
+
+    Returns:
+        The current revision
+
+    Raises:
+        SchemaOutOfDateError: If migrations are pending (or the database is newer)
+    """
+    head = head_revision()
+    current = current_revision(connection)
+    if current != head:
+        raise SchemaOutOfDateError(current, head)
+    return current
+
+
+def upgrade(engine: Engine, target: str = "head") -> List[str]:
+    """
+    Apply pending revisions up to `target`.
+
+    Returns:
+        Ids of the revisions applied, in order
+    """
+    revisions = load_revisions()
+    ids = [revision.id for revision in revisions]
+    with engine.connect() as connection:
+        current = current_revision(connection)
+    start = _position(ids, current)
+    stop = len(ids) if target == "head" else _position(ids, target)
+
+    applied = []
+    for revision in revisions[start:stop]:
+        logger.info("Upgrading schema", extra={"revision": revision.id, "description": revision.description})
+        _run(engine, revision, revision.module.upgrade, revision.id)
+        applied.append(revision.id)
+    return applied
+
+
+def downgrade(engine: Engine, target: str) -> List[str]:
+    """
+    Revert applied revisions down to `target` ("base" reverts everything).
+
+    Returns:
+        Ids of the revisions reverted, newest first
+    """
+    revisions = load_revisions()
+    ids = [revision.id for revision in revisions]
+    with engine.connect() as connection:
+        current = current_revision(connection)
+    start = _position(ids, current)
+    stop = _position(ids, None if target == BASE else target)
+
+    reverted = []
+    for revision in reversed(revisions[stop:start]):
+        logger.info("Downgrading schema", extra={"revision": revision.id, "description": revision.description})
+        _run(engine, revision, revision.module.downgrade, revision.down_revision)
+        reverted.append(revision.id)
+    return reverted
+
+
+def stamp(engine: Engine, target: str) -> None:
+    """Record `target` as applied without running anything."""
+    ids = [revision.id for revision in load_revisions()]
+    if target == "head":
+        target = ids[-1]
+    _position(ids, None if target == BASE else target)
+    with engine.begin() as connection:
+        _set_version(connection, None if target == BASE else target)
+
+
+def _position(ids: List[str], revision: Optional[str]) -> int:
+    """Number of revisions applied when the database is at `revision`."""
+    if revision is None:
+        return 0
+    if revision not in ids:
+        raise MigrationError(f"Unknown revision {revision}")
+    return ids.index(revision) + 1
+
+
+def _run(engine: Engine, revision: Revision, step, version: Optional[str]) -> None:
+    if revision.transactional:
+        with engine.begin() as connection:
+            step(connection)
+            _set_version(connection, version)
+        return
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        step(connection)
+        _set_version(connection, version)
+
+
+def _set_version(connection: Connection, version: Optional[str]) -> None:
+    connection.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {VERSION_TABLE} "
+        f"(version_num VARCHAR(32) NOT NULL, CONSTRAINT {VERSION_TABLE}_pkc PRIMARY KEY (version_num))"
+    ))
+    connection.execute(text(f"DELETE FROM {VERSION_TABLE}"))
+    if version is not None:
+        connection.execute(text(f"INSERT INTO {VERSION_TABLE} (version_num) VALUES (:version)"), {"version": version})
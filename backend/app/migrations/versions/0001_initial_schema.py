@@ -0,0 +1,53 @@
+"""Initial schema: cases and checkpoints, as first released.
+
+This is the schema the app created with create_all before migrations
+existed. Tables that already exist are left as they are, so this revision
+adopts such databases; 0002 then adds what later versions of the models
+introduced.
+"""
+from sqlalchemy import Column, DECIMAL, Date, DateTime, ForeignKey, JSON, MetaData, String, Table, Text
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.engine import Connection
+from sqlalchemy.sql import func
+
+revision = "0001"
+down_revision = None
+
+JSONType = JSON().with_variant(JSONB(), "postgresql")
+
+metadata = MetaData()
+
+Table(
+    "cases", metadata,
+    Column("id", UUID(as_uuid=True), primary_key=True),
+    Column("tenant_name", String(255), nullable=False),
+    Column("landlord_name", String(255), nullable=False),
+    Column("deposit_amount", DECIMAL(10, 2), nullable=False),
+    Column("withheld_amount", DECIMAL(10, 2), nullable=False),
+    Column("move_out_date", Date, nullable=False),
+    Column("tenant_address", JSONType, nullable=False),
+    Column("landlord_address", JSONType, nullable=False),
+    Column("dispute_description", Text, nullable=False),
+    Column("evidence_urls", JSONType),
+    Column("agent_state", JSONType),
+    Column("status", String(50)),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Column("updated_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+Table(
+    "checkpoints", metadata,
+    Column("id", UUID(as_uuid=True), primary_key=True),
+    Column("case_id", UUID(as_uuid=True), ForeignKey("cases.id", ondelete="CASCADE"), nullable=False),
+    Column("checkpoint_data", JSONType, nullable=False),
+    Column("checkpoint_ns", String(255)),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+
+def upgrade(connection: Connection) -> None:
+    metadata.create_all(connection, checkfirst=True)
+
+
+def downgrade(connection: Connection) -> None:
+    metadata.drop_all(connection, checkfirst=True)
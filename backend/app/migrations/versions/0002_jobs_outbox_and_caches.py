@@ -0,0 +1,117 @@
+"""Add checkpoint ids, case list indexes, and the job, lock, outbox and cache tables.
+
+These came with versions of the models released before migrations, when
+the app only ran create_all at startup. create_all adds missing tables but
+never alters existing ones, so an adopted database may have some of the
+new tables yet lack checkpoints.checkpoint_id or the cases indexes. Each
+step here checks what is already present and adds only what is missing.
+"""
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, JSON, MetaData, String, Table, Text, inspect, text
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.engine import Connection
+from sqlalchemy.sql import func
+
+revision = "0002"
+down_revision = "0001"
+
+JSONType = JSON().with_variant(JSONB(), "postgresql")
+
+metadata = MetaData()
+
+# Existing tables, only the columns the new indexes and foreign keys use
+cases = Table(
+    "cases", metadata,
+    Column("id", UUID(as_uuid=True), primary_key=True),
+    Column("status", String(50)),
+    Column("created_at", DateTime(timezone=True)),
+)
+
+checkpoints = Table(
+    "checkpoints", metadata,
+    Column("checkpoint_id", String(64)),
+)
+
+INDEXES = [
+    Index("ix_checkpoints_checkpoint_id", checkpoints.c.checkpoint_id),
+    Index("ix_cases_created_at_id", cases.c.created_at, cases.c.id),
+    Index("ix_cases_status_created_at_id", cases.c.status, cases.c.created_at, cases.c.id),
+]
+
+agent_jobs = Table(
+    "agent_jobs", metadata,
+    Column("id", UUID(as_uuid=True), primary_key=True),
+    Column("case_id", UUID(as_uuid=True), ForeignKey("cases.id", ondelete="CASCADE"), nullable=False, index=True),
+    Column("job_type", String(50), nullable=False),
+    Column("status", String(50), nullable=False, index=True),
+    Column("error", Text),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Column("started_at", DateTime(timezone=True)),
+    Column("finished_at", DateTime(timezone=True)),
+)
+
+case_locks = Table(
+    "case_locks", metadata,
+    Column("case_id", UUID(as_uuid=True), primary_key=True),
+    Column("operation", String(50), nullable=False),
+    Column("owner", String(255), nullable=False),
+    Column("acquired_at", DateTime(timezone=True), nullable=False),
+    Column("expires_at", DateTime(timezone=True), nullable=False),
+)
+
+mail_outbox = Table(
+    "mail_outbox", metadata,
+    Column("id", UUID(as_uuid=True), primary_key=True),
+    Column("case_id", UUID(as_uuid=True), ForeignKey("cases.id", ondelete="CASCADE"), nullable=False, index=True),
+    Column("idempotency_key", String(128), nullable=False, unique=True),
+    Column("to_address", JSONType, nullable=False),
+    Column("from_address", JSONType, nullable=False),
+    Column("letter_html", Text, nullable=False),
+    Column("description", String(255), nullable=False),
+    Column("status", String(50), nullable=False),
+    Column("attempts", Integer, nullable=False),
+    Column("last_error", Text),
+    Column("next_attempt_at", DateTime(timezone=True), nullable=False),
+    Column("lob_id", String(100)),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Column("claimed_at", DateTime(timezone=True)),
+    Column("sent_at", DateTime(timezone=True)),
+    Index("ix_mail_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+)
+
+llm_cache = Table(
+    "llm_cache", metadata,
+    Column("key", String(64), primary_key=True),
+    Column("kind", String(50), nullable=False),
+    Column("model", String(100), nullable=False),
+    Column("response", JSONType, nullable=False),
+    Column("created_at", DateTime(timezone=True), nullable=False, index=True),
+    Column("expires_at", DateTime(timezone=True), nullable=False),
+)
+
+address_verifications = Table(
+    "address_verifications", metadata,
+    Column("key", String(64), primary_key=True),
+    Column("normalized_address", JSONType, nullable=False),
+    Column("deliverability", String(50), nullable=False),
+    Column("verified_address", JSONType),
+    Column("created_at", DateTime(timezone=True), nullable=False),
+    Column("expires_at", DateTime(timezone=True), nullable=False, index=True),
+)
+
+NEW_TABLES = [agent_jobs, case_locks, mail_outbox, llm_cache, address_verifications]
+
+
+def upgrade(connection: Connection) -> None:
+    columns = {column["name"] for column in inspect(connection).get_columns("checkpoints")}
+    if "checkpoint_id" not in columns:
+        connection.execute(text("ALTER TABLE checkpoints ADD COLUMN checkpoint_id VARCHAR(64)"))
+    for index in INDEXES:
+        index.create(connection, checkfirst=True)
+    metadata.create_all(connection, tables=NEW_TABLES, checkfirst=True)
+
+
+def downgrade(connection: Connection) -> None:
+    metadata.drop_all(connection, tables=NEW_TABLES, checkfirst=True)
+    for index in INDEXES:
+        index.drop(connection, checkfirst=True)
+    connection.execute(text("ALTER TABLE checkpoints DROP COLUMN checkpoint_id"))
@@ -0,0 +1,186 @@
+"""Split analyses, versioned letter drafts and mailings out of cases.agent_state.
+
+Creates the three tables, then backfills them from cases whose agent_state
+still holds the whole agent state: the analysis, the generated letter (and
+the approved edit, if any) and the Lob mailing are copied out, and
+agent_state is reduced to the pointer document.
+"""
+from datetime import datetime, timezone
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, JSON, MetaData, String, Table, Text, UniqueConstraint, func, select
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.engine import Connection
+from typing import Any, Dict, Optional
+import uuid
+
+revision = "0003"
+down_revision = "0002"
+
+JSONType = JSON().with_variant(JSONB(), "postgresql")
+
+# Keys agent_state keeps as of this revision
+POINTER_KEYS = (
+    "status",
+    "current_step",
+    "error",
+    "needs_approval",
+    "human_approved",
+    "correlation_id",
+    "metrics",
+    "analysis_id",
+    "letter_draft_id",
+    "approved_letter_draft_id",
+    "mailing_id",
+)
+
+BATCH_SIZE = 500
+
+metadata = MetaData()
+
+# Existing tables, only the columns the backfill touches
+cases = Table(
+    "cases", metadata,
+    Column("id", UUID(as_uuid=True), primary_key=True),
+    Column("agent_state", JSONType),
+)
+mail_outbox = Table(
+    "mail_outbox", metadata,
+    Column("id", UUID(as_uuid=True), primary_key=True),
+    Column("case_id", UUID(as_uuid=True)),
+    Column("lob_id", String(100)),
+)
+
+analyses = Table(
+    "analyses", metadata,
+    Column("id", UUID(as_uuid=True), primary_key=True),
+    Column("case_id", UUID(as_uuid=True), ForeignKey("cases.id", ondelete="CASCADE"), nullable=False, index=True),
+    Column("statutory_analysis", JSONType, nullable=False),
+    Column("violation_findings", JSONType, nullable=False),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+letter_drafts = Table(
+    "letter_drafts", metadata,
+    Column("id", UUID(as_uuid=True), primary_key=True),
+    Column("case_id", UUID(as_uuid=True), ForeignKey("cases.id", ondelete="CASCADE"), nullable=False),
+    Column("version", Integer, nullable=False),
+    Column("source", String(50), nullable=False),
+    Column("letter_html", Text, nullable=False),
+    Column("letter_text", Text),
+    Column("citations", JSONType, nullable=False),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    UniqueConstraint("case_id", "version", name="uq_letter_drafts_case_id_version"),
+)
+
+mailings = Table(
+    "mailings", metadata,
+    Column("id", UUID(as_uuid=True), primary_key=True),
+    Column("case_id", UUID(as_uuid=True), ForeignKey("cases.id", ondelete="CASCADE"), nullable=False, index=True),
+    Column("outbox_id", UUID(as_uuid=True), ForeignKey("mail_outbox.id", ondelete="SET NULL")),
+    Column("letter_draft_id", UUID(as_uuid=True), ForeignKey("letter_drafts.id", ondelete="SET NULL")),
+    Column("lob_mail_id", String(100)),
+    Column("tracking_url", String(500)),
+    Column("expected_delivery", String(50)),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+NEW_TABLES = [analyses, letter_drafts, mailings]
+
+
+def upgrade(connection: Connection) -> None:
+    metadata.create_all(connection, tables=NEW_TABLES, checkfirst=True)
+    backfill(connection)
+
+
+def downgrade(connection: Connection) -> None:
+    # Pointers left in agent_state no longer resolve; the letters are gone
+    # with the tables
+    metadata.drop_all(connection, tables=NEW_TABLES, checkfirst=True)
+
+
+def backfill(connection: Connection, batch_size: int = BATCH_SIZE) -> int:
+    """Split every case that still has an inline agent state; returns how many."""
+    migrated = 0
+    last_id = None
+    while True:
+        query = select(cases.c.id, cases.c.agent_state).order_by(cases.c.id).limit(batch_size)
+        if last_id is not None:
+            query = query.where(cases.c.id > last_id)
+        rows = connection.execute(query).all()
+        if not rows:
+            return migrated
+        for row in rows:
+            if set(row.agent_state or {}) - set(POINTER_KEYS):
+                pointer = _split_case(connection, row.id, row.agent_state)
+                connection.execute(cases.update().where(cases.c.id == row.id).values(agent_state=pointer))
+                migrated += 1
+        last_id = rows[-1].id
+
+
+def _split_case(connection: Connection, case_id, state: Dict[str, Any]) -> Dict[str, Any]:
+    pointer = {key: state[key] for key in POINTER_KEYS if key in state}
+    now = datetime.now(timezone.utc)
+
+    if state.get("statutory_analysis"):
+        analysis_id = uuid.uuid4()
+        connection.execute(analyses.insert().values(
+            id=analysis_id,
+            case_id=case_id,
+            statutory_analysis=state["statutory_analysis"],
+            violation_findings=state.get("violation_findings") or [],
+            created_at=now
+        ))
+        pointer["analysis_id"] = str(analysis_id)
+
+    generated = state.get("demand_letter_draft") or {}
+    if generated.get("letter_html"):
+        draft_id = _add_letter_draft(connection, case_id, "generated", generated, now)
+        pointer["letter_draft_id"] = str(draft_id)
+
+    if state.get("status") in ("mail_queued", "mailed") or state.get("lob_mail_id"):
+        edited_html = state.get("edited_letter_html")
+        if edited_html and edited_html != generated.get("letter_html"):
+            edited_id = _add_letter_draft(connection, case_id, "edited", {"letter_html": edited_html}, now)
+            pointer["approved_letter_draft_id"] = str(edited_id)
+        elif pointer.get("letter_draft_id"):
+            pointer["approved_letter_draft_id"] = pointer["letter_draft_id"]
+
+    if state.get("lob_mail_id"):
+        outbox_id = connection.execute(
+            select(mail_outbox.c.id)
+            .where(mail_outbox.c.case_id == case_id, mail_outbox.c.lob_id == state["lob_mail_id"])
+            .limit(1)
+        ).scalar()
+        approved_id: Optional[str] = pointer.get("approved_letter_draft_id")
+        mailing_id = uuid.uuid4()
+        connection.execute(mailings.insert().values(
+            id=mailing_id,
+            case_id=case_id,
+            outbox_id=outbox_id,
+            letter_draft_id=uuid.UUID(approved_id) if approved_id else None,
+            lob_mail_id=state["lob_mail_id"],
+            tracking_url=state.get("tracking_url"),
+            expected_delivery=state.get("expected_delivery"),
+            created_at=now
+        ))
+        pointer["mailing_id"] = str(mailing_id)
+
+    return pointer
+
+
+def _add_letter_draft(connection: Connection, case_id, source: str, letter: Dict[str, Any], now: datetime):
+    latest = connection.execute(
+        select(func.max(letter_drafts.c.version)).where(letter_drafts.c.case_id == case_id)
+    ).scalar()
+    draft_id = uuid.uuid4()
+    connection.execute(letter_drafts.insert().values(
+        id=draft_id,
+        case_id=case_id,
+        version=(latest or 0) + 1,
+        source=source,
+        letter_html=letter["letter_html"],
+        letter_text=letter.get("letter_text"),
+        citations=letter.get("citations") or [],
+        created_at=now
+    ))
+    return draft_id
+
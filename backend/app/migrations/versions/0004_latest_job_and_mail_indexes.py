@@ -0,0 +1,43 @@
+"""Index agent jobs and outbox rows by (case_id, created_at).
+
+GET /status looks up a case's latest job and latest letter on every poll.
+The indexes are built with CREATE INDEX CONCURRENTLY on PostgreSQL, so the
+tables stay writable while they build.
+"""
+from sqlalchemy import Column, DateTime, Index, MetaData, Table
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.engine import Connection
+
+revision = "0004"
+down_revision = "0003"
+
+# CONCURRENTLY cannot run inside a transaction block
+transactional = False
+
+metadata = MetaData()
+
+agent_jobs = Table(
+    "agent_jobs", metadata,
+    Column("case_id", UUID(as_uuid=True)),
+    Column("created_at", DateTime(timezone=True)),
+)
+mail_outbox = Table(
+    "mail_outbox", metadata,
+    Column("case_id", UUID(as_uuid=True)),
+    Column("created_at", DateTime(timezone=True)),
+)
+
+INDEXES = [
+    Index("ix_agent_jobs_case_id_created_at", agent_jobs.c.case_id, agent_jobs.c.created_at, postgresql_concurrently=True),
+    Index("ix_mail_outbox_case_id_created_at", mail_outbox.c.case_id, mail_outbox.c.created_at, postgresql_concurrently=True),
+]
+
+
+def upgrade(connection: Connection) -> None:
+    for index in INDEXES:
+        index.create(connection, checkfirst=True)
+
+
+def downgrade(connection: Connection) -> None:
+    for index in INDEXES:
+        index.drop(connection, checkfirst=True)
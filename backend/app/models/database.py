@@ -1,11 +1,15 @@
-from sqlalchemy import Column, String, DECIMAL, Date, DateTime, Text, ForeignKey
+from sqlalchemy import Column, String, DECIMAL, Date, DateTime, Text, ForeignKey, Index, Integer, JSON, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
+from datetime import datetime, timezone
 import uuid
 
 Base = declarative_base()
 
+# JSONB on PostgreSQL, plain JSON elsewhere (SQLite test database)
+JSONType = JSON().with_variant(JSONB(), "postgresql")
+
 
 class Case(Base):
     """Main case table storing security deposit disputes."""
@@ -26,20 +30,107 @@ class Case(Base):
     move_out_date = Column(Date, nullable=False)
     
     # Addresses (stored as JSONB)
-    tenant_address = Column(JSONB, nullable=False)
-    landlord_address = Column(JSONB, nullable=False)
+    tenant_address = Column(JSONType, nullable=False)
+    landlord_address = Column(JSONType, nullable=False)
     
     # Dispute Details
     dispute_description = Column(Text, nullable=False)
-    evidence_urls = Column(JSONB, default=list)
+    evidence_urls = Column(JSONType, default=list)
     
-    # Agent State
-    agent_state = Column(JSONB, default=dict)
+    # Agent State: a small pointer document (status, current step, metrics
+    # and the ids of the latest analysis, letter draft and mailing); the
+    # outputs themselves live in their own tables
+    agent_state = Column(JSONType, default=dict)
     status = Column(String(50), default="draft")  # draft, analyzing, awaiting_approval, mailed, error
     
-    # Timestamps
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Timestamps (created_at is also set client-side so keyset cursors keep
+    # sub-second precision on every backend)
+    created_at = Column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        server_default=func.now()
+    )
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    __table_args__ = (
+        # Keyset pagination for the case list, unfiltered and by status
+        Index("ix_cases_created_at_id", "created_at", "id"),
+        Index("ix_cases_status_created_at_id", "status", "created_at", "id"),
+    )
+
+
+class Analysis(Base):
+    """Statutory analysis produced by one agent run."""
+    
+    __tablename__ = "analyses"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    case_id = Column(UUID(as_uuid=True), ForeignKey("cases.id", ondelete="CASCADE"), nullable=False, index=True)
+    
+    statutory_analysis = Column(JSONType, nullable=False)
+    violation_findings = Column(JSONType, nullable=False, default=list)
+    
+    # Timestamps
+    created_at = Column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        server_default=func.now()
+    )
+
+
+class LetterDraft(Base):
+    """
+    One version of a case's demand letter.
+    
+    Versions are append-only: every agent run adds a "generated" version,
+    and approving an edited letter adds an "edited" one, so the letter that
+    was mailed is always on record next to the one Claude wrote.
+    """
+    
+    __tablename__ = "letter_drafts"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    case_id = Column(UUID(as_uuid=True), ForeignKey("cases.id", ondelete="CASCADE"), nullable=False)
+    
+    version = Column(Integer, nullable=False)  # 1, 2, ... per case
+    source = Column(String(50), nullable=False, default="generated")  # generated, edited
+    letter_html = Column(Text, nullable=False)
+    letter_text = Column(Text)
+    citations = Column(JSONType, nullable=False, default=list)
+    
+    # Timestamps
+    created_at = Column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        server_default=func.now()
+    )
+    
+    __table_args__ = (
+        UniqueConstraint("case_id", "version", name="uq_letter_drafts_case_id_version"),
+    )
+
+
+class Mailing(Base):
+    """A letter Lob accepted for delivery."""
+    
+    __tablename__ = "mailings"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    case_id = Column(UUID(as_uuid=True), ForeignKey("cases.id", ondelete="CASCADE"), nullable=False, index=True)
+    outbox_id = Column(UUID(as_uuid=True), ForeignKey("mail_outbox.id", ondelete="SET NULL"))
+    letter_draft_id = Column(UUID(as_uuid=True), ForeignKey("letter_drafts.id", ondelete="SET NULL"))
+    
+    # Lob result
+    lob_mail_id = Column(String(100))
+    tracking_url = Column(String(500))
+    expected_delivery = Column(String(50))
+    
+    # Timestamps
+    created_at = Column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        server_default=func.now()
+    )
 
 
 class Checkpoint(Base):
@@ -51,8 +142,124 @@ class Checkpoint(Base):
     case_id = Column(UUID(as_uuid=True), ForeignKey("cases.id", ondelete="CASCADE"), nullable=False)
     
     # LangGraph checkpoint data
-    checkpoint_data = Column(JSONB, nullable=False)
+    checkpoint_id = Column(String(64), index=True)  # LangGraph checkpoint ids sort by creation time
+    checkpoint_data = Column(JSONType, nullable=False)
     checkpoint_ns = Column(String(255))
     
     # Timestamp
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class AgentJob(Base):
+    """Queued agent execution for a case, processed by the in-process worker pool."""
+    
+    __tablename__ = "agent_jobs"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    case_id = Column(UUID(as_uuid=True), ForeignKey("cases.id", ondelete="CASCADE"), nullable=False, index=True)
+    
+    job_type = Column(String(50), nullable=False, default="execute")
+    status = Column(String(50), nullable=False, default="queued", index=True)  # queued, running, succeeded, failed
+    error = Column(Text)
+    
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
+    
+    __table_args__ = (
+        # Latest job for a case (status polls)
+        Index("ix_agent_jobs_case_id_created_at", "case_id", "created_at"),
+    )
+
+
+class CaseLock(Base):
+    """
+    Lease on a case held while one process executes or approves it.
+    
+    The primary key makes acquiring atomic on every backend: a second insert
+    for the same case fails. Holders renew `expires_at` while they work, so a
+    lock left by a crashed worker lapses on its own. No foreign key, so a
+    lock can be taken before the case is looked up.
+    """
+    
+    __tablename__ = "case_locks"
+    
+    case_id = Column(UUID(as_uuid=True), primary_key=True)
+    operation = Column(String(50), nullable=False)  # execute, approve
+    owner = Column(String(255), nullable=False)  # host:pid:token of the holder
+    
+    # Timestamps
+    acquired_at = Column(DateTime(timezone=True), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+
+
+class MailOutbox(Base):
+    """
+    Approved letters waiting to be mailed.
+    
+    Rows are written in the same transaction that records the approval and
+    drained by the background mail sender, so a letter is never mailed
+    without a record of it.
+    """
+    
+    __tablename__ = "mail_outbox"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    case_id = Column(UUID(as_uuid=True), ForeignKey("cases.id", ondelete="CASCADE"), nullable=False, index=True)
+    
+    # Letter to send
+    idempotency_key = Column(String(128), nullable=False, unique=True)
+    to_address = Column(JSONType, nullable=False)
+    from_address = Column(JSONType, nullable=False)
+    letter_html = Column(Text, nullable=False)
+    description = Column(String(255), nullable=False)
+    
+    # Delivery state
+    status = Column(String(50), nullable=False, default="pending")  # pending, sending, sent, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text)
+    next_attempt_at = Column(DateTime(timezone=True), nullable=False)
+    lob_id = Column(String(100))
+    
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    claimed_at = Column(DateTime(timezone=True))
+    sent_at = Column(DateTime(timezone=True))
+    
+    __table_args__ = (
+        # The sender's claim query
+        Index("ix_mail_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+        # Latest letter for a case (status polls)
+        Index("ix_mail_outbox_case_id_created_at", "case_id", "created_at"),
+    )
+
+
+class LLMCacheEntry(Base):
+    """Persistent tier of the content-addressed Claude response cache."""
+    
+    __tablename__ = "llm_cache"
+    
+    key = Column(String(64), primary_key=True)  # sha256 of the rendered request
+    kind = Column(String(50), nullable=False)  # statutory_analysis, demand_letter
+    model = Column(String(100), nullable=False)
+    response = Column(JSONType, nullable=False)
+    
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+
+
+class AddressVerification(Base):
+    """Cached Lob verification result, keyed by normalized address."""
+    
+    __tablename__ = "address_verifications"
+    
+    key = Column(String(64), primary_key=True)  # sha256 of the normalized address
+    normalized_address = Column(JSONType, nullable=False)
+    deliverability = Column(String(50), nullable=False)
+    verified_address = Column(JSONType)  # Lob's corrected address lines
+    
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
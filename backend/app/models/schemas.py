@@ -30,6 +30,19 @@ class CaseCreate(BaseModel):
     evidence_urls: Optional[List[str]] = Field(default_factory=list, description="URLs to evidence files")
 
 
+class CaseImportError(BaseModel):
+    """A rejected row from a bulk case import."""
+    row: int = Field(..., description="1-based line number of the row in the upload")
+    errors: List[str]
+
+
+class CaseImportResult(BaseModel):
+    """Outcome of a bulk case import."""
+    imported: int
+    case_ids: List[UUID]
+    errors: List[CaseImportError]
+
+
 class CaseUpdate(BaseModel):
     """Schema for updating case details."""
     tenant_name: Optional[str] = None
@@ -63,6 +76,21 @@ class CaseResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class CaseSummaryResponse(BaseModel):
+    """Case list row (no agent state or dispute text)."""
+    id: UUID
+    tenant_name: str
+    landlord_name: str
+    deposit_amount: Decimal
+    withheld_amount: Decimal
+    move_out_date: date
+    status: str
+    created_at: datetime
+    updated_at: datetime
+    
+    model_config = ConfigDict(from_attributes=True)
+
+
 # Agent Schemas
 class ViolationFinding(BaseModel):
     """Individual statutory violation found."""
@@ -72,6 +100,17 @@ class ViolationFinding(BaseModel):
     damages_applicable: bool = Field(..., description="Whether treble damages apply")
 
 
+class DamagesCalculation(BaseModel):
+    """Deterministic Chapter 92 damages computed from case facts."""
+    days_elapsed: int = Field(..., description="Days since move-out")
+    refund_deadline_passed: bool = Field(..., description="More than 30 days since move-out (§92.103)")
+    bad_faith_presumed: bool = Field(..., description="§92.109(d) presumption of bad faith applies")
+    base_damages: Decimal = Field(..., description="Amount wrongfully withheld")
+    treble_damages: Decimal = Field(..., description="3x damages if bad faith")
+    statutory_penalty: Decimal = Field(..., description="$100 penalty if bad faith")
+    total_damages: Decimal = Field(..., description="Total amount tenant can claim")
+
+
 class StatutoryAnalysis(BaseModel):
     """Result of statutory compliance analysis."""
     violations: List[ViolationFinding]
@@ -85,12 +124,35 @@ class StatutoryAnalysis(BaseModel):
 
 
 class DemandLetterDraft(BaseModel):
-    """Generated demand letter."""
-    letter_html: str = Field(..., description="HTML formatted letter for Lob")
+    """
+    Generated demand letter.
+    
+    Claude writes tool input in schema order and letter_text is the field
+    streamed to the client, so it comes first: tokens flow from the start
+    of generation instead of after the whole HTML letter.
+    """
     letter_text: str = Field(..., description="Plain text version")
+    letter_html: str = Field(..., description="HTML formatted letter for Lob")
     citations: List[str] = Field(..., description="Statutory citations included")
 
 
+class AnalysisFindings(BaseModel):
+    """Claude's part of a statutory analysis; damages are computed locally."""
+    violations: List[ViolationFinding]
+    summary: str = Field(..., description="Plain English explanation of findings")
+
+
+class CasePackage(DemandLetterDraft, AnalysisFindings):
+    """
+    Analysis findings and demand letter returned by one fused Claude call.
+    
+    Base order puts the analysis fields first, so they are written before
+    the letter that relies on them; the streamed letter_text then leads the
+    letter fields.
+    """
+    pass
+
+
 class AgentExecuteResponse(BaseModel):
     """Response from agent execution."""
     case_id: UUID
@@ -101,6 +163,59 @@ class AgentExecuteResponse(BaseModel):
     needs_approval: bool
 
 
+class AgentJobResponse(BaseModel):
+    """Background agent job status."""
+    id: UUID
+    case_id: UUID
+    job_type: str
+    status: str
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    
+    model_config = ConfigDict(from_attributes=True)
+
+
+class BatchExecuteRequest(BaseModel):
+    """Request to queue the agent for many cases."""
+    case_ids: List[UUID] = Field(..., min_length=1, max_length=1000)
+
+
+class BatchExecuteItem(BaseModel):
+    """Per-case outcome of a batch execute."""
+    case_id: UUID
+    queued: bool
+    job_id: Optional[UUID] = None
+    error: Optional[str] = None
+
+
+class MailOutboxResponse(BaseModel):
+    """Delivery state of a queued letter."""
+    id: UUID
+    status: str
+    attempts: int
+    last_error: Optional[str] = None
+    lob_id: Optional[str] = None
+    created_at: datetime
+    sent_at: Optional[datetime] = None
+    
+    model_config = ConfigDict(from_attributes=True)
+
+
+class LetterDraftResponse(BaseModel):
+    """One stored version of a case's demand letter."""
+    id: UUID
+    version: int
+    source: str
+    letter_html: str
+    letter_text: Optional[str] = None
+    citations: List[str]
+    created_at: datetime
+    
+    model_config = ConfigDict(from_attributes=True)
+
+
 class ApprovalRequest(BaseModel):
     """Request to approve/reject generated letter."""
     approved: bool
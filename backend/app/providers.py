@@ -0,0 +1,103 @@
+"""
+Claude, Lob and agent graph instances, built on first use.
+
+Constructing them at import pulled anthropic and langgraph into every
+process that imported the app (the server, CLIs, the test suite) and
+compiled the graph before anything ran. A `Providers` container builds
+each one the first time it's used instead.
+
+The app creates its container in its lifespan, keeps it on `app.state`
+and closes it on shutdown. Routes receive it through the FastAPI
+dependencies below; the agent job queue and the mail sender are handed
+it when they start, the graph's nodes by the container that builds the
+graph, and address verification takes it as an argument.
+
+Tests swap a service out on the running app's container (the `providers`
+fixture) with `monkeypatch.setattr(providers, "claude", service)`, or use
+`app.dependency_overrides`.
+"""
+from app.config import settings
+from fastapi import HTTPException, Request
+from functools import cached_property
+from typing import TYPE_CHECKING, Any, Dict
+
+if TYPE_CHECKING:
+    from app.services.claude_service import ClaudeService
+    from app.services.lob_service import LobService
+
+PROVIDER_NAMES = ("claude", "lob", "graph")
+
+
+class ProviderNotConfiguredError(RuntimeError):
+    """Raised on first use of Claude or Lob when its API key isn't set."""
+
+
+class Providers:
+    """Lazily constructed, process-wide service instances."""
+
+    @cached_property
+    def claude(self) -> "ClaudeService":
+        """Claude client, with the response cache when LLM_CACHE_ENABLED."""
+        _require("ANTHROPIC_API_KEY")
+        from app.services.claude_service import ClaudeService
+        from app.services.llm_cache import llm_cache
+        return ClaudeService(cache=llm_cache if settings.LLM_CACHE_ENABLED else None)
+
+    @cached_property
+    def lob(self) -> "LobService":
+        """Lob client with its shared rate limiter."""
+        _require("LOB_API_KEY")
+        from app.services.lob_service import LobService
+        return LobService()
+
+    @cached_property
+    def graph(self) -> Any:
+        """Compiled agent graph with the database checkpointer."""
+        from app.agents.graph import create_agent_graph
+        return create_agent_graph(self)
+
+    def built(self) -> Dict[str, Any]:
+        """Providers constructed so far, by name."""
+        return {name: self.__dict__[name] for name in PROVIDER_NAMES if name in self.__dict__}
+
+    async def aclose(self) -> None:
+        """
+        Release the pooled HTTP connections of the services built so far.
+
+        The services stay usable: they reopen their clients on next use.
+        """
+        built = self.built()
+        for name in ("claude", "lob"):
+            if name in built:
+                await built[name].aclose()
+
+
+def _require(setting: str) -> None:
+    if not getattr(settings, setting):
+        raise ProviderNotConfiguredError(f"{setting} is not set")
+
+
+def get_providers(request: Request) -> Providers:
+    """FastAPI dependency: the app's provider container."""
+    return request.app.state.providers
+
+
+def get_claude_service(request: Request) -> "ClaudeService":
+    """FastAPI dependency: the Claude service, built on first use (503 without an API key)."""
+    try:
+        return get_providers(request).claude
+    except ProviderNotConfiguredError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+
+def get_lob_service(request: Request) -> "LobService":
+    """FastAPI dependency: the Lob service, built on first use (503 without an API key)."""
+    try:
+        return get_providers(request).lob
+    except ProviderNotConfiguredError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+
+def get_agent_graph(request: Request) -> Any:
+    """FastAPI dependency: the compiled agent graph, built on first use."""
+    return get_providers(request).graph
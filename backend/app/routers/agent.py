@@ -1,133 +1,225 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.database import get_db
-from app.services.db_service import db_service
-from app.agents.graph import agent_graph
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi import Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.database import AsyncSessionLocal, get_async_db
+from app.responses import etag_matches, not_modified
+from app.services.case_locks import CaseLockedError, case_locks
+from app.services.db_service import async_db_service
+from app.services.status_cache import CaseProgress, status_cache
+from app.agents.graph import thread_config
+from app.agents.events import TERMINAL_EVENTS, agent_events
+from app.agents.jobs import agent_job_queue, build_initial_state
+from app.providers import get_agent_graph, get_claude_service
 from app.models.schemas import (
     AgentExecuteResponse,
+    AgentJobResponse,
     ApprovalRequest,
+    BatchExecuteItem,
+    BatchExecuteRequest,
+    LetterDraftResponse,
+    MailOutboxResponse,
     APIResponse,
     StatutoryAnalysis,
     DemandLetterDraft
 )
+from contextlib import AsyncExitStack
+from typing import Any, AsyncIterator, Dict, List, Optional
 from uuid import UUID
-from datetime import datetime, date
-from decimal import Decimal
+from datetime import datetime
+import asyncio
+import json
+import time
 
 router = APIRouter()
 
+# Seconds between SSE keep-alive comments on an idle stream
+SSE_KEEPALIVE_SECONDS = 15.0
 
-@router.post("/cases/{case_id}/execute", response_model=APIResponse)
+# Case statuses a batch execute may reset and re-run; later statuses carry
+# analysis, letter and mailing pointers that a reset would drop
+BATCH_EXECUTABLE_STATUSES = ("draft", "error")
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    """Format one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+
+def _case_lock(operation: str):
+    """Dependency holding the case's lock for the whole request (409 if busy)."""
+    async def hold(case_id: UUID) -> AsyncIterator[None]:
+        try:
+            async with case_locks.hold(case_id, operation):
+                yield
+        except CaseLockedError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+    return hold
+
+
+@router.post(
+    "/cases/{case_id}/execute",
+    response_model=APIResponse,
+    status_code=202,
+    dependencies=[Depends(_case_lock("execute"))]
+)
 async def execute_agent(
     case_id: UUID,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Execute the AI agent workflow for a case.
+    Queue the AI agent workflow for a case.
     
-    This runs the agent through:
+    A background worker runs the agent through:
     1. Statutory research
     2. Demand letter generation
     3. Stops at human approval gate
     
-    Returns the current state with analysis and draft letter.
+    Returns 202 with a job id right away. Poll GET /cases/{case_id}/status
+    (or GET /jobs/{job_id}) for progress.
     """
     # Get case from database
-    db_case = db_service.get_case(db, case_id)
+    db_case = await async_db_service.get_case(db, case_id)
     if not db_case:
         raise HTTPException(status_code=404, detail="Case not found")
     
-    # Calculate days elapsed
-    days_elapsed = (date.today() - db_case.move_out_date).days
-    
-    # Build initial state
-    initial_state = {
-        "case_id": str(db_case.id),
-        "tenant_name": db_case.tenant_name,
-        "landlord_name": db_case.landlord_name,
-        "deposit_amount": db_case.deposit_amount,
-        "withheld_amount": db_case.withheld_amount,
-        "move_out_date": db_case.move_out_date.isoformat(),
-        "days_elapsed": days_elapsed,
-        "tenant_address": db_case.tenant_address,
-        "landlord_address": db_case.landlord_address,
-        "dispute_description": db_case.dispute_description,
-        "evidence_urls": db_case.evidence_urls,
-        "statutory_analysis": None,
-        "violation_findings": [],
-        "demand_letter_draft": None,
-        "human_approved": False,
-        "edited_letter_html": None,
-        "needs_approval": False,
-        "lob_mail_id": None,
-        "tracking_url": None,
-        "expected_delivery": None,
-        "status": "analyzing",
-        "error": None
-    }
+    active_job = await async_db_service.get_active_job(db, case_id)
+    if active_job:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Agent execution already in progress (job {active_job.id})"
+        )
+    
+    # Update status to analyzing
+    previous_status = db_case.status
+    await async_db_service.update_case_status(
+        db,
+        case_id,
+        "analyzing",
+        agent_state={"status": "analyzing", "current_step": "queued"}
+    )
     
     try:
-        # Update status to analyzing
-        db_service.update_case_status(db, case_id, "analyzing")
-        
-        # Execute graph (will stop at human approval gate)
-        final_state = await agent_graph.ainvoke(initial_state)
-        
-        # Save state to database
-        db_service.update_case_status(
-            db,
-            case_id,
-            final_state["status"],
-            agent_state=final_state
-        )
-        
-        # Build response
-        response_data = {
+        job = await agent_job_queue.submit(db, case_id)
+    except RuntimeError as e:
+        await async_db_service.update_case_status(db, case_id, previous_status)
+        raise HTTPException(status_code=503, detail=str(e))
+    
+    return APIResponse(
+        success=True,
+        data={
             "case_id": case_id,
-            "status": final_state["status"],
-            "current_step": "awaiting_approval",
-            "needs_approval": final_state.get("needs_approval", True)
-        }
-        
-        # Add analysis if available
-        if final_state.get("statutory_analysis"):
-            response_data["analysis"] = final_state["statutory_analysis"]
-        
-        # Add letter if available
-        if final_state.get("demand_letter_draft"):
-            response_data["demand_letter"] = final_state["demand_letter_draft"]
-        
-        return APIResponse(
-            success=True,
-            data=response_data,
-            timestamp=datetime.utcnow()
-        )
+            "job_id": job.id,
+            "status": job.status,
+            "status_url": f"/api/agent/cases/{case_id}/status"
+        },
+        timestamp=datetime.utcnow()
+    )
+
+
+@router.post("/cases/execute", response_model=APIResponse, status_code=202)
+async def execute_agent_batch(
+    request: BatchExecuteRequest,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Queue the AI agent workflow for many cases at once.
+    
+    Meant for freshly imported cases. Jobs are created in one transaction
+    and fan out over the agent worker pool, so at most
+    AGENT_WORKER_CONCURRENCY cases run concurrently however large the
+    batch. Only draft and error cases are queued; each one's lock is held
+    while it is reset and queued, as the single-case execute does. Returns
+    a per-case result: the job id for queued cases, or why a case was
+    skipped (not found, already running, busy with another operation, or
+    in a status that cannot be re-run). Poll GET /jobs?ids=... for job
+    outcomes.
+    """
+    if not agent_job_queue.running:
+        raise HTTPException(status_code=503, detail="Agent job queue is not running")
+    
+    case_ids = list(dict.fromkeys(request.case_ids))
+    statuses = await async_db_service.get_case_statuses(db, case_ids)
+    active = set(await async_db_service.list_active_case_ids(db, case_ids))
+    
+    results: Dict[UUID, BatchExecuteItem] = {}
+    async with AsyncExitStack() as locks:
+        candidates: List[UUID] = []
+        for case_id in case_ids:
+            if case_id not in statuses:
+                results[case_id] = BatchExecuteItem(case_id=case_id, queued=False, error="Case not found")
+            elif case_id in active:
+                results[case_id] = BatchExecuteItem(
+                    case_id=case_id, queued=False, error="Agent execution already in progress"
+                )
+            elif statuses[case_id] not in BATCH_EXECUTABLE_STATUSES:
+                results[case_id] = BatchExecuteItem(
+                    case_id=case_id, queued=False, error=f"Case is {statuses[case_id]}"
+                )
+            else:
+                try:
+                    await locks.enter_async_context(case_locks.hold(case_id, "execute"))
+                except CaseLockedError:
+                    results[case_id] = BatchExecuteItem(
+                        case_id=case_id, queued=False, error="Case is busy with another operation"
+                    )
+                else:
+                    candidates.append(case_id)
         
-    except Exception as e:
-        # Update status to error
-        db_service.update_case_status(
-            db,
-            case_id,
-            "error",
-            agent_state={"error": str(e)}
-        )
-        raise HTTPException(status_code=500, detail=f"Agent execution failed: {str(e)}")
+        to_queue: List[UUID] = []
+        if candidates:
+            # Re-check the status under the locks: an approve may have moved
+            # the case on since it was read above
+            updated = set(await async_db_service.bulk_update_case_status(
+                db,
+                candidates,
+                "analyzing",
+                agent_state={"status": "analyzing", "current_step": "queued"},
+                from_statuses=list(BATCH_EXECUTABLE_STATUSES)
+            ))
+            to_queue = [case_id for case_id in candidates if case_id in updated]
+            for case_id in candidates:
+                if case_id not in updated:
+                    results[case_id] = BatchExecuteItem(
+                        case_id=case_id, queued=False, error="Case status changed"
+                    )
+        if to_queue:
+            for job in await agent_job_queue.submit_many(db, to_queue):
+                results[job.case_id] = BatchExecuteItem(case_id=job.case_id, queued=True, job_id=job.id)
+    
+    return APIResponse(
+        success=True,
+        data={
+            "queued": len(to_queue),
+            "skipped": len(case_ids) - len(to_queue),
+            "results": [results[case_id] for case_id in case_ids]
+        },
+        timestamp=datetime.utcnow()
+    )
 
 
-@router.post("/cases/{case_id}/approve", response_model=APIResponse)
+@router.post("/cases/{case_id}/approve", response_model=APIResponse, dependencies=[Depends(_case_lock("approve"))])
 async def approve_letter(
     case_id: UUID,
     approval: ApprovalRequest,
-    db: Session = Depends(get_db)
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    agent_graph=Depends(get_agent_graph)
 ):
     """
     Approve or reject the generated demand letter.
     
-    If approved, the agent continues to send certified mail.
-    If rejected or edited, the state is updated but mail is not sent.
+    If approved, the paused agent thread resumes at the mail node; research
+    and letter generation are not re-run, so the approved draft is mailed as-is.
+    The mail node only commits the letter to the mail outbox, so this returns
+    202 with status "mail_queued" without waiting on Lob; the background mail
+    sender moves the case to "mailed". If rejected, the state is updated but
+    mail is not sent. Concurrent approvals of one case get 409.
     """
     # Get case
-    db_case = db_service.get_case(db, case_id)
+    db_case = await async_db_service.get_case(db, case_id)
     if not db_case:
         raise HTTPException(status_code=404, detail="Case not found")
     
@@ -142,7 +234,7 @@ async def approve_letter(
     
     if not approval.approved:
         # User rejected - update status
-        db_service.update_case_status(
+        await async_db_service.update_case_status(
             db,
             case_id,
             "draft",
@@ -155,31 +247,40 @@ async def approve_letter(
             timestamp=datetime.utcnow()
         )
     
-    # User approved - update state and continue to mailing
-    current_state["human_approved"] = True
-    
+    # User approved - record the decision on the paused thread
+    approval_update = {"human_approved": True}
     if approval.edited_letter_html:
-        current_state["edited_letter_html"] = approval.edited_letter_html
+        approval_update["edited_letter_html"] = approval.edited_letter_html
     
     try:
-        # Continue graph execution from current state
-        final_state = await agent_graph.ainvoke(current_state)
+        config = thread_config(case_id)
+        snapshot = await agent_graph.aget_state(config)
         
-        # Save final state
-        db_service.update_case_status(
-            db,
-            case_id,
-            final_state["status"],
-            agent_state=final_state
-        )
+        if "mail" in snapshot.next:
+            await agent_graph.aupdate_state(config, approval_update)
+        else:
+            # No paused checkpoint (e.g. executed before checkpointing existed):
+            # seed the thread from the stored state as if generation just finished
+            stored_state = await async_db_service.load_agent_state(db, db_case)
+            await agent_graph.aupdate_state(
+                config,
+                {**build_initial_state(db_case), **stored_state, **approval_update},
+                as_node="generate"
+            )
+        
+        # Resume at the mail node
+        final_state = await agent_graph.ainvoke(None, config, interrupt_before=[])
+        
+        # Queuing the mail already saved the case in the outbox transaction
+        if final_state["status"] != "mail_queued":
+            raise ValueError(final_state.get("error") or "Mail was not queued")
         
         # Build response
+        response.status_code = 202
         response_data = {
             "case_id": case_id,
             "status": final_state["status"],
-            "lob_mail_id": final_state.get("lob_mail_id"),
-            "tracking_url": final_state.get("tracking_url"),
-            "expected_delivery": final_state.get("expected_delivery")
+            "status_url": f"/api/agent/cases/{case_id}/status"
         }
         
         return APIResponse(
@@ -189,35 +290,235 @@ async def approve_letter(
         )
         
     except Exception as e:
-        db_service.update_case_status(
+        await async_db_service.update_case_status(
             db,
             case_id,
             "error",
-            agent_state={**current_state, "error": str(e)}
+            agent_state={**current_state, "human_approved": True, "error": str(e)}
         )
-        raise HTTPException(status_code=500, detail=f"Mailing failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Queuing mail failed: {str(e)}")
 
 
 @router.get("/cases/{case_id}/status", response_model=APIResponse)
 async def get_agent_status(
     case_id: UUID,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get current agent status for a case.
     
-    Returns the full agent state including analysis, letter, and mailing info.
+    Returns the full agent state including analysis, letter, and mailing info,
+    the step the agent last completed, the latest background job, and the
+    delivery state of the latest queued letter. To poll while a case is
+    analyzing, use GET /cases/{case_id}/progress instead.
     """
-    db_case = db_service.get_case(db, case_id)
+    db_case = await async_db_service.get_case(db, case_id)
     if not db_case:
         raise HTTPException(status_code=404, detail="Case not found")
     
+    agent_state = await async_db_service.load_agent_state(db, db_case)
+    job = await async_db_service.get_latest_job(db, case_id)
+    mail = await async_db_service.get_latest_mail(db, case_id)
+    
     return APIResponse(
         success=True,
         data={
             "case_id": case_id,
             "status": db_case.status,
-            "agent_state": db_case.agent_state
+            "current_step": (db_case.agent_state or {}).get("current_step"),
+            "job": AgentJobResponse.model_validate(job) if job else None,
+            "mail": MailOutboxResponse.model_validate(mail) if mail else None,
+            "agent_state": agent_state
         },
         timestamp=datetime.utcnow()
     )
+
+
+async def _case_progress(case_id: UUID) -> Optional[CaseProgress]:
+    """Progress record from the status cache, or the database on a miss."""
+    progress = status_cache.get(case_id)
+    if progress is None:
+        # Short-lived session, so a long-poll never holds a pooled connection
+        async with AsyncSessionLocal() as db:
+            progress = await async_db_service.get_case_progress(db, case_id)
+        if progress is not None:
+            status_cache.fill(progress)
+    return progress
+
+
+@router.get("/cases/{case_id}/progress", response_model=APIResponse)
+async def get_agent_progress(
+    case_id: UUID,
+    request: Request,
+    response: Response,
+    wait: float = Query(0.0, ge=0, le=settings.STATUS_LONG_POLL_MAX_SECONDS)
+):
+    """
+    Lightweight case status for polling: status, current step and error.
+    
+    Served from a per-process cache that agent runs update after every node,
+    so most polls never touch the database. Responses carry an ETag; send
+    it back as If-None-Match to get 304 with no body while nothing changed.
+    With `wait=N` the request long-polls: it returns as soon as the status
+    differs from If-None-Match, or 304 after N seconds.
+    """
+    progress = await _case_progress(case_id)
+    if progress is None:
+        raise HTTPException(status_code=404, detail="Case not found")
+    
+    known = request.headers.get("if-none-match")
+    deadline = time.monotonic() + wait
+    while etag_matches(known, progress.etag):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return not_modified(progress.etag)
+        # Local writes wake this at once; re-checking each TTL picks up
+        # changes made by other worker processes
+        await status_cache.wait(case_id, timeout=min(remaining, status_cache.ttl_seconds))
+        progress = await _case_progress(case_id)
+        if progress is None:
+            raise HTTPException(status_code=404, detail="Case not found")
+    
+    response.headers["ETag"] = progress.etag
+    response.headers["Cache-Control"] = "no-cache"
+    return APIResponse(
+        success=True,
+        data=progress.to_dict(),
+        timestamp=datetime.utcnow()
+    )
+
+
+@router.get("/cases/{case_id}/letters", response_model=APIResponse)
+async def get_letter_versions(
+    case_id: UUID,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get every version of a case's demand letter, oldest first.
+    
+    Each agent run adds a "generated" version; approving an edited letter
+    adds an "edited" one.
+    """
+    if case_id not in await async_db_service.get_case_statuses(db, [case_id]):
+        raise HTTPException(status_code=404, detail="Case not found")
+    
+    drafts = await async_db_service.list_letter_drafts(db, case_id)
+    
+    return APIResponse(
+        success=True,
+        data=[LetterDraftResponse.model_validate(draft) for draft in drafts],
+        timestamp=datetime.utcnow()
+    )
+
+
+@router.get("/cases/{case_id}/stream")
+async def stream_agent_progress(
+    case_id: UUID,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Stream agent progress for a case as Server-Sent Events.
+    
+    Sends a `status` snapshot immediately, then `node` events as the agent
+    finishes research and generation, `token` events with letter text as
+    Claude writes it, and a final `done` (or `error`) event. If the case is
+    not executing, the snapshot is followed by `done` right away.
+    """
+    db_case = await async_db_service.get_case(db, case_id)
+    if not db_case:
+        raise HTTPException(status_code=404, detail="Case not found")
+    
+    async def events() -> AsyncIterator[str]:
+        # Subscribe before reading the status so a finish in between isn't missed
+        async with agent_events.subscribe(case_id) as queue:
+            # The request's session is closed once streaming starts, so the
+            # snapshot is read on a short-lived one of its own
+            async with AsyncSessionLocal() as snapshot_db:
+                current = await async_db_service.get_case(snapshot_db, case_id)
+            status = current.status if current else "error"
+            
+            yield _sse("status", {
+                "case_id": case_id,
+                "status": status,
+                "current_step": ((current.agent_state if current else None) or {}).get("current_step")
+            })
+            if status != "analyzing":
+                yield _sse("done", {"status": status})
+                return
+            while True:
+                try:
+                    event, data = await asyncio.wait_for(
+                        queue.get(), timeout=SSE_KEEPALIVE_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    # The run may be on another worker process, whose events
+                    # don't reach this one; fall back to the stored status
+                    async with AsyncSessionLocal() as snapshot_db:
+                        current = await async_db_service.get_case(snapshot_db, case_id)
+                    status = current.status if current else "error"
+                    if status != "analyzing":
+                        yield _sse("done", {"status": status})
+                        return
+                    yield ": keep-alive\n\n"
+                    continue
+                yield _sse(event, data)
+                if event in TERMINAL_EVENTS:
+                    return
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/jobs", response_model=APIResponse)
+async def get_jobs(
+    ids: List[UUID] = Query(..., max_length=1000),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get several background agent jobs, e.g. the ones from a batch execute."""
+    jobs = await async_db_service.get_jobs(db, ids)
+    
+    return APIResponse(
+        success=True,
+        data=[AgentJobResponse.model_validate(job) for job in jobs],
+        timestamp=datetime.utcnow()
+    )
+
+
+@router.get("/jobs/{job_id}", response_model=APIResponse)
+async def get_job(
+    job_id: UUID,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get a background agent job."""
+    job = await async_db_service.get_job(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    return APIResponse(
+        success=True,
+        data=AgentJobResponse.model_validate(job),
+        timestamp=datetime.utcnow()
+    )
+
+
+@router.get("/cache/stats", response_model=APIResponse)
+async def get_cache_stats(claude_service=Depends(get_claude_service)):
+    """Hit/miss counters for the Claude response cache."""
+    return APIResponse(
+        success=True,
+        data=claude_service.cache.stats() if claude_service.cache else {"enabled": False},
+        timestamp=datetime.utcnow()
+    )
+
+
+@router.get("/usage/stats", response_model=APIResponse)
+async def get_usage_stats(claude_service=Depends(get_claude_service)):
+    """Claude token usage, split into cached and uncached input tokens."""
+    return APIResponse(
+        success=True,
+        data=claude_service.usage.stats(),
+        timestamp=datetime.utcnow()
+    )
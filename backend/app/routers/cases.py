@@ -1,32 +1,61 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from app.database import get_db
-from app.services.db_service import db_service
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
+from app.responses import APIJSONResponse, etag_matches, make_etag, not_modified
+from app.services.db_service import CaseCursor, async_db_service
+from app.services.damages import score_cases
+from app.services.case_import import FORMATS, import_cases
+from app.services.address_verification import address_verifier
+from app.providers import Providers, get_providers
 from app.models.schemas import (
     CaseCreate,
     CaseUpdate,
     CaseResponse,
+    CaseSummaryResponse,
     APIResponse
 )
 from typing import List, Optional
 from uuid import UUID
 from datetime import datetime
+import base64
+import json
 
 router = APIRouter()
 
 
+def _encode_cursor(created_at: datetime, case_id: UUID) -> str:
+    """Pack a (created_at, id) list position into an opaque URL-safe cursor."""
+    raw = json.dumps([created_at.isoformat(), str(case_id)])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> CaseCursor:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, case_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), UUID(case_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
 @router.post("/", response_model=APIResponse, status_code=201)
 async def create_case(
     case_data: CaseCreate,
-    db: Session = Depends(get_db)
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db),
+    providers: Providers = Depends(get_providers)
 ):
     """
     Create a new security deposit case.
     
     This initializes a case in 'draft' status, ready for agent execution.
+    Both addresses are verified with Lob in the background.
     """
     try:
-        db_case = db_service.create_case(db, case_data)
+        db_case = await async_db_service.create_case(db, case_data)
+        background_tasks.add_task(
+            address_verifier.preverify, [db_case.tenant_address, db_case.landlord_address], providers
+        )
         
         return APIResponse(
             success=True,
@@ -37,45 +66,148 @@ async def create_case(
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@router.post("/import", response_model=APIResponse)
+async def import_case_file(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    format: Optional[str] = Query(None, description="ndjson or csv (defaults from Content-Type)"),
+    db: AsyncSession = Depends(get_async_db),
+    providers: Providers = Depends(get_providers)
+):
+    """
+    Bulk-import cases from an NDJSON or CSV upload.
+    
+    The request body is streamed and each row validated like POST /api/cases/.
+    Valid rows are inserted in chunked multi-row transactions; invalid rows
+    are skipped and reported by line number. CSV uploads use dotted column
+    names for addresses (e.g. `tenant_address.address_city`). Addresses of
+    the imported cases are verified with Lob in one deduplicated background
+    batch.
+    """
+    if format is None:
+        content_type = request.headers.get("content-type", "")
+        format = "csv" if "csv" in content_type else "ndjson"
+    if format not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {format}")
+    
+    addresses = []
+    result = await import_cases(db, request.stream(), fmt=format, addresses=addresses)
+    background_tasks.add_task(address_verifier.preverify, addresses, providers)
+    
+    return APIResponse(
+        success=True,
+        data=result,
+        timestamp=datetime.utcnow()
+    )
+
+
+@router.get("/damages", response_model=APIResponse)
+async def score_case_damages(
+    status: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Re-score stored cases with the local Chapter 92 damages engine.
+    
+    Runs entirely in-process (no Claude calls) over just the columns the
+    engine needs, so it is cheap to run across the whole table.
+    """
+    rows = await async_db_service.list_damages_inputs(db, status=status)
+    results = score_cases(rows)
+    
+    return APIResponse(
+        success=True,
+        data=[
+            {"case_id": row.id, **damages.model_dump()}
+            for row, damages in zip(rows, results)
+        ],
+        timestamp=datetime.utcnow()
+    )
+
+
 @router.get("/{case_id}", response_model=APIResponse)
 async def get_case(
     case_id: UUID,
-    db: Session = Depends(get_db)
+    request: Request,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get case details by ID."""
-    db_case = db_service.get_case(db, case_id)
+    """
+    Get case details by ID, with the agent's analysis, letter and mailing.
     
+    The ETag is derived from the case's updated_at, which every write to the
+    case or its agent outputs bumps; send it back as If-None-Match to get an
+    empty 304 (after a single-column lookup) while the case is unchanged.
+    """
+    updated_at = await async_db_service.get_case_updated_at(db, case_id)
+    if updated_at is None:
+        raise HTTPException(status_code=404, detail="Case not found")
+    if etag_matches(request.headers.get("if-none-match"), make_etag(case_id, updated_at)):
+        return not_modified(make_etag(case_id, updated_at))
+    
+    db_case = await async_db_service.get_case(db, case_id)
     if not db_case:
         raise HTTPException(status_code=404, detail="Case not found")
     
-    return APIResponse(
-        success=True,
-        data=CaseResponse.model_validate(db_case),
-        timestamp=datetime.utcnow()
+    agent_state = await async_db_service.load_agent_state(db, db_case)
+    
+    return APIJSONResponse(
+        APIResponse(
+            success=True,
+            data=CaseResponse.model_validate(db_case).model_copy(update={"agent_state": agent_state}),
+            timestamp=datetime.utcnow()
+        ),
+        headers={"ETag": make_etag(case_id, db_case.updated_at), "Cache-Control": "no-cache"}
     )
 
 
 @router.get("/", response_model=APIResponse)
 async def list_cases(
-    skip: int = Query(0, ge=0),
+    request: Request,
     limit: int = Query(100, ge=1, le=1000),
     status: Optional[str] = Query(None),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None),
+    skip: int = Query(0, ge=0, deprecated=True),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    List all cases with optional filtering.
+    List cases, newest first, with optional filtering.
+    
+    Returns summary rows only; fetch GET /api/cases/{id} for the full case
+    including agent state.
     
     Query params:
-    - skip: Number of records to skip (pagination)
     - limit: Maximum number of records to return
     - status: Filter by status (draft, analyzing, awaiting_approval, mailed, error)
+    - cursor: Opaque cursor from the previous page's `X-Next-Cursor` header
+    - skip: Number of records to skip (deprecated; use cursor)
+    
+    The `X-Next-Cursor` response header is set when more rows follow.
+    Responses carry an ETag over the page's ids and updated_at values;
+    If-None-Match gets an empty 304 while the page is unchanged.
     """
-    cases = db_service.list_cases(db, skip=skip, limit=limit, status=status)
+    after = _decode_cursor(cursor) if cursor else None
+    # One extra row tells us whether there is a next page
+    rows = await async_db_service.list_case_summaries(
+        db, skip=skip, limit=limit + 1, status=status, after=after
+    )
     
-    return APIResponse(
-        success=True,
-        data=[CaseResponse.model_validate(case) for case in cases],
-        timestamp=datetime.utcnow()
+    headers = {"Cache-Control": "no-cache"}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        headers["X-Next-Cursor"] = _encode_cursor(rows[-1].created_at, rows[-1].id)
+    
+    # The page is unchanged while the same cases with the same updated_at are on it
+    headers["ETag"] = make_etag(headers.get("X-Next-Cursor"), *[f"{row.id}@{row.updated_at}" for row in rows])
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return not_modified(headers["ETag"])
+    
+    return APIJSONResponse(
+        APIResponse(
+            success=True,
+            data=[CaseSummaryResponse.model_validate(row) for row in rows],
+            timestamp=datetime.utcnow()
+        ),
+        headers=headers
     )
 
 
@@ -83,17 +215,32 @@ async def list_cases(
 async def update_case(
     case_id: UUID,
     case_update: CaseUpdate,
-    db: Session = Depends(get_db)
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db),
+    providers: Providers = Depends(get_providers)
 ):
-    """Update case details."""
-    db_case = db_service.update_case(db, case_id, case_update)
+    """
+    Update case details.
+    
+    Changed addresses are verified with Lob in the background, as at intake.
+    """
+    db_case = await async_db_service.update_case(db, case_id, case_update)
     
     if not db_case:
         raise HTTPException(status_code=404, detail="Case not found")
     
+    addresses = [
+        getattr(db_case, field) for field in ("tenant_address", "landlord_address")
+        if field in case_update.model_fields_set
+    ]
+    if addresses:
+        background_tasks.add_task(address_verifier.preverify, addresses, providers)
+    
+    agent_state = await async_db_service.load_agent_state(db, db_case)
+    
     return APIResponse(
         success=True,
-        data=CaseResponse.model_validate(db_case),
+        data=CaseResponse.model_validate(db_case).model_copy(update={"agent_state": agent_state}),
         timestamp=datetime.utcnow()
     )
 
@@ -101,10 +248,10 @@ async def update_case(
 @router.delete("/{case_id}", response_model=APIResponse)
 async def delete_case(
     case_id: UUID,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a case."""
-    success = db_service.delete_case(db, case_id)
+    success = await async_db_service.delete_case(db, case_id)
     
     if not success:
         raise HTTPException(status_code=404, detail="Case not found")
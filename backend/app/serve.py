@@ -0,0 +1,66 @@
+"""
+Serve the API with several worker processes.
+
+Usage (from backend/):
+    python -m app.serve [--workers N] [--host 0.0.0.0] [--port 8000]
+
+Each worker is a separate uvicorn process with its own event loop, database
+pool, HTTP clients, agent job queue and mail sender. Pool sizes and rate
+limits in Settings are totals; every worker takes its share (see
+Settings.per_worker), which it can do because the resolved worker count is
+exported as WEB_CONCURRENCY before the workers start. Cases are protected
+across workers by database locks (app.services.case_locks).
+"""
+from app.config import settings
+import argparse
+import os
+
+
+def available_cpus() -> int:
+    """CPUs this process may run on (respects affinity / container cpusets)."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def worker_count(requested: int = 0) -> int:
+    """Requested worker count, or one per available CPU up to WEB_MAX_WORKERS."""
+    if requested > 0:
+        return requested
+    return max(1, min(available_cpus(), settings.WEB_MAX_WORKERS))
+
+
+def check_workers(workers: int) -> None:
+    """
+    Refuse configurations that aren't safe with several processes.
+
+    Raises:
+        SystemExit: If more than one worker would share a SQLite database
+    """
+    if workers > 1 and settings.DATABASE_URL.startswith("sqlite"):
+        raise SystemExit(
+            "SQLite does not support concurrent writers from several processes; "
+            "use PostgreSQL or run a single worker (--workers 1)"
+        )
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n\n")[0])
+    parser.add_argument("--workers", type=int, default=settings.WEB_CONCURRENCY, help="0 = one per CPU")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    workers = worker_count(args.workers)
+    check_workers(workers)
+    # Workers read this back through Settings to size their pools
+    os.environ["WEB_CONCURRENCY"] = str(workers)
+    print(f"Starting {workers} worker(s) on {args.host}:{args.port}")
+    uvicorn.run("app.main:app", host=args.host, port=args.port, workers=workers, proxy_headers=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.providers import ProviderNotConfiguredError, Providers
+from app.services.db_service import async_db_service
+from sqlalchemy.exc import SQLAlchemyError
+from typing import Any, Dict, Iterable, List, Optional
+from datetime import datetime, timedelta, timezone
+import hashlib
+import httpx
+import json
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+# USPS standard abbreviations for the words that vary most between intake forms
+STREET_ABBREVIATIONS = {
+    "STREET": "ST",
+    "AVENUE": "AVE",
+    "BOULEVARD": "BLVD",
+    "DRIVE": "DR",
+    "ROAD": "RD",
+    "LANE": "LN",
+    "COURT": "CT",
+    "PLACE": "PL",
+    "PARKWAY": "PKWY",
+    "HIGHWAY": "HWY",
+    "SUITE": "STE",
+    "APARTMENT": "APT",
+    "NORTH": "N",
+    "SOUTH": "S",
+    "EAST": "E",
+    "WEST": "W",
+}
+
+ADDRESS_FIELDS = ("address_line1", "address_line2", "address_city", "address_state", "address_zip")
+
+
+def _normalize_line(value: Optional[str]) -> str:
+    words = re.sub(r"[.,#]", " ", (value or "").upper()).split()
+    return " ".join(STREET_ABBREVIATIONS.get(word, word) for word in words)
+
+
+def normalize_address(address: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Canonicalize the location part of an address for deduplication.
+
+    The recipient name is dropped (the same property manager is addressed by
+    several names), case and punctuation are folded, common street words are
+    abbreviated and ZIP+4 is cut to the five-digit ZIP.
+    """
+    return {
+        "address_line1": _normalize_line(address.get("address_line1")),
+        "address_line2": _normalize_line(address.get("address_line2")),
+        "address_city": _normalize_line(address.get("address_city")),
+        "address_state": (address.get("address_state") or "").strip().upper(),
+        "address_zip": re.sub(r"\D", "", address.get("address_zip") or "")[:5],
+    }
+
+
+def address_key(normalized: Dict[str, str]) -> str:
+    """Hash a normalized address into a cache key."""
+    canonical = json.dumps([normalized[field] for field in ADDRESS_FIELDS])
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def is_deliverable(deliverability: Optional[str]) -> bool:
+    # Lob reports unit problems as deliverable_* variants; the building is still valid
+    return bool(deliverability) and deliverability.startswith("deliverable")
+
+
+class AddressVerificationService:
+    """
+    Batched Lob address verification with a persistent result cache.
+
+    Addresses are normalized and deduplicated, looked up in the
+    `address_verifications` table, and only the misses go to Lob's bulk
+    verification API. Intake calls `preverify` in the background, so by
+    the time a letter is mailed `resolve` is a single cache lookup.
+    """
+
+    def __init__(self, ttl_seconds: Optional[int] = None, session_factory=AsyncSessionLocal):
+        self.ttl_seconds = ttl_seconds or settings.ADDRESS_VERIFICATION_TTL_SECONDS
+        self.session_factory = session_factory
+
+    async def verify_many(
+        self,
+        addresses: Iterable[Dict[str, Any]],
+        providers: Providers
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Verify addresses, calling Lob only for ones not already cached.
+
+        Args:
+            addresses: Addresses in internal format (duplicates are fine)
+            providers: Provider container whose Lob service verifies the misses
+
+        Returns:
+            Verification result per address key: deliverability and Lob's
+            corrected address lines (None when undeliverable)
+        """
+        unique: Dict[str, Dict[str, str]] = {}
+        for address in addresses:
+            normalized = normalize_address(address)
+            unique.setdefault(address_key(normalized), normalized)
+        if not unique:
+            return {}
+
+        try:
+            async with self.session_factory() as db:
+                cached = await async_db_service.get_address_verifications(db, list(unique))
+        except SQLAlchemyError:
+            cached = {}
+        results = {key: self._result(row.deliverability, row.verified_address) for key, row in cached.items()}
+
+        misses = [key for key in unique if key not in results]
+        if not misses:
+            return results
+
+        try:
+            verified = await providers.lob.bulk_verify_addresses([unique[key] for key in misses])
+        except (httpx.HTTPError, ProviderNotConfiguredError) as e:
+            logger.warning("Lob bulk verification failed for %d address(es): %s", len(misses), e)
+            return results
+
+        now = datetime.now(timezone.utc)
+        rows = []
+        for key, item in zip(misses, verified):
+            if "error" in item:
+                # Not cached: Lob rejected the request for this address, retry next time
+                continue
+            deliverability = item.get("deliverability", "undeliverable")
+            corrected = self._corrected(item) if is_deliverable(deliverability) else None
+            results[key] = self._result(deliverability, corrected)
+            rows.append({
+                "key": key,
+                "normalized_address": unique[key],
+                "deliverability": deliverability,
+                "verified_address": corrected,
+                "created_at": now,
+                "expires_at": now + timedelta(seconds=self.ttl_seconds)
+            })
+
+        try:
+            async with self.session_factory() as db:
+                await async_db_service.save_address_verifications(db, rows)
+        except SQLAlchemyError as e:
+            logger.warning("Could not cache %d verification(s): %s", len(rows), e)
+        return results
+
+    async def preverify(self, addresses: List[Dict[str, Any]], providers: Providers) -> None:
+        """Background task run at case intake to warm the cache for mailing."""
+        if not settings.ADDRESS_VERIFICATION_ENABLED:
+            return
+        await self.verify_many(addresses, providers)
+
+    async def resolve(self, address: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Return the cached, Lob-corrected form of an address for mailing.
+
+        Never calls Lob: if the address has not been verified (or is not
+        deliverable) the original is returned unchanged.
+        """
+        key = address_key(normalize_address(address))
+        try:
+            async with self.session_factory() as db:
+                row = (await async_db_service.get_address_verifications(db, [key])).get(key)
+        except SQLAlchemyError:
+            return address
+        if row is None or not row.verified_address:
+            return address
+        return {"name": address["name"], **row.verified_address}
+
+    @staticmethod
+    def _corrected(item: Dict[str, Any]) -> Dict[str, str]:
+        components = item.get("components") or {}
+        return {
+            "address_line1": item["primary_line"],
+            "address_line2": item.get("secondary_line") or "",
+            "address_city": components.get("city", ""),
+            "address_state": components.get("state", ""),
+            "address_zip": components.get("zip_code", ""),
+        }
+
+    @staticmethod
+    def _result(deliverability: str, verified_address: Optional[Dict[str, str]]) -> Dict[str, Any]:
+        return {"deliverability": deliverability, "verified_address": verified_address}
+
+
+# Singleton instance
+address_verifier = AddressVerificationService()
@@ -0,0 +1,211 @@
+from app.config import settings
+from app.models.schemas import CaseCreate, CaseImportError, CaseImportResult
+from app.services.db_service import async_db_service
+from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+import csv
+import json
+
+# Upload formats accepted by the import endpoint
+FORMATS = ("ndjson", "csv")
+
+# Separator for multiple evidence URLs in a single CSV cell
+EVIDENCE_URL_SEPARATOR = ";"
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """
+    Split a byte stream into lines without buffering the whole body.
+
+    Lines are left undecoded: the record iterators decode them, so a line
+    that isn't valid UTF-8 is reported as a bad row instead of failing the
+    whole upload.
+    """
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.rstrip(b"\r")
+    if buffer:
+        yield buffer.rstrip(b"\r")
+
+
+def _decode(line: bytes) -> str:
+    """
+    Decode one line as UTF-8 (a leading byte order mark is dropped).
+
+    Raises:
+        ValueError: If the line isn't valid UTF-8
+    """
+    try:
+        return line.decode("utf-8-sig")
+    except UnicodeDecodeError as e:
+        raise ValueError(f"invalid UTF-8 at byte {e.start}")
+
+
+async def iter_csv_records(lines: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, Any]]:
+    """
+    Yield (line number, row dict) for each CSV record.
+
+    Quoted cells may span lines (spreadsheet exports keep newlines in
+    dispute descriptions), so physical lines are joined until the quotes
+    balance before the record is parsed. A line that isn't valid UTF-8
+    is reported as an error for the record it belongs to, which is dropped.
+    """
+    header: Optional[List[str]] = None
+    pending: List[str] = []
+    start = 0
+    line_no = 0
+    async for raw in lines:
+        line_no += 1
+        if not pending:
+            start = line_no
+        try:
+            line = _decode(raw)
+        except ValueError as e:
+            pending = []
+            yield start, e
+            continue
+        pending.append(line)
+        if "\n".join(pending).count('"') % 2:
+            continue
+        text, pending = "\n".join(pending), []
+        if not text.strip():
+            continue
+
+        values = next(csv.reader([text]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if len(values) != len(header):
+            yield start, ValueError(f"expected {len(header)} columns, got {len(values)}")
+            continue
+        yield start, dict(zip(header, values))
+
+    if pending:
+        yield start, ValueError("unterminated quoted field")
+
+
+async def iter_ndjson_records(lines: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, Any]]:
+    """Yield (line number, object) for each non-blank NDJSON line."""
+    line_no = 0
+    async for raw in lines:
+        line_no += 1
+        try:
+            line = _decode(raw)
+        except ValueError as e:
+            yield line_no, e
+            continue
+        if not line.strip():
+            continue
+        try:
+            yield line_no, json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_no, ValueError(f"invalid JSON: {e.msg}")
+
+
+def csv_row_to_record(row: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Turn a flat CSV row into a CaseCreate-shaped dict.
+
+    Address fields use dotted column names (`tenant_address.address_city`),
+    blank cells are treated as missing, and `evidence_urls` holds
+    `;`-separated URLs.
+    """
+    record: Dict[str, Any] = {}
+    for column, value in row.items():
+        value = value.strip()
+        if not value:
+            continue
+        if column == "evidence_urls":
+            record[column] = [url.strip() for url in value.split(EVIDENCE_URL_SEPARATOR) if url.strip()]
+        elif "." in column:
+            parent, field = column.split(".", 1)
+            record.setdefault(parent, {})[field] = value
+        else:
+            record[column] = value
+    return record
+
+
+def _validation_messages(error: ValidationError) -> List[str]:
+    return [
+        f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}"
+        for err in error.errors()
+    ]
+
+
+async def import_cases(
+    db: AsyncSession,
+    chunks: AsyncIterator[bytes],
+    fmt: str = "ndjson",
+    chunk_size: Optional[int] = None,
+    addresses: Optional[List[Dict[str, Any]]] = None
+) -> CaseImportResult:
+    """
+    Stream, validate and insert cases from an NDJSON or CSV upload.
+
+    Every row is validated with CaseCreate as it arrives. Valid rows are
+    written with one multi-row INSERT per chunk, each chunk in its own
+    transaction, so a large upload never holds a long transaction and a
+    database error only loses the chunk it happened in. Invalid rows are
+    reported and skipped.
+
+    Args:
+        db: Database session
+        chunks: Raw request body chunks
+        fmt: "ndjson" or "csv"
+        chunk_size: Rows per INSERT/transaction (defaults to settings)
+        addresses: If given, tenant and landlord addresses of the inserted
+            cases are appended to it (for address pre-verification)
+
+    Returns:
+        Inserted case ids plus per-row errors
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported import format: {fmt}")
+    chunk_size = chunk_size or settings.CASE_IMPORT_CHUNK_SIZE
+
+    lines = iter_lines(chunks)
+    records = iter_csv_records(lines) if fmt == "csv" else iter_ndjson_records(lines)
+
+    case_ids: List[Any] = []
+    errors: List[CaseImportError] = []
+    batch: List[Tuple[int, CaseCreate]] = []
+
+    async def flush() -> None:
+        try:
+            case_ids.extend(
+                await async_db_service.bulk_create_cases(db, [case for _, case in batch])
+            )
+        except SQLAlchemyError as e:
+            await db.rollback()
+            message = f"database error: {e.__class__.__name__}"
+            errors.extend(CaseImportError(row=row, errors=[message]) for row, _ in batch)
+        else:
+            if addresses is not None:
+                for _, case in batch:
+                    addresses.append(case.tenant_address.model_dump())
+                    addresses.append(case.landlord_address.model_dump())
+        batch.clear()
+
+    async for row, record in records:
+        if isinstance(record, ValueError):
+            errors.append(CaseImportError(row=row, errors=[str(record)]))
+            continue
+        if fmt == "csv":
+            record = csv_row_to_record(record)
+        try:
+            batch.append((row, CaseCreate.model_validate(record)))
+        except ValidationError as e:
+            errors.append(CaseImportError(row=row, errors=_validation_messages(e)))
+            continue
+        if len(batch) >= chunk_size:
+            await flush()
+
+    if batch:
+        await flush()
+
+    return CaseImportResult(imported=len(case_ids), case_ids=case_ids, errors=errors)
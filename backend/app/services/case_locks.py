@@ -0,0 +1,96 @@
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.services.db_service import async_db_service
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+from uuid import UUID, uuid4
+import asyncio
+import logging
+import os
+import socket
+import time
+
+logger = logging.getLogger(__name__)
+
+# Identifies this process in lock rows
+PROCESS_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+# Seconds between attempts while waiting for a busy case
+RETRY_SECONDS = 0.1
+
+
+class CaseLockedError(Exception):
+    """Raised when a case's lock is held by another execute or approve."""
+
+    def __init__(self, case_id: UUID, operation: str):
+        super().__init__(f"Case {case_id} is busy with another operation; {operation} not started")
+        self.case_id = case_id
+        self.operation = operation
+
+
+class CaseLockManager:
+    """
+    Database-backed per-case mutex shared by every worker process.
+
+    Execute and approve hold a case's lock while they run, so two workers
+    (or two requests in one worker) never drive the same case's agent
+    thread at once. Locks are leases: the holder renews it every third of
+    the TTL, and a crashed holder's lock expires after at most the TTL.
+    """
+
+    def __init__(self, session_factory=AsyncSessionLocal, ttl_seconds: Optional[int] = None):
+        self.session_factory = session_factory
+        self.ttl_seconds = ttl_seconds or settings.CASE_LOCK_TTL_SECONDS
+
+    @asynccontextmanager
+    async def hold(self, case_id: UUID, operation: str, wait: float = 0.0) -> AsyncIterator[None]:
+        """
+        Hold a case's lock for the duration of the block.
+
+        Args:
+            case_id: Case to lock
+            operation: What the holder is doing (execute, approve)
+            wait: Seconds to keep retrying while another holder has the lock
+
+        Raises:
+            CaseLockedError: If the lock is still held elsewhere after `wait`
+        """
+        owner = f"{PROCESS_ID}:{uuid4().hex[:12]}"
+        deadline = time.monotonic() + wait
+        while not await self._acquire(case_id, operation, owner):
+            if time.monotonic() >= deadline:
+                raise CaseLockedError(case_id, operation)
+            await asyncio.sleep(RETRY_SECONDS)
+
+        renewer = asyncio.create_task(self._renew(case_id, owner))
+        try:
+            yield
+        finally:
+            renewer.cancel()
+            try:
+                async with self.session_factory() as db:
+                    await async_db_service.release_case_lock(db, case_id, owner)
+            except Exception:
+                # The lease runs out on its own
+                logger.exception("Could not release case lock", extra={"case_id": str(case_id)})
+
+    async def _acquire(self, case_id: UUID, operation: str, owner: str) -> bool:
+        async with self.session_factory() as db:
+            return await async_db_service.acquire_case_lock(db, case_id, operation, owner, self.ttl_seconds)
+
+    async def _renew(self, case_id: UUID, owner: str) -> None:
+        while True:
+            await asyncio.sleep(self.ttl_seconds / 3)
+            try:
+                async with self.session_factory() as db:
+                    renewed = await async_db_service.renew_case_lock(db, case_id, owner, self.ttl_seconds)
+            except Exception:
+                logger.exception("Could not renew case lock", extra={"case_id": str(case_id)})
+                continue
+            if not renewed:
+                logger.warning("Case lock lapsed while held", extra={"case_id": str(case_id)})
+                return
+
+
+# Singleton lock manager
+case_locks = CaseLockManager()
@@ -1,124 +1,487 @@
-from anthropic import Anthropic
+from anthropic import AsyncAnthropic, DefaultAsyncHttpxClient
 from app.config import settings
-from app.models.schemas import StatutoryAnalysis, ViolationFinding, DemandLetterDraft
-from typing import Dict, Any, List
+from app.models.schemas import (
+    AnalysisFindings,
+    CasePackage,
+    DamagesCalculation,
+    DemandLetterDraft,
+    StatutoryAnalysis
+)
+from app.services.damages import calculate_damages
+from app.services.llm_cache import LLMResponseCache
+from app.services.metrics import metrics
+from app.services.tracing import tracer
+from app.services.prompts import (
+    ANALYSIS_INSTRUCTIONS,
+    ANALYSIS_TOOL,
+    CASE_PACKAGE_INSTRUCTIONS,
+    CASE_PACKAGE_TOOL,
+    LETTER_INSTRUCTIONS,
+    LETTER_TOOL,
+    TOOLS,
+    cached_system
+)
+from app.services.token_usage import USAGE_FIELDS, TokenUsageTracker
+from pydantic import BaseModel, ValidationError
+from typing import Callable, Dict, Any, List, Optional, Tuple, Type, TypeVar
 from decimal import Decimal
 from datetime import date
+import asyncio
+import httpx
 import json
+import logging
+import time
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so cosmetic differences don't change the prompt."""
+    return " ".join(text.split())
+
+
+class ToolInputFieldStream:
+    """
+    Incrementally extracts one top-level string field from streamed tool input.
+    
+    The tool input arrives as JSON fragments. Each character is scanned once
+    (re-parsing the accumulated buffer per fragment would be quadratic in
+    the letter length), and the decoded text of `field` is returned as it
+    arrives. Same-named keys in nested objects are ignored.
+    """
+    
+    def __init__(self, field: str):
+        self.field = field
+        self._depth = 0
+        self._in_string = False
+        self._reading_key = False
+        self._capturing = False
+        self._expect_value = False
+        self._key: List[str] = []
+        self._last_key: Optional[str] = None
+        self._escape = ""
+        self._high_surrogate = ""
+    
+    def feed(self, fragment: str) -> str:
+        """Consume a JSON fragment; return the field text it completed."""
+        out: List[str] = []
+        for char in fragment:
+            if self._in_string:
+                self._string_char(char, out)
+            elif char == '"':
+                top_level = self._depth == 1
+                self._in_string = True
+                self._reading_key = top_level and not self._expect_value
+                self._capturing = top_level and self._expect_value and self._last_key == self.field
+                self._key = []
+            elif char in "{[":
+                self._depth += 1
+                self._expect_value = False
+            elif char in "}]":
+                self._depth -= 1
+            elif self._depth == 1:
+                if char == ":":
+                    self._expect_value = True
+                elif not char.isspace():
+                    # "," or a number / true / false / null value
+                    self._expect_value = False
+        return "".join(out)
+    
+    def _string_char(self, char: str, out: List[str]) -> None:
+        if self._escape:
+            self._escape += char
+            if self._escape[1] == "u" and len(self._escape) < 6:
+                return
+            if self._capturing:
+                out.append(self._decode(self._escape))
+            elif self._reading_key:
+                self._key.append(self._escape)
+            self._escape = ""
+        elif char == "\\":
+            self._escape = char
+        elif char == '"':
+            self._in_string = False
+            if self._reading_key:
+                self._last_key = "".join(self._key)
+            elif self._depth == 1:
+                self._expect_value = False
+            self._reading_key = self._capturing = False
+        elif self._capturing:
+            out.append(char)
+        elif self._reading_key:
+            self._key.append(char)
+    
+    def _decode(self, escape: str) -> str:
+        try:
+            text = json.loads(f'"{escape}"')
+        except ValueError:
+            return ""
+        if self._high_surrogate:
+            # Second half of a \uXXXX\uXXXX pair, possibly from a later fragment
+            pair, self._high_surrogate = self._high_surrogate + text, ""
+            return pair.encode("utf-16", "surrogatepass").decode("utf-16", "replace")
+        if "\ud800" <= text <= "\udbff":
+            self._high_surrogate = text
+            return ""
+        return text
 
 
 class ClaudeService:
-    """Service for interacting with Claude API for legal analysis."""
+    """
+    Service for interacting with Claude API for legal analysis.
     
-    def __init__(self):
-        self.client = Anthropic(api_key=settings.ANTHROPIC_API_KEY)
+    Uses a non-blocking client over a shared, bounded HTTP connection pool.
+    A semaphore caps in-flight requests so bursts queue locally instead of
+    exhausting the pool or the provider's rate limits.
+    
+    Prompts put the statute corpus and task instructions in a cached system
+    prefix and only the case facts in the user message, so repeat calls pay
+    full price for the facts alone. `usage` tracks cached vs. uncached input
+    tokens per call.
+    
+    Results are returned through forced tool calls and validated against
+    the pydantic model behind each tool's schema. Fields that fail
+    validation are re-requested on their own (see _repair_fields) rather
+    than failing the whole run.
+    """
+    
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        max_connections: Optional[int] = None,
+        max_concurrent_requests: Optional[int] = None,
+        cache: Optional[LLMResponseCache] = None,
+        repair_attempts: Optional[int] = None
+    ):
+        self.api_key = api_key or settings.ANTHROPIC_API_KEY
+        self.base_url = base_url or settings.CLAUDE_BASE_URL
         self.model = settings.CLAUDE_MODEL
+        self.max_connections = max_connections or settings.per_worker(settings.CLAUDE_MAX_CONNECTIONS)
+        self.max_concurrent_requests = (
+            max_concurrent_requests or settings.per_worker(settings.CLAUDE_MAX_CONCURRENT_REQUESTS)
+        )
+        self.cache = cache
+        self.repair_attempts = (
+            settings.CLAUDE_REPAIR_ATTEMPTS if repair_attempts is None else repair_attempts
+        )
+        self.usage = TokenUsageTracker()
+        self._client: Optional[AsyncAnthropic] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
     
-    def _build_statutory_analysis_prompt(self, case_data: Dict[str, Any]) -> str:
-        """Build prompt for statutory compliance analysis."""
-        return f"""You are a Texas landlord-tenant law expert specializing in security deposit disputes under Texas Property Code Chapter 92.
-
-Analyze the following case for statutory violations:
+    @property
+    def client(self) -> AsyncAnthropic:
+        """Shared async client, created on first use."""
+        if self._client is None:
+            http_client = DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=min(
+                        settings.per_worker(settings.CLAUDE_MAX_KEEPALIVE_CONNECTIONS), self.max_connections
+                    )
+                ),
+                timeout=httpx.Timeout(settings.CLAUDE_TIMEOUT_SECONDS, connect=10.0)
+            )
+            self._client = AsyncAnthropic(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                http_client=http_client,
+                max_retries=settings.CLAUDE_MAX_RETRIES
+            )
+        return self._client
+    
+    async def _create_message(self, **kwargs) -> Any:
+        """Send a Messages API request, bounded by the concurrency limit."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent_requests)
+        async with self._semaphore:
+            return await self.client.messages.create(**kwargs)
+    
+    async def _stream_message(
+        self,
+        on_text: Callable[[str], None],
+        stream_field: str,
+        **kwargs
+    ) -> Any:
+        """
+        Stream a tool-use request, passing text of one input field to on_text.
+        
+        The tool input arrives as JSON fragments; ToolInputFieldStream
+        decodes `stream_field` out of them as they come and the new text is
+        forwarded.
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent_requests)
+        async with self._semaphore:
+            async with self.client.messages.stream(**kwargs) as stream:
+                field_stream = ToolInputFieldStream(stream_field)
+                async for event in stream:
+                    if event.type != "input_json":
+                        continue
+                    text = field_stream.feed(event.partial_json)
+                    if text:
+                        on_text(text)
+                return await stream.get_final_message()
+    
+    def _record_usage(self, kind: str, message: Any, seconds: float) -> None:
+        record = self.usage.record(kind, message.usage)
+        metrics.observe_claude(record, seconds)
+        span = tracer.current_span()
+        if span is not None:
+            span.set_attributes({f"claude.{field}": record[field] for field in USAGE_FIELDS})
+        logger.debug(
+            "Claude call complete",
+            extra={**record, "seconds": round(seconds, 3)}
+        )
+    
+    async def _cache_lookup(self, request: Dict[str, Any], refresh: bool = False) -> tuple:
+        """
+        Return (cache key, cached response or None) for a request.
+        
+        With `refresh` the cached response is skipped; storing the new one
+        under the same key then replaces it.
+        """
+        if self.cache is None:
+            return None, None
+        key = LLMResponseCache.make_key(request)
+        if refresh:
+            return key, None
+        return key, await self.cache.get(key)
+    
+    async def _cache_store(self, key: Optional[str], kind: str, value: Dict[str, Any]) -> None:
+        if self.cache is not None and key is not None:
+            await self.cache.set(key, kind, self.model, value)
+    
+    def _tool_request(
+        self,
+        instructions: str,
+        tool: Dict[str, Any],
+        prompt: str,
+        max_tokens: int,
+        temperature: float
+    ) -> Dict[str, Any]:
+        """Messages API request that forces a call to `tool`."""
+        return {
+            "model": self.model,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "system": cached_system(instructions),
+            "tools": TOOLS,
+            "tool_choice": {"type": "tool", "name": tool["name"]},
+            "messages": [{"role": "user", "content": prompt}]
+        }
+    
+    @staticmethod
+    def _tool_input(message: Any) -> Tuple[Optional[Any], Dict[str, Any]]:
+        """Return (tool_use block or None, its input as a dict)."""
+        for block in message.content:
+            if block.type == "tool_use":
+                return block, block.input if isinstance(block.input, dict) else {}
+        return None, {}
+    
+    async def _call_tool(
+        self,
+        kind: str,
+        request: Dict[str, Any],
+        model: Type[ModelT],
+        on_text: Optional[Callable[[str], None]] = None,
+        stream_field: Optional[str] = None
+    ) -> ModelT:
+        """
+        Make a forced tool call and validate its input against `model`.
+        
+        Args:
+            kind: Call kind for usage accounting and errors
+            request: Request built by _tool_request
+            model: Pydantic model the tool's schema was generated from
+            on_text: Optional callback receiving `stream_field` text as it streams
+            stream_field: Tool input field to stream
+        
+        Returns:
+            Validated model instance
+        
+        Raises:
+            ValueError: If Claude did not call the tool, or fields are still
+                invalid after the repair attempts
+        """
+        with tracer.start_span(f"claude.{kind}", {"claude.model": self.model}) as span:
+            started = time.perf_counter()
+            if on_text and stream_field:
+                message = await self._stream_message(on_text, stream_field, **request)
+            else:
+                message = await self._create_message(**request)
+            self._record_usage(kind, message, time.perf_counter() - started)
+            
+            tool_use, data = self._tool_input(message)
+            if tool_use is None:
+                raise ValueError(f"Failed to parse {kind} response: no tool call in {message.content}")
+            
+            attempt = 0
+            while True:
+                try:
+                    return model.model_validate(data)
+                except ValidationError as e:
+                    if attempt >= self.repair_attempts:
+                        raise ValueError(f"Failed to parse {kind} response: {e}")
+                    attempt += 1
+                    span.set_attribute("claude.repair_attempts", attempt)
+                    data = {**data, **await self._repair_fields(kind, request, tool_use, data, e)}
+    
+    async def _repair_fields(
+        self,
+        kind: str,
+        request: Dict[str, Any],
+        tool_use: Any,
+        data: Dict[str, Any],
+        error: ValidationError
+    ) -> Dict[str, Any]:
+        """
+        Re-ask for only the fields of a tool call that failed validation.
+        
+        Replies to the tool call with the validation errors and offers the
+        same tool with its schema cut down to the broken fields, so a bad
+        citation list costs a few output tokens instead of a whole letter.
+        
+        Returns:
+            Corrected values for the broken fields (may be incomplete)
+        """
+        tool = next(t for t in request["tools"] if t["name"] == request["tool_choice"]["name"])
+        properties = tool["input_schema"]["properties"]
+        broken = [
+            field for field in properties
+            if any(err["loc"] and err["loc"][0] == field for err in error.errors())
+        ] or list(properties)
+        details = "; ".join(
+            f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in error.errors()
+        )
+        logger.warning("Repairing Claude tool fields", extra={"kind": kind, "fields": broken, "errors": details})
+        
+        started = time.perf_counter()
+        with tracer.start_span(f"claude.{kind}_repair", {"claude.model": self.model, "claude.fields": broken}):
+            message = await self._create_message(**{
+                **request,
+                "tools": [{
+                    **tool,
+                    "input_schema": {
+                        "type": "object",
+                        "properties": {field: properties[field] for field in broken},
+                        "required": broken
+                    }
+                }],
+                "messages": request["messages"] + [
+                    {
+                        "role": "assistant",
+                        "content": [{"type": "tool_use", "id": tool_use.id, "name": tool_use.name, "input": data}]
+                    },
+                    {
+                        "role": "user",
+                        "content": [{
+                            "type": "tool_result",
+                            "tool_use_id": tool_use.id,
+                            "is_error": True,
+                            "content": (
+                                f"Invalid fields: {details}. Call {tool['name']} again with "
+                                f"corrected values for only these fields: {', '.join(broken)}."
+                            )
+                        }]
+                    }
+                ]
+            })
+            self._record_usage(f"{kind}_repair", message, time.perf_counter() - started)
+        
+        _, repaired = self._tool_input(message)
+        return {field: repaired[field] for field in broken if field in repaired}
+    
+    async def aclose(self) -> None:
+        """Close the HTTP connection pool (called on app shutdown)."""
+        if self._client is not None:
+            await self._client.close()
+        self._client = None
+        self._semaphore = None
+    
+    @staticmethod
+    def _analysis_from(findings: AnalysisFindings, damages: DamagesCalculation) -> StatutoryAnalysis:
+        """Combine Claude's findings with the locally computed damages."""
+        return StatutoryAnalysis(
+            violations=findings.violations,
+            days_elapsed=damages.days_elapsed,
+            is_compliant=not damages.bad_faith_presumed and not findings.violations,
+            base_damages=damages.base_damages,
+            treble_damages=damages.treble_damages,
+            statutory_penalty=damages.statutory_penalty,
+            total_damages=damages.total_damages,
+            summary=findings.summary
+        )
+    
+    def _build_statutory_analysis_prompt(
+        self,
+        case_data: Dict[str, Any],
+        damages: DamagesCalculation
+    ) -> str:
+        """Build the per-case part of the analysis prompt (the user message)."""
+        return f"""Analyze the following case for statutory violations.
 
 CASE DETAILS:
 - Deposit Amount: ${case_data['deposit_amount']}
 - Withheld Amount: ${case_data['withheld_amount']}
 - Move-Out Date: {case_data['move_out_date']}
-- Days Since Move-Out: {case_data['days_elapsed']}
-- Dispute Description: {case_data['dispute_description']}
-
-RELEVANT TEXAS LAW:
-§92.103 - Landlord's obligations for refund/accounting
-§92.104 - Presumption of refund if no accounting within 30 days
-§92.109 - Tenant's remedies (deposit + $100 + 3x deposit + attorney fees)
-
-TASK:
-Analyze whether the landlord violated Texas Property Code. Respond ONLY with valid JSON matching this schema:
-
-{{
-  "violations": [
-    {{
-      "statute": "Texas Property Code §92.XXX",
-      "violation_type": "string",
-      "description": "string",
-      "damages_applicable": boolean
-    }}
-  ],
-  "days_elapsed": integer,
-  "is_compliant": boolean,
-  "base_damages": "decimal string",
-  "treble_damages": "decimal string",
-  "statutory_penalty": "100.00",
-  "total_damages": "decimal string",
-  "summary": "Plain English explanation of findings"
-}}
-
-CALCULATION RULES:
-- If landlord failed to provide itemized accounting within 30 days of move-out, they forfeit the right to withhold ANY amount
-- Base damages = amount wrongfully withheld
-- If bad faith violation: treble damages = base_damages × 3
-- Total = base_damages + treble_damages + $100 statutory penalty + attorney fees potential
-
-Analyze now:"""
-    
-    async def analyze_statutory_compliance(self, case_data: Dict[str, Any]) -> StatutoryAnalysis:
+- Days Since Move-Out: {damages.days_elapsed}
+- Dispute Description: {normalize_text(case_data['dispute_description'])}
+
+COMPUTED DAMAGES:
+- 30-Day Refund Deadline Passed: {"yes" if damages.refund_deadline_passed else "no"}
+- Bad Faith Presumed (§92.109(d)): {"yes" if damages.bad_faith_presumed else "no"}
+- Total Damages: ${damages.total_damages}"""
+    
+    async def analyze_statutory_compliance(
+        self,
+        case_data: Dict[str, Any],
+        damages: Optional[DamagesCalculation] = None
+    ) -> StatutoryAnalysis:
         """
         Analyze case for Texas Property Code violations.
         
+        Damages come from the local Chapter 92 rules engine; Claude only
+        identifies violations and writes the narrative summary.
+        
         Args:
             case_data: Dictionary with case details
+            damages: Precomputed damages (computed from case_data if omitted)
             
         Returns:
             StatutoryAnalysis with violations and damages
         """
-        prompt = self._build_statutory_analysis_prompt(case_data)
-        
-        message = self.client.messages.create(
-            model=self.model,
-            max_tokens=4000,
-            temperature=0.2,
-            system="You are a precise legal analyst. Always respond with valid JSON only. No markdown, no explanations outside JSON.",
-            messages=[{"role": "user", "content": prompt}]
+        if damages is None:
+            damages = calculate_damages(case_data["withheld_amount"], case_data["move_out_date"])
+        
+        request = self._tool_request(
+            ANALYSIS_INSTRUCTIONS,
+            ANALYSIS_TOOL,
+            self._build_statutory_analysis_prompt(case_data, damages),
+            max_tokens=2000,
+            temperature=0.2
         )
         
-        response_text = message.content[0].text.strip()
+        # Identical facts render identical prompts; serve repeats from cache
+        cache_key, cached = await self._cache_lookup(request)
+        if cached is not None:
+            return StatutoryAnalysis.model_validate(cached)
         
-        # Parse JSON response
-        try:
-            if response_text.startswith("```"):
-                # Remove markdown code blocks if present
-                response_text = response_text.split("```")[1]
-                if response_text.startswith("json"):
-                    response_text = response_text[4:]
-                response_text = response_text.strip()
-            
-            analysis_data = json.loads(response_text)
-            
-            # Convert to Pydantic model
-            violations = [
-                ViolationFinding(**v) for v in analysis_data["violations"]
-            ]
-            
-            return StatutoryAnalysis(
-                violations=violations,
-                days_elapsed=analysis_data["days_elapsed"],
-                is_compliant=analysis_data["is_compliant"],
-                base_damages=Decimal(analysis_data["base_damages"]),
-                treble_damages=Decimal(analysis_data["treble_damages"]),
-                statutory_penalty=Decimal(analysis_data.get("statutory_penalty", "100.00")),
-                total_damages=Decimal(analysis_data["total_damages"]),
-                summary=analysis_data["summary"]
-            )
-        except (json.JSONDecodeError, KeyError) as e:
-            raise ValueError(f"Failed to parse Claude response: {e}\nResponse: {response_text}")
+        findings = await self._call_tool("statutory_analysis", request, AnalysisFindings)
+        analysis = self._analysis_from(findings, damages)
+        
+        await self._cache_store(cache_key, "statutory_analysis", analysis.model_dump(mode="json"))
+        return analysis
     
     def _build_demand_letter_prompt(
         self,
         case_data: Dict[str, Any],
         analysis: StatutoryAnalysis
     ) -> str:
-        """Build prompt for demand letter generation."""
-        return f"""You are a Texas attorney drafting a demand letter for a security deposit dispute.
+        """Build the per-case part of the demand letter prompt (the user message)."""
+        return f"""Draft the demand letter for this case.
 
 CLIENT INFORMATION:
 Tenant: {case_data['tenant_name']}
@@ -144,29 +507,14 @@ DAMAGES CALCULATION:
 - Base Damages: ${analysis.base_damages}
 - Treble Damages: ${analysis.treble_damages}
 - Statutory Penalty: ${analysis.statutory_penalty}
-- TOTAL DEMAND: ${analysis.total_damages}
-
-TASK:
-Draft a professional, firm demand letter demanding the full amount. The letter should:
-1. State the facts clearly
-2. Cite specific Texas Property Code sections violated
-3. Demand payment of ${analysis.total_damages} within 7 days
-4. Reference potential small claims court action if not resolved
-5. Be formatted in proper business letter format with date
-
-Respond ONLY with valid JSON:
-{{
-  "letter_html": "HTML formatted letter ready for Lob API",
-  "letter_text": "Plain text version",
-  "citations": ["list of statute citations used"]
-}}
-
-The HTML should be a complete professional letter with proper formatting, ready to be printed and mailed."""
+- TOTAL DEMAND: ${analysis.total_damages}"""
     
     async def generate_demand_letter(
         self,
         case_data: Dict[str, Any],
-        analysis: StatutoryAnalysis
+        analysis: StatutoryAnalysis,
+        on_text: Optional[Callable[[str], None]] = None,
+        refresh: bool = False
     ) -> DemandLetterDraft:
         """
         Generate formatted demand letter.
@@ -174,39 +522,122 @@ The HTML should be a complete professional letter with proper formatting, ready
         Args:
             case_data: Case details
             analysis: Statutory analysis results
+            on_text: Optional callback receiving letter text as it streams
+            refresh: Draft a new letter even if one is cached for this request
+                (the case's previous draft was rejected)
             
         Returns:
             DemandLetterDraft with HTML and text versions
         """
-        prompt = self._build_demand_letter_prompt(case_data, analysis)
-        
-        message = self.client.messages.create(
-            model=self.model,
+        request = self._tool_request(
+            LETTER_INSTRUCTIONS,
+            LETTER_TOOL,
+            self._build_demand_letter_prompt(case_data, analysis),
             max_tokens=6000,
-            temperature=0.3,
-            system="You are a professional attorney. Always respond with valid JSON only.",
-            messages=[{"role": "user", "content": prompt}]
+            temperature=0.3
         )
         
-        response_text = message.content[0].text.strip()
+        cache_key, cached = await self._cache_lookup(request, refresh)
+        if cached is not None:
+            letter = DemandLetterDraft.model_validate(cached)
+            if on_text:
+                on_text(letter.letter_text)
+            return letter
         
-        try:
-            if response_text.startswith("```"):
-                response_text = response_text.split("```")[1]
-                if response_text.startswith("json"):
-                    response_text = response_text[4:]
-                response_text = response_text.strip()
-            
-            letter_data = json.loads(response_text)
-            
-            return DemandLetterDraft(
-                letter_html=letter_data["letter_html"],
-                letter_text=letter_data["letter_text"],
-                citations=letter_data["citations"]
-            )
-        except (json.JSONDecodeError, KeyError) as e:
-            raise ValueError(f"Failed to parse letter response: {e}\nResponse: {response_text}")
+        letter = await self._call_tool(
+            "demand_letter", request, DemandLetterDraft, on_text=on_text, stream_field="letter_text"
+        )
+        
+        await self._cache_store(cache_key, "demand_letter", letter.model_dump(mode="json"))
+        return letter
+    
+    def _build_case_package_prompt(
+        self,
+        case_data: Dict[str, Any],
+        damages: DamagesCalculation
+    ) -> str:
+        """Build the per-case part of the fused analysis-and-letter prompt."""
+        return f"""Analyze this case and draft the demand letter.
+
+CLIENT INFORMATION:
+Tenant: {case_data['tenant_name']}
+Tenant Address: {case_data['tenant_address']['address_line1']}, {case_data['tenant_address']['address_city']}, TX {case_data['tenant_address']['address_zip']}
 
+LANDLORD INFORMATION:
+Name: {case_data['landlord_name']}
+Address: {case_data['landlord_address']['address_line1']}, {case_data['landlord_address']['address_city']}, TX {case_data['landlord_address']['address_zip']}
 
-# Singleton instance
-claude_service = ClaudeService()
+CASE FACTS:
+- Original Deposit: ${case_data['deposit_amount']}
+- Withheld Amount: ${case_data['withheld_amount']}
+- Move-Out Date: {case_data['move_out_date']}
+- Days Since Move-Out: {damages.days_elapsed}
+- Dispute Description: {normalize_text(case_data['dispute_description'])}
+
+COMPUTED DAMAGES:
+- 30-Day Refund Deadline Passed: {"yes" if damages.refund_deadline_passed else "no"}
+- Bad Faith Presumed (§92.109(d)): {"yes" if damages.bad_faith_presumed else "no"}
+- Base Damages: ${damages.base_damages}
+- Treble Damages: ${damages.treble_damages}
+- Statutory Penalty: ${damages.statutory_penalty}
+- TOTAL DEMAND: ${damages.total_damages}"""
+    
+    async def draft_case_package(
+        self,
+        case_data: Dict[str, Any],
+        damages: Optional[DamagesCalculation] = None,
+        on_text: Optional[Callable[[str], None]] = None,
+        refresh: bool = False
+    ) -> Tuple[StatutoryAnalysis, DemandLetterDraft]:
+        """
+        Analyze a case and draft its demand letter in one Claude call.
+        
+        The fused alternative to analyze_statutory_compliance followed by
+        generate_demand_letter: a forced tool call returns both results as
+        schema-shaped input, saving a round-trip and the analysis being sent
+        back as prompt text.
+        
+        Args:
+            case_data: Case details, including parties and addresses
+            damages: Precomputed damages (computed from case_data if omitted)
+            on_text: Optional callback receiving letter text as it streams
+            refresh: Draft anew even if a package is cached for this request
+                (the case's previous letter was rejected)
+        
+        Returns:
+            (StatutoryAnalysis, DemandLetterDraft)
+        """
+        if damages is None:
+            damages = calculate_damages(case_data["withheld_amount"], case_data["move_out_date"])
+        
+        request = self._tool_request(
+            CASE_PACKAGE_INSTRUCTIONS,
+            CASE_PACKAGE_TOOL,
+            self._build_case_package_prompt(case_data, damages),
+            max_tokens=8000,
+            temperature=0.2
+        )
+        
+        cache_key, cached = await self._cache_lookup(request, refresh)
+        if cached is not None:
+            analysis = StatutoryAnalysis.model_validate(cached["analysis"])
+            letter = DemandLetterDraft.model_validate(cached["letter"])
+            if on_text:
+                on_text(letter.letter_text)
+            return analysis, letter
+        
+        package = await self._call_tool(
+            "case_package", request, CasePackage, on_text=on_text, stream_field="letter_text"
+        )
+        analysis = self._analysis_from(package, damages)
+        letter = DemandLetterDraft(
+            letter_html=package.letter_html,
+            letter_text=package.letter_text,
+            citations=package.citations
+        )
+        
+        await self._cache_store(cache_key, "case_package", {
+            "analysis": analysis.model_dump(mode="json"),
+            "letter": letter.model_dump(mode="json")
+        })
+        return analysis, letter
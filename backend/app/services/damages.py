@@ -0,0 +1,107 @@
+from app.models.schemas import DamagesCalculation
+from typing import Any, Iterable, List, Optional, Sequence, Union
+from decimal import Decimal
+from datetime import date
+
+# Texas Property Code Chapter 92, Subchapter C
+REFUND_DEADLINE_DAYS = 30  # §92.103: refund/accounting due on or before the 30th day
+TREBLE_MULTIPLIER = 3  # §92.109(a): three times the portion wrongfully withheld
+STATUTORY_PENALTY = Decimal("100.00")  # §92.109(a)
+
+CENTS = Decimal("0.01")
+ZERO = Decimal("0.00")
+
+
+def _to_date(value: Union[date, str]) -> date:
+    return value if isinstance(value, date) else date.fromisoformat(value)
+
+
+def _score(withheld: Decimal, days_elapsed: int) -> DamagesCalculation:
+    """Apply the Chapter 92 rules to one case's withheld amount and elapsed days."""
+    deadline_passed = days_elapsed > REFUND_DEADLINE_DAYS
+    
+    # §92.104 / §92.109(d): no refund or itemized accounting by the deadline
+    # forfeits the right to withhold and is presumed bad faith
+    bad_faith = deadline_passed and withheld > 0
+    
+    if bad_faith:
+        base = withheld.quantize(CENTS)
+        treble = base * TREBLE_MULTIPLIER
+        penalty = STATUTORY_PENALTY
+    else:
+        base = treble = penalty = ZERO
+    
+    # Inputs are already typed; skip validation on this hot path
+    return DamagesCalculation.model_construct(
+        days_elapsed=days_elapsed,
+        refund_deadline_passed=deadline_passed,
+        bad_faith_presumed=bad_faith,
+        base_damages=base,
+        treble_damages=treble,
+        statutory_penalty=penalty,
+        total_damages=base + treble + penalty
+    )
+
+
+def calculate_damages(
+    withheld_amount: Union[Decimal, str, float],
+    move_out_date: Union[date, str],
+    as_of: Optional[date] = None
+) -> DamagesCalculation:
+    """
+    Compute Chapter 92 damages for a single case.
+    
+    Args:
+        withheld_amount: Amount of the deposit the landlord kept
+        move_out_date: Date the tenant surrendered the premises
+        as_of: Date to evaluate the refund deadline against (default: today)
+        
+    Returns:
+        DamagesCalculation with days elapsed, presumptions and damages
+    """
+    as_of = as_of or date.today()
+    days_elapsed = (as_of - _to_date(move_out_date)).days
+    return _score(Decimal(str(withheld_amount)), days_elapsed)
+
+
+def calculate_damages_batch(
+    withheld_amounts: Sequence[Union[Decimal, str, float]],
+    move_out_dates: Sequence[Union[date, str]],
+    as_of: Optional[date] = None
+) -> List[DamagesCalculation]:
+    """
+    Compute Chapter 92 damages for many cases at once.
+    
+    Takes column-wise inputs (e.g. straight from a two-column query) and
+    evaluates every case against one reference date, so re-scoring stored
+    cases needs no per-case setup and no API calls.
+    
+    Args:
+        withheld_amounts: Withheld amount per case
+        move_out_dates: Move-out date per case, aligned with withheld_amounts
+        as_of: Date to evaluate the refund deadline against (default: today)
+        
+    Returns:
+        One DamagesCalculation per case, in input order
+    """
+    if len(withheld_amounts) != len(move_out_dates):
+        raise ValueError("withheld_amounts and move_out_dates must be the same length")
+    
+    as_of_ordinal = (as_of or date.today()).toordinal()
+    return [
+        _score(
+            withheld if isinstance(withheld, Decimal) else Decimal(str(withheld)),
+            as_of_ordinal - _to_date(moved_out).toordinal()
+        )
+        for withheld, moved_out in zip(withheld_amounts, move_out_dates)
+    ]
+
+
+def score_cases(cases: Iterable[Any], as_of: Optional[date] = None) -> List[DamagesCalculation]:
+    """Re-score Case rows (or any objects with withheld_amount/move_out_date)."""
+    cases = list(cases)
+    return calculate_damages_batch(
+        [case.withheld_amount for case in cases],
+        [case.move_out_date for case in cases],
+        as_of=as_of
+    )
@@ -1,11 +1,75 @@
+from sqlalchemy import and_, delete, func, insert, or_, select, tuple_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.models.database import Case, Checkpoint
+from app.models.database import (
+    AddressVerification,
+    AgentJob,
+    Analysis,
+    Case,
+    CaseLock,
+    Checkpoint,
+    LetterDraft,
+    LLMCacheEntry,
+    MailOutbox,
+    Mailing
+)
 from app.models.schemas import CaseCreate, CaseUpdate
-from typing import Optional, List, Dict, Any
-from uuid import UUID
-from datetime import datetime
+from app.services.metrics import merge_case_metrics
+from app.services.status_cache import CaseProgress, status_cache
+from app.services.tracing import trace_methods
+from typing import Optional, List, Dict, Any, Tuple
+from uuid import UUID, uuid4
+from datetime import datetime, timedelta, timezone
 
+# Position of a case in the newest-first list: (created_at, id)
+CaseCursor = Tuple[datetime, UUID]
 
+# Newest first; id breaks ties between cases created in the same instant
+CASE_LIST_ORDER = (Case.created_at.desc(), Case.id.desc())
+
+# Columns needed to render the case list
+CASE_SUMMARY_COLUMNS = (
+    Case.id,
+    Case.tenant_name,
+    Case.landlord_name,
+    Case.deposit_amount,
+    Case.withheld_amount,
+    Case.move_out_date,
+    Case.status,
+    Case.created_at,
+    Case.updated_at,
+)
+
+
+# Agent state kept on the case row; analyses, letters and mailings are
+# stored in their own tables and referenced by id
+AGENT_STATE_POINTER_KEYS = (
+    "status",
+    "current_step",
+    "error",
+    "needs_approval",
+    "human_approved",
+    "correlation_id",
+    "metrics",
+    "analysis_id",
+    "letter_draft_id",
+    "approved_letter_draft_id",
+    "mailing_id",
+)
+
+
+def agent_state_pointer(state: Dict[str, Any]) -> Dict[str, Any]:
+    """The part of an agent state that is stored in Case.agent_state."""
+    return {key: state[key] for key in AGENT_STATE_POINTER_KEYS if key in state}
+
+
+def _before(cursor: CaseCursor):
+    """Keyset predicate for rows after `cursor` in CASE_LIST_ORDER."""
+    return tuple_(Case.created_at, Case.id) < tuple_(*cursor)
+
+
+@trace_methods("db")
 class DatabaseService:
     """Service for database operations."""
     
@@ -40,13 +104,22 @@ class DatabaseService:
         db: Session, 
         skip: int = 0, 
         limit: int = 100,
-        status: Optional[str] = None
+        status: Optional[str] = None,
+        after: Optional[CaseCursor] = None
     ) -> List[Case]:
-        """List cases with optional filtering."""
+        """
+        List cases newest first with optional filtering.
+        
+        Pass `after` (the (created_at, id) of the last case on the previous
+        page) for keyset pagination; `skip` is kept for older callers but
+        OFFSET gets slower the deeper the page.
+        """
         query = db.query(Case)
         if status:
             query = query.filter(Case.status == status)
-        return query.order_by(Case.created_at.desc()).offset(skip).limit(limit).all()
+        if after is not None:
+            query = query.filter(_before(after))
+        return query.order_by(*CASE_LIST_ORDER).offset(skip).limit(limit).all()
     
     @staticmethod
     def update_case(
@@ -70,7 +143,7 @@ class DatabaseService:
         for key, value in update_data.items():
             setattr(db_case, key, value)
         
-        db_case.updated_at = datetime.utcnow()
+        db_case.updated_at = datetime.now(timezone.utc)
         db.commit()
         db.refresh(db_case)
         return db_case
@@ -90,7 +163,7 @@ class DatabaseService:
         db_case.status = status
         if agent_state is not None:
             db_case.agent_state = agent_state
-        db_case.updated_at = datetime.utcnow()
+        db_case.updated_at = datetime.now(timezone.utc)
         
         db.commit()
         db.refresh(db_case)
@@ -112,11 +185,13 @@ class DatabaseService:
         db: Session,
         case_id: UUID,
         checkpoint_data: Dict[str, Any],
-        checkpoint_ns: Optional[str] = None
+        checkpoint_ns: Optional[str] = None,
+        checkpoint_id: Optional[str] = None
     ) -> Checkpoint:
         """Save LangGraph checkpoint."""
         checkpoint = Checkpoint(
             case_id=case_id,
+            checkpoint_id=checkpoint_id,
             checkpoint_data=checkpoint_data,
             checkpoint_ns=checkpoint_ns
         )
@@ -134,10 +209,979 @@ class DatabaseService:
         return (
             db.query(Checkpoint)
             .filter(Checkpoint.case_id == case_id)
-            .order_by(Checkpoint.created_at.desc())
+            .order_by(Checkpoint.checkpoint_id.desc(), Checkpoint.created_at.desc())
             .first()
         )
+    
+    @staticmethod
+    def get_checkpoint(
+        db: Session,
+        case_id: UUID,
+        checkpoint_ns: str = "",
+        checkpoint_id: Optional[str] = None
+    ) -> Optional[Checkpoint]:
+        """Get a specific checkpoint, or the latest one in the namespace."""
+        query = db.query(Checkpoint).filter(
+            Checkpoint.case_id == case_id,
+            Checkpoint.checkpoint_ns == checkpoint_ns
+        )
+        if checkpoint_id:
+            return query.filter(Checkpoint.checkpoint_id == checkpoint_id).first()
+        return query.order_by(Checkpoint.checkpoint_id.desc()).first()
+    
+    @staticmethod
+    def list_checkpoints(
+        db: Session,
+        case_id: UUID,
+        checkpoint_ns: str = "",
+        before_id: Optional[str] = None
+    ) -> List[Checkpoint]:
+        """List checkpoints in a namespace, newest first."""
+        query = db.query(Checkpoint).filter(
+            Checkpoint.case_id == case_id,
+            Checkpoint.checkpoint_ns == checkpoint_ns
+        )
+        if before_id:
+            query = query.filter(Checkpoint.checkpoint_id < before_id)
+        return query.order_by(Checkpoint.checkpoint_id.desc()).all()
+    
+    @staticmethod
+    def append_checkpoint_writes(
+        db: Session,
+        checkpoint: Checkpoint,
+        writes: List[Dict[str, Any]]
+    ) -> Checkpoint:
+        """Append pending writes to a stored checkpoint."""
+        checkpoint.checkpoint_data = {
+            **checkpoint.checkpoint_data,
+            "writes": checkpoint.checkpoint_data.get("writes", []) + writes
+        }
+        db.commit()
+        return checkpoint
+    
+    @staticmethod
+    def delete_checkpoints(db: Session, case_id: UUID) -> int:
+        """Delete all checkpoints for a case."""
+        deleted = db.query(Checkpoint).filter(Checkpoint.case_id == case_id).delete()
+        db.commit()
+        return deleted
+
+
+@trace_methods("db")
+class AsyncDatabaseService:
+    """
+    Async counterpart of DatabaseService for request handlers.
+    
+    Queries run on the async engine so database I/O yields to the event loop
+    instead of stalling in-flight LLM and Lob calls.
+    """
+    
+    @staticmethod
+    def _case_values(case_data: CaseCreate) -> Dict[str, Any]:
+        return {
+            "tenant_name": case_data.tenant_name,
+            "landlord_name": case_data.landlord_name,
+            "deposit_amount": case_data.deposit_amount,
+            "withheld_amount": case_data.withheld_amount,
+            "move_out_date": case_data.move_out_date,
+            "tenant_address": case_data.tenant_address.model_dump(),
+            "landlord_address": case_data.landlord_address.model_dump(),
+            "dispute_description": case_data.dispute_description,
+            "evidence_urls": case_data.evidence_urls or [],
+            "agent_state": {},
+            "status": "draft"
+        }
+    
+    @staticmethod
+    def _new_case(case_data: CaseCreate) -> Case:
+        return Case(**AsyncDatabaseService._case_values(case_data))
+    
+    @staticmethod
+    async def create_case(db: AsyncSession, case_data: CaseCreate) -> Case:
+        """Create a new case."""
+        db_case = AsyncDatabaseService._new_case(case_data)
+        db.add(db_case)
+        await db.commit()
+        await db.refresh(db_case)
+        return db_case
+    
+    @staticmethod
+    async def bulk_create_cases(db: AsyncSession, cases: List[CaseCreate]) -> List[UUID]:
+        """
+        Insert cases with one multi-row INSERT in a single transaction.
+        
+        Ids are generated client-side so no refresh round trip is needed.
+        
+        Args:
+            db: Database session
+            cases: Validated cases to insert
+            
+        Returns:
+            Ids of the inserted cases, in input order
+        """
+        rows = [
+            {"id": uuid4(), **AsyncDatabaseService._case_values(case_data)}
+            for case_data in cases
+        ]
+        if rows:
+            await db.execute(insert(Case).values(rows))
+            await db.commit()
+        return [row["id"] for row in rows]
+    
+    @staticmethod
+    async def get_case(db: AsyncSession, case_id: UUID) -> Optional[Case]:
+        """Get case by ID."""
+        result = await db.execute(select(Case).where(Case.id == case_id))
+        return result.scalars().first()
+    
+    @staticmethod
+    async def get_case_updated_at(db: AsyncSession, case_id: UUID) -> Optional[datetime]:
+        """Last-modified time of a case (None if it doesn't exist), for conditional GETs."""
+        result = await db.execute(select(Case.updated_at).where(Case.id == case_id))
+        return result.scalar()
+    
+    @staticmethod
+    async def list_cases(
+        db: AsyncSession,
+        skip: int = 0,
+        limit: int = 100,
+        status: Optional[str] = None,
+        after: Optional[CaseCursor] = None
+    ) -> List[Case]:
+        """List cases newest first with optional filtering (see DatabaseService.list_cases)."""
+        query = select(Case)
+        if status:
+            query = query.where(Case.status == status)
+        if after is not None:
+            query = query.where(_before(after))
+        query = query.order_by(*CASE_LIST_ORDER).offset(skip).limit(limit)
+        result = await db.execute(query)
+        return list(result.scalars().all())
+    
+    @staticmethod
+    async def list_case_summaries(
+        db: AsyncSession,
+        skip: int = 0,
+        limit: int = 100,
+        status: Optional[str] = None,
+        after: Optional[CaseCursor] = None
+    ) -> List[Any]:
+        """
+        Keyset-paginated case list that loads only the summary columns.
+        
+        Skips agent_state (which carries whole letter drafts) and the free
+        text dispute description, so a page costs a few hundred bytes per row.
+        
+        Args:
+            db: Database session
+            skip: Legacy OFFSET, prefer `after`
+            limit: Page size
+            status: Optional status filter
+            after: (created_at, id) of the last row on the previous page
+            
+        Returns:
+            Rows with the CASE_SUMMARY_COLUMNS attributes
+        """
+        query = select(*CASE_SUMMARY_COLUMNS)
+        if status:
+            query = query.where(Case.status == status)
+        if after is not None:
+            query = query.where(_before(after))
+        result = await db.execute(query.order_by(*CASE_LIST_ORDER).offset(skip).limit(limit))
+        return list(result.all())
+    
+    @staticmethod
+    async def list_damages_inputs(
+        db: AsyncSession,
+        status: Optional[str] = None
+    ) -> List[Any]:
+        """Load only the columns the damages engine needs (id, withheld, move-out)."""
+        query = select(Case.id, Case.withheld_amount, Case.move_out_date)
+        if status:
+            query = query.where(Case.status == status)
+        result = await db.execute(query.order_by(Case.created_at.desc()))
+        return list(result.all())
+    
+    @staticmethod
+    async def update_case(
+        db: AsyncSession,
+        case_id: UUID,
+        case_data: CaseUpdate
+    ) -> Optional[Case]:
+        """Update case details."""
+        db_case = await AsyncDatabaseService.get_case(db, case_id)
+        if not db_case:
+            return None
+        
+        update_data = case_data.model_dump(exclude_unset=True)
+        for key, value in update_data.items():
+            setattr(db_case, key, value)
+        
+        db_case.updated_at = datetime.now(timezone.utc)
+        await db.commit()
+        await db.refresh(db_case)
+        return db_case
+    
+    @staticmethod
+    async def update_case_status(
+        db: AsyncSession,
+        case_id: UUID,
+        status: str,
+        agent_state: Optional[Dict[str, Any]] = None
+    ) -> Optional[Case]:
+        """Update case status and optionally agent state."""
+        db_case = await AsyncDatabaseService.get_case(db, case_id)
+        if not db_case:
+            return None
+        
+        db_case.status = status
+        if agent_state is not None:
+            db_case.agent_state = agent_state
+        db_case.updated_at = datetime.now(timezone.utc)
+        
+        await db.commit()
+        status_cache.invalidate(case_id)
+        await db.refresh(db_case)
+        return db_case
+    
+    @staticmethod
+    async def get_case_statuses(db: AsyncSession, case_ids: List[UUID]) -> Dict[UUID, str]:
+        """Map each existing case id in `case_ids` to its status."""
+        result = await db.execute(select(Case.id, Case.status).where(Case.id.in_(case_ids)))
+        return {row.id: row.status for row in result}
+    
+    @staticmethod
+    async def get_case_progress(db: AsyncSession, case_id: UUID) -> Optional[CaseProgress]:
+        """Load a case's progress record (status and the agent_state pointer only)."""
+        result = await db.execute(select(Case.status, Case.agent_state).where(Case.id == case_id))
+        row = result.first()
+        if row is None:
+            return None
+        return CaseProgress.from_case(case_id, row.status, row.agent_state)
+    
+    @staticmethod
+    async def bulk_update_case_status(
+        db: AsyncSession,
+        case_ids: List[UUID],
+        status: str,
+        agent_state: Optional[Dict[str, Any]] = None,
+        from_statuses: Optional[List[str]] = None
+    ) -> List[UUID]:
+        """
+        Set the same status (and optionally agent state) on many cases in one UPDATE.
+        
+        Args:
+            db: Database session
+            case_ids: Cases to update
+            status: New status
+            agent_state: Replacement agent state, if any
+            from_statuses: Only update cases currently in one of these statuses
+            
+        Returns:
+            IDs of the cases that were updated
+        """
+        values: Dict[str, Any] = {"status": status, "updated_at": datetime.now(timezone.utc)}
+        if agent_state is not None:
+            values["agent_state"] = agent_state
+        stmt = update(Case).where(Case.id.in_(case_ids))
+        if from_statuses is not None:
+            stmt = stmt.where(Case.status.in_(from_statuses))
+        result = await db.execute(stmt.values(**values).returning(Case.id))
+        updated = list(result.scalars())
+        await db.commit()
+        for case_id in updated:
+            status_cache.invalidate(case_id)
+        return updated
+    
+    # Agent outputs
+    @staticmethod
+    async def save_agent_state(
+        db: AsyncSession,
+        case_id: UUID,
+        status: str,
+        state: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Store an agent state: new outputs as rows, the rest as the case's pointer.
+        
+        An analysis or letter in `state` that the state doesn't reference by
+        id yet is appended to its table; the case row gets only the small
+        pointer document, so progress updates never rewrite letter HTML.
+        
+        Args:
+            db: Database session
+            case_id: Case the state belongs to
+            status: New case status
+            state: JSON-encoded agent state
+            
+        Returns:
+            The stored pointer, whose ids callers carry into later saves
+        """
+        pointer = await AsyncDatabaseService._add_agent_outputs(db, case_id, state, agent_state_pointer(state))
+        await db.execute(
+            update(Case)
+            .where(Case.id == case_id)
+            .values(status=status, agent_state=pointer, updated_at=datetime.now(timezone.utc))
+        )
+        await db.commit()
+        status_cache.put(CaseProgress.from_case(case_id, status, pointer))
+        return pointer
+    
+    @staticmethod
+    async def load_agent_state(db: AsyncSession, db_case: Case) -> Dict[str, Any]:
+        """
+        Expand a case's agent_state pointer into the full agent state.
+        
+        Fetches the referenced analysis, letter drafts and mailing by primary
+        key. Rows written before the split still carry everything inline and
+        are returned as they are.
+        """
+        state = dict(db_case.agent_state or {})
+        if state.get("analysis_id"):
+            analysis = await db.get(Analysis, UUID(state["analysis_id"]))
+            if analysis:
+                state["statutory_analysis"] = analysis.statutory_analysis
+                state["violation_findings"] = analysis.violation_findings
+        if state.get("letter_draft_id"):
+            draft = await db.get(LetterDraft, UUID(state["letter_draft_id"]))
+            if draft:
+                state["demand_letter_draft"] = {
+                    "letter_html": draft.letter_html,
+                    "letter_text": draft.letter_text,
+                    "citations": draft.citations
+                }
+        approved_id = state.get("approved_letter_draft_id")
+        if approved_id and approved_id != state.get("letter_draft_id"):
+            approved = await db.get(LetterDraft, UUID(approved_id))
+            if approved:
+                state["edited_letter_html"] = approved.letter_html
+        if state.get("mailing_id"):
+            mailing = await db.get(Mailing, UUID(state["mailing_id"]))
+            if mailing:
+                state["lob_mail_id"] = mailing.lob_mail_id
+                state["tracking_url"] = mailing.tracking_url
+                state["expected_delivery"] = mailing.expected_delivery
+        return state
+    
+    @staticmethod
+    async def list_letter_drafts(db: AsyncSession, case_id: UUID) -> List[LetterDraft]:
+        """All versions of a case's letter, oldest first."""
+        result = await db.execute(
+            select(LetterDraft).where(LetterDraft.case_id == case_id).order_by(LetterDraft.version)
+        )
+        return list(result.scalars().all())
+    
+    @staticmethod
+    async def has_letter_draft(db: AsyncSession, case_id: UUID) -> bool:
+        """Whether a letter has been drafted for the case before."""
+        result = await db.execute(select(LetterDraft.id).where(LetterDraft.case_id == case_id).limit(1))
+        return result.first() is not None
+    
+    @staticmethod
+    async def _add_agent_outputs(
+        db: AsyncSession,
+        case_id: UUID,
+        state: Dict[str, Any],
+        pointer: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Add rows for outputs in `state` that `pointer` has no id for (not committed)."""
+        pointer = dict(pointer)
+        if state.get("statutory_analysis") and not pointer.get("analysis_id"):
+            analysis = Analysis(
+                id=uuid4(),
+                case_id=case_id,
+                statutory_analysis=state["statutory_analysis"],
+                violation_findings=state.get("violation_findings") or []
+            )
+            db.add(analysis)
+            pointer["analysis_id"] = str(analysis.id)
+        if state.get("demand_letter_draft") and not pointer.get("letter_draft_id"):
+            draft = await AsyncDatabaseService._add_letter_draft(
+                db, case_id, "generated", **state["demand_letter_draft"]
+            )
+            pointer["letter_draft_id"] = str(draft.id)
+        return pointer
+    
+    @staticmethod
+    async def _add_letter_draft(
+        db: AsyncSession,
+        case_id: UUID,
+        source: str,
+        letter_html: str,
+        letter_text: Optional[str] = None,
+        citations: Optional[List[str]] = None
+    ) -> LetterDraft:
+        """Append the next version of a case's letter (not committed)."""
+        # Runs for a case are serialized by its lock, and (case_id, version)
+        # is unique should two ever race
+        latest = await db.execute(
+            select(func.max(LetterDraft.version)).where(LetterDraft.case_id == case_id)
+        )
+        draft = LetterDraft(
+            id=uuid4(),
+            case_id=case_id,
+            version=(latest.scalar() or 0) + 1,
+            source=source,
+            letter_html=letter_html,
+            letter_text=letter_text,
+            citations=citations or []
+        )
+        db.add(draft)
+        await db.flush()
+        return draft
+    
+    @staticmethod
+    async def delete_case(db: AsyncSession, case_id: UUID) -> bool:
+        """Delete a case."""
+        db_case = await AsyncDatabaseService.get_case(db, case_id)
+        if not db_case:
+            return False
+        await db.delete(db_case)
+        await db.commit()
+        status_cache.invalidate(case_id)
+        return True
+    
+    # Checkpoint methods for LangGraph
+    @staticmethod
+    async def save_checkpoint(
+        db: AsyncSession,
+        case_id: UUID,
+        checkpoint_data: Dict[str, Any],
+        checkpoint_ns: Optional[str] = None,
+        checkpoint_id: Optional[str] = None
+    ) -> Checkpoint:
+        """Save LangGraph checkpoint."""
+        checkpoint = Checkpoint(
+            case_id=case_id,
+            checkpoint_id=checkpoint_id,
+            checkpoint_data=checkpoint_data,
+            checkpoint_ns=checkpoint_ns
+        )
+        db.add(checkpoint)
+        await db.commit()
+        return checkpoint
+    
+    @staticmethod
+    async def get_checkpoint(
+        db: AsyncSession,
+        case_id: UUID,
+        checkpoint_ns: str = "",
+        checkpoint_id: Optional[str] = None
+    ) -> Optional[Checkpoint]:
+        """Get a specific checkpoint, or the latest one in the namespace."""
+        query = select(Checkpoint).where(
+            Checkpoint.case_id == case_id,
+            Checkpoint.checkpoint_ns == checkpoint_ns
+        )
+        if checkpoint_id:
+            query = query.where(Checkpoint.checkpoint_id == checkpoint_id)
+        else:
+            query = query.order_by(Checkpoint.checkpoint_id.desc())
+        result = await db.execute(query.limit(1))
+        return result.scalars().first()
+    
+    @staticmethod
+    async def list_checkpoints(
+        db: AsyncSession,
+        case_id: UUID,
+        checkpoint_ns: str = "",
+        before_id: Optional[str] = None
+    ) -> List[Checkpoint]:
+        """List checkpoints in a namespace, newest first."""
+        query = select(Checkpoint).where(
+            Checkpoint.case_id == case_id,
+            Checkpoint.checkpoint_ns == checkpoint_ns
+        )
+        if before_id:
+            query = query.where(Checkpoint.checkpoint_id < before_id)
+        result = await db.execute(query.order_by(Checkpoint.checkpoint_id.desc()))
+        return list(result.scalars().all())
+    
+    @staticmethod
+    async def append_checkpoint_writes(
+        db: AsyncSession,
+        checkpoint: Checkpoint,
+        writes: List[Dict[str, Any]]
+    ) -> Checkpoint:
+        """Append pending writes to a stored checkpoint."""
+        checkpoint.checkpoint_data = {
+            **checkpoint.checkpoint_data,
+            "writes": checkpoint.checkpoint_data.get("writes", []) + writes
+        }
+        await db.commit()
+        return checkpoint
+    
+    @staticmethod
+    async def delete_checkpoints(db: AsyncSession, case_id: UUID) -> int:
+        """Delete all checkpoints for a case."""
+        result = await db.execute(delete(Checkpoint).where(Checkpoint.case_id == case_id))
+        await db.commit()
+        return result.rowcount
+    
+    # Background agent jobs
+    @staticmethod
+    async def create_job(
+        db: AsyncSession,
+        case_id: UUID,
+        job_type: str = "execute"
+    ) -> AgentJob:
+        """Persist a queued agent job."""
+        job = AgentJob(case_id=case_id, job_type=job_type, status="queued")
+        db.add(job)
+        await db.commit()
+        await db.refresh(job)
+        return job
+    
+    @staticmethod
+    async def get_job(db: AsyncSession, job_id: UUID) -> Optional[AgentJob]:
+        """Get job by ID."""
+        result = await db.execute(select(AgentJob).where(AgentJob.id == job_id))
+        return result.scalars().first()
+    
+    @staticmethod
+    async def get_jobs(db: AsyncSession, job_ids: List[UUID]) -> List[AgentJob]:
+        """Get several jobs by ID."""
+        result = await db.execute(select(AgentJob).where(AgentJob.id.in_(job_ids)))
+        return list(result.scalars().all())
+    
+    @staticmethod
+    async def get_active_job(db: AsyncSession, case_id: UUID) -> Optional[AgentJob]:
+        """Get the queued or running job for a case, if any."""
+        result = await db.execute(
+            select(AgentJob)
+            .where(AgentJob.case_id == case_id, AgentJob.status.in_(("queued", "running")))
+            .order_by(AgentJob.created_at.desc())
+            .limit(1)
+        )
+        return result.scalars().first()
+    
+    @staticmethod
+    async def create_jobs(
+        db: AsyncSession,
+        case_ids: List[UUID],
+        job_type: str = "execute"
+    ) -> List[AgentJob]:
+        """Persist queued agent jobs for several cases in one transaction."""
+        jobs = [AgentJob(case_id=case_id, job_type=job_type, status="queued") for case_id in case_ids]
+        db.add_all(jobs)
+        await db.commit()
+        return jobs
+    
+    @staticmethod
+    async def list_active_case_ids(db: AsyncSession, case_ids: List[UUID]) -> List[UUID]:
+        """Of the given cases, return those with a queued or running job."""
+        result = await db.execute(
+            select(AgentJob.case_id)
+            .where(AgentJob.case_id.in_(case_ids), AgentJob.status.in_(("queued", "running")))
+            .distinct()
+        )
+        return list(result.scalars().all())
+    
+    @staticmethod
+    async def get_latest_job(db: AsyncSession, case_id: UUID) -> Optional[AgentJob]:
+        """Get the most recent job for a case."""
+        result = await db.execute(
+            select(AgentJob)
+            .where(AgentJob.case_id == case_id)
+            .order_by(AgentJob.created_at.desc())
+            .limit(1)
+        )
+        return result.scalars().first()
+    
+    @staticmethod
+    async def list_unfinished_jobs(db: AsyncSession) -> List[AgentJob]:
+        """List jobs left queued or running, oldest first."""
+        result = await db.execute(
+            select(AgentJob)
+            .where(AgentJob.status.in_(("queued", "running")))
+            .order_by(AgentJob.created_at)
+        )
+        return list(result.scalars().all())
+    
+    @staticmethod
+    async def claim_job(db: AsyncSession, job_id: UUID) -> Optional[AgentJob]:
+        """
+        Mark an unfinished job running, unless it already finished.
+        
+        Callers hold the case's lock, so a job still "running" here was left
+        by a worker that died, and is taken over.
+        
+        Returns:
+            The claimed job, or None if it is missing or finished
+        """
+        result = await db.execute(
+            update(AgentJob)
+            .where(AgentJob.id == job_id, AgentJob.status.in_(("queued", "running")))
+            .values(status="running", started_at=datetime.now(timezone.utc))
+        )
+        await db.commit()
+        if result.rowcount == 0:
+            return None
+        return await AsyncDatabaseService.get_job(db, job_id)
+    
+    @staticmethod
+    async def update_job_status(
+        db: AsyncSession,
+        job_id: UUID,
+        status: str,
+        error: Optional[str] = None
+    ) -> Optional[AgentJob]:
+        """Move a job to a new status, stamping start/finish times."""
+        job = await AsyncDatabaseService.get_job(db, job_id)
+        if not job:
+            return None
+        
+        job.status = status
+        job.error = error
+        if status == "running":
+            job.started_at = datetime.now(timezone.utc)
+        elif status in ("succeeded", "failed"):
+            job.finished_at = datetime.now(timezone.utc)
+        
+        await db.commit()
+        return job
+    
+    # Case locks
+    @staticmethod
+    async def acquire_case_lock(
+        db: AsyncSession,
+        case_id: UUID,
+        operation: str,
+        owner: str,
+        ttl_seconds: int
+    ) -> bool:
+        """
+        Take the case's lock unless another owner holds an unexpired one.
+        
+        Returns:
+            True if the lock was acquired
+        """
+        now = datetime.now(timezone.utc)
+        await db.execute(delete(CaseLock).where(CaseLock.case_id == case_id, CaseLock.expires_at <= now))
+        db.add(CaseLock(
+            case_id=case_id,
+            operation=operation,
+            owner=owner,
+            acquired_at=now,
+            expires_at=now + timedelta(seconds=ttl_seconds)
+        ))
+        try:
+            await db.commit()
+        except IntegrityError:
+            await db.rollback()
+            return False
+        return True
+    
+    @staticmethod
+    async def renew_case_lock(db: AsyncSession, case_id: UUID, owner: str, ttl_seconds: int) -> bool:
+        """Extend a held lock's lease; False if it lapsed and was lost."""
+        result = await db.execute(
+            update(CaseLock)
+            .where(CaseLock.case_id == case_id, CaseLock.owner == owner)
+            .values(expires_at=datetime.now(timezone.utc) + timedelta(seconds=ttl_seconds))
+        )
+        await db.commit()
+        return result.rowcount > 0
+    
+    @staticmethod
+    async def release_case_lock(db: AsyncSession, case_id: UUID, owner: str) -> None:
+        """Drop a lock, if `owner` still holds it."""
+        await db.execute(delete(CaseLock).where(CaseLock.case_id == case_id, CaseLock.owner == owner))
+        await db.commit()
+    
+    # Claude response cache
+    @staticmethod
+    async def get_cache_entry(db: AsyncSession, key: str) -> Optional[LLMCacheEntry]:
+        """Get an unexpired cache entry."""
+        result = await db.execute(
+            select(LLMCacheEntry).where(
+                LLMCacheEntry.key == key,
+                LLMCacheEntry.expires_at > datetime.now(timezone.utc)
+            )
+        )
+        return result.scalars().first()
+    
+    @staticmethod
+    async def save_cache_entry(
+        db: AsyncSession,
+        key: str,
+        kind: str,
+        model: str,
+        response: Dict[str, Any],
+        expires_at: datetime
+    ) -> LLMCacheEntry:
+        """Insert or replace a cache entry."""
+        entry = await db.merge(LLMCacheEntry(
+            key=key,
+            kind=kind,
+            model=model,
+            response=response,
+            created_at=datetime.now(timezone.utc),
+            expires_at=expires_at
+        ))
+        await db.commit()
+        return entry
+    
+    @staticmethod
+    async def evict_cache_entries(db: AsyncSession, max_entries: int) -> int:
+        """Delete expired entries, then the oldest ones beyond max_entries."""
+        expired = await db.execute(
+            delete(LLMCacheEntry).where(LLMCacheEntry.expires_at <= datetime.now(timezone.utc))
+        )
+        evicted = expired.rowcount or 0
+        
+        cutoff = await db.execute(
+            select(LLMCacheEntry.created_at)
+            .order_by(LLMCacheEntry.created_at.desc())
+            .offset(max_entries)
+            .limit(1)
+        )
+        cutoff_at = cutoff.scalar()
+        if cutoff_at is not None:
+            overflow = await db.execute(
+                delete(LLMCacheEntry).where(LLMCacheEntry.created_at <= cutoff_at)
+            )
+            evicted += overflow.rowcount or 0
+        
+        await db.commit()
+        return evicted
+    
+    # Mail outbox
+    @staticmethod
+    async def enqueue_mail(
+        db: AsyncSession,
+        case_id: UUID,
+        agent_state: Dict[str, Any],
+        idempotency_key: str,
+        to_address: Dict[str, Any],
+        from_address: Dict[str, Any],
+        letter_html: str,
+        description: str
+    ) -> MailOutbox:
+        """
+        Record an approved letter for mailing.
+        
+        The outbox row and the case's move to "mail_queued" commit together.
+        Re-approving the same letter reuses its row (re-arming it if it had
+        failed) rather than queuing a second copy. An approved letter that
+        differs from the generated draft is stored as a new "edited" version.
+        """
+        result = await db.execute(
+            select(MailOutbox).where(MailOutbox.idempotency_key == idempotency_key)
+        )
+        mail = result.scalars().first()
+        now = datetime.now(timezone.utc)
+        
+        stored = await db.execute(select(Case.agent_state).where(Case.id == case_id))
+        pointer = await AsyncDatabaseService._add_agent_outputs(
+            db, case_id, agent_state, {**(stored.scalar() or {}), **agent_state_pointer(agent_state)}
+        )
+        generated = agent_state.get("demand_letter_draft") or {}
+        if letter_html == generated.get("letter_html"):
+            pointer["approved_letter_draft_id"] = pointer.get("letter_draft_id")
+        elif mail is None or not pointer.get("approved_letter_draft_id"):
+            edited = await AsyncDatabaseService._add_letter_draft(
+                db, case_id, "edited" if generated else "generated", letter_html
+            )
+            pointer["approved_letter_draft_id"] = str(edited.id)
+        
+        if mail is None:
+            mail = MailOutbox(
+                case_id=case_id,
+                idempotency_key=idempotency_key,
+                to_address=to_address,
+                from_address=from_address,
+                letter_html=letter_html,
+                description=description,
+                status="pending",
+                attempts=0,
+                next_attempt_at=now
+            )
+            db.add(mail)
+        elif mail.status == "failed":
+            mail.status = "pending"
+            mail.attempts = 0
+            mail.next_attempt_at = now
+        
+        await db.execute(
+            update(Case)
+            .where(Case.id == case_id)
+            .values(status="mail_queued", agent_state=pointer, updated_at=datetime.now(timezone.utc))
+        )
+        await db.commit()
+        status_cache.put(CaseProgress.from_case(case_id, "mail_queued", pointer))
+        return mail
+    
+    @staticmethod
+    async def claim_mail_batch(
+        db: AsyncSession,
+        limit: int,
+        lease_seconds: int,
+        max_attempts: Optional[int] = None
+    ) -> List[MailOutbox]:
+        """
+        Claim due outbox rows for sending.
+        
+        Picks pending rows whose retry time has come, plus rows stuck in
+        "sending" longer than the lease (their sender died mid-send). Rows
+        are locked with SKIP LOCKED on PostgreSQL so concurrent senders never
+        claim the same letter. A stuck row that has already used
+        `max_attempts` is marked failed instead, as a failed send would be,
+        so a letter that keeps crashing its sender isn't retried forever.
+        
+        Returns:
+            The claimed rows (not the ones given up on)
+        """
+        now = datetime.now(timezone.utc)
+        result = await db.execute(
+            select(MailOutbox)
+            .where(
+                or_(
+                    and_(MailOutbox.status == "pending", MailOutbox.next_attempt_at <= now),
+                    and_(
+                        MailOutbox.status == "sending",
+                        MailOutbox.claimed_at < now - timedelta(seconds=lease_seconds)
+                    )
+                )
+            )
+            .order_by(MailOutbox.next_attempt_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        batch, abandoned = [], []
+        for mail in result.scalars().all():
+            if mail.status == "sending" and max_attempts is not None and mail.attempts >= max_attempts:
+                await AsyncDatabaseService._give_up_mail(
+                    db, mail, f"Sender lease expired after {mail.attempts} attempt(s)"
+                )
+                abandoned.append(mail.case_id)
+                continue
+            mail.status = "sending"
+            mail.claimed_at = now
+            mail.attempts += 1
+            batch.append(mail)
+        await db.commit()
+        for case_id in abandoned:
+            status_cache.invalidate(case_id)
+        return batch
+    
+    @staticmethod
+    async def complete_mail(
+        db: AsyncSession,
+        mail_id: UUID,
+        mailing: Dict[str, Any]
+    ) -> None:
+        """Mark a letter sent, record the mailing and mark the case mailed in one transaction."""
+        mail = await db.get(MailOutbox, mail_id)
+        mail.status = "sent"
+        mail.lob_id = mailing["lob_mail_id"]
+        mail.last_error = None
+        mail.sent_at = datetime.now(timezone.utc)
+        
+        db_case = await AsyncDatabaseService.get_case(db, mail.case_id)
+        if db_case:
+            state = dict(db_case.agent_state or {})
+            if "metrics" in mailing:
+                # Add the send's Lob time to the case's running totals
+                mailing = {
+                    **mailing,
+                    "metrics": merge_case_metrics(
+                        merge_case_metrics({}, state.get("metrics") or {}), mailing["metrics"]
+                    )
+                }
+            approved_id = state.get("approved_letter_draft_id")
+            record = Mailing(
+                id=uuid4(),
+                case_id=mail.case_id,
+                outbox_id=mail.id,
+                letter_draft_id=UUID(approved_id) if approved_id else None,
+                lob_mail_id=mailing["lob_mail_id"],
+                tracking_url=mailing.get("tracking_url"),
+                expected_delivery=mailing.get("expected_delivery")
+            )
+            db.add(record)
+            db_case.status = "mailed"
+            db_case.agent_state = {**state, **agent_state_pointer(mailing), "mailing_id": str(record.id)}
+            db_case.updated_at = datetime.now(timezone.utc)
+        await db.commit()
+        status_cache.invalidate(mail.case_id)
+    
+    @staticmethod
+    async def fail_mail(
+        db: AsyncSession,
+        mail_id: UUID,
+        error: str,
+        retry_at: Optional[datetime] = None
+    ) -> None:
+        """
+        Record a failed send: schedule a retry, or give up and flag the case.
+        
+        Args:
+            db: Database session
+            mail_id: Outbox row
+            error: Error message
+            retry_at: When to try again; None marks the letter failed
+        """
+        mail = await db.get(MailOutbox, mail_id)
+        if retry_at is not None:
+            mail.last_error = error
+            mail.status = "pending"
+            mail.next_attempt_at = retry_at
+        else:
+            await AsyncDatabaseService._give_up_mail(db, mail, error)
+        await db.commit()
+        status_cache.invalidate(mail.case_id)
+    
+    @staticmethod
+    async def _give_up_mail(db: AsyncSession, mail: MailOutbox, error: str) -> None:
+        """Mark a letter failed and flag its case (not committed)."""
+        mail.last_error = error
+        mail.status = "failed"
+        db_case = await AsyncDatabaseService.get_case(db, mail.case_id)
+        if db_case:
+            db_case.status = "error"
+            db_case.agent_state = {**(db_case.agent_state or {}), "status": "error", "error": error}
+            db_case.updated_at = datetime.now(timezone.utc)
+    
+    @staticmethod
+    async def get_latest_mail(db: AsyncSession, case_id: UUID) -> Optional[MailOutbox]:
+        """Get the most recent outbox row for a case."""
+        result = await db.execute(
+            select(MailOutbox)
+            .where(MailOutbox.case_id == case_id)
+            .order_by(MailOutbox.created_at.desc())
+            .limit(1)
+        )
+        return result.scalars().first()
+    
+    # Address verification cache
+    @staticmethod
+    async def get_address_verifications(
+        db: AsyncSession,
+        keys: List[str]
+    ) -> Dict[str, AddressVerification]:
+        """Get unexpired address verifications for the given keys."""
+        if not keys:
+            return {}
+        result = await db.execute(
+            select(AddressVerification).where(
+                AddressVerification.key.in_(keys),
+                AddressVerification.expires_at > datetime.now(timezone.utc)
+            )
+        )
+        return {row.key: row for row in result.scalars().all()}
+    
+    @staticmethod
+    async def save_address_verifications(
+        db: AsyncSession,
+        verifications: List[Dict[str, Any]]
+    ) -> None:
+        """Insert or refresh address verifications (dicts of AddressVerification columns)."""
+        for values in verifications:
+            await db.merge(AddressVerification(**values))
+        await db.commit()
 
 
-# Singleton instance
+# Singleton instances
 db_service = DatabaseService()
+async_db_service = AsyncDatabaseService()
@@ -0,0 +1,119 @@
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.services.db_service import async_db_service
+from sqlalchemy.exc import SQLAlchemyError
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+import hashlib
+import json
+import time
+
+
+class LLMResponseCache:
+    """
+    Content-addressed cache for parsed Claude responses.
+
+    Keys are a hash of the full rendered request (model, temperature, system
+    and user prompt), so identical case facts map to the same entry. Lookups
+    go memory LRU → database → miss; a hit never touches the network. The
+    database tier is best-effort: errors there count as misses.
+    """
+
+    # Run database eviction once every this many stores
+    EVICT_EVERY = 100
+
+    def __init__(
+        self,
+        memory_size: Optional[int] = None,
+        max_entries: Optional[int] = None,
+        ttl_seconds: Optional[int] = None,
+        session_factory=AsyncSessionLocal,
+        persistent: bool = True
+    ):
+        self.memory_size = memory_size or settings.LLM_CACHE_MEMORY_SIZE
+        self.max_entries = max_entries or settings.LLM_CACHE_MAX_ENTRIES
+        self.ttl_seconds = ttl_seconds or settings.LLM_CACHE_TTL_SECONDS
+        self.session_factory = session_factory
+        self.persistent = persistent
+        self._memory: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._stores = 0
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(request: Dict[str, Any]) -> str:
+        """Hash a Messages API request into a cache key."""
+        canonical = json.dumps(request, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look up a cached response, promoting database hits into memory."""
+        entry = self._memory.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.time():
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return value
+            del self._memory[key]
+
+        if self.persistent:
+            try:
+                async with self.session_factory() as db:
+                    row = await async_db_service.get_cache_entry(db, key)
+            except SQLAlchemyError:
+                row = None
+            if row is not None:
+                expires_at = row.expires_at
+                if expires_at.tzinfo is None:
+                    expires_at = expires_at.replace(tzinfo=timezone.utc)
+                self._remember(key, row.response, expires_at.timestamp())
+                self.db_hits += 1
+                return row.response
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, kind: str, model: str, value: Dict[str, Any]) -> None:
+        """Store a response in both tiers."""
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=self.ttl_seconds)
+        self._remember(key, value, expires_at.timestamp())
+
+        if not self.persistent:
+            return
+        try:
+            async with self.session_factory() as db:
+                await async_db_service.save_cache_entry(db, key, kind, model, value, expires_at)
+                self._stores += 1
+                if self._stores % self.EVICT_EVERY == 0:
+                    await async_db_service.evict_cache_entries(db, self.max_entries)
+        except SQLAlchemyError:
+            pass
+
+    def _remember(self, key: str, value: Dict[str, Any], expires_at: float) -> None:
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def clear_memory(self) -> None:
+        """Drop the in-memory tier (the database tier is kept)."""
+        self._memory.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for monitoring."""
+        lookups = self.memory_hits + self.db_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.db_hits) / lookups if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "memory_size": self.memory_size
+        }
+
+
+# Singleton instance
+llm_cache = LLMResponseCache()
@@ -1,15 +1,204 @@
-import lob
+import httpx
 from app.config import settings
 from app.models.schemas import AddressSchema, MailingResult
-from typing import Dict, Any
-from datetime import date
+from app.services.metrics import metrics
+from app.services.tracing import tracer
+from typing import Dict, Any, List, Optional
+from datetime import date, datetime, timezone
+from email.utils import parsedate_to_datetime
+import asyncio
+import hashlib
+import logging
+import math
+import random
+import time
+
+logger = logging.getLogger(__name__)
+
+# Responses worth retrying: rate limited or a server-side failure
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def lob_idempotency_key(case_id: Any, letter_html: str) -> str:
+    """
+    Idempotency key for mailing a letter for a case.
+    
+    The same case and letter content always give the same key, so a retry
+    after a timeout returns the letter Lob already created instead of mailing
+    a second copy. An edited letter gets a new key.
+    
+    Args:
+        case_id: Case the letter belongs to
+        letter_html: Exact HTML being mailed
+    
+    Returns:
+        Key for Lob's Idempotency-Key header
+    """
+    letter_hash = hashlib.sha256(letter_html.encode("utf-8")).hexdigest()
+    return f"case-{case_id}-{letter_hash[:32]}"
+
+
+def parse_retry_after(value: str) -> Optional[float]:
+    """
+    Seconds to wait from a Retry-After header (delay-seconds or HTTP-date).
+    
+    Returns:
+        A non-negative delay, or None if the header can't be parsed
+    """
+    value = value.strip()
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if retry_at.tzinfo is None:
+            # HTTP dates are always GMT
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        seconds = (retry_at - datetime.now(timezone.utc)).total_seconds()
+    if math.isnan(seconds):
+        return None
+    return max(0.0, seconds)
+
+
+class RateLimiter:
+    """
+    Token bucket shared by every Lob request from this process.
+    
+    Allows bursts of up to `burst` requests, refilling at `rate` per second,
+    so bulk work stays under Lob's per-account quota instead of tripping 429s.
+    """
+    
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock: Optional[asyncio.Lock] = None
+    
+    async def acquire(self) -> None:
+        """Wait until a request may be sent."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
 
 
 class LobService:
     """Service for sending certified mail via Lob API."""
     
-    def __init__(self):
-        self.client = lob.Client(api_key=settings.LOB_API_KEY)
+    # Lob accepts at most this many addresses per bulk verification request
+    BULK_VERIFY_MAX_ADDRESSES = 20
+    
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        max_retries: Optional[int] = None,
+        retry_base_delay: Optional[float] = None,
+        rate_limiter: Optional[RateLimiter] = None
+    ):
+        self.api_key = api_key or settings.LOB_API_KEY
+        self.base_url = base_url or settings.LOB_BASE_URL
+        self.max_retries = settings.LOB_MAX_RETRIES if max_retries is None else max_retries
+        self.retry_base_delay = (
+            settings.LOB_RETRY_BASE_DELAY if retry_base_delay is None else retry_base_delay
+        )
+        # Lob's quota is per account, so each worker process gets its share
+        self.rate_limiter = rate_limiter or RateLimiter(
+            settings.per_worker(settings.LOB_RATE_LIMIT_PER_SECOND),
+            settings.per_worker(settings.LOB_RATE_LIMIT_BURST)
+        )
+        self._http: Optional[httpx.AsyncClient] = None
+    
+    @property
+    def http(self) -> httpx.AsyncClient:
+        """Async REST client for Lob, created on first use."""
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                base_url=self.base_url,
+                auth=(self.api_key, ""),
+                timeout=settings.LOB_TIMEOUT_SECONDS
+            )
+        return self._http
+    
+    async def aclose(self) -> None:
+        """Close the REST client's connection pool."""
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+    
+    def _retry_delay(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        """
+        Exponential backoff with full jitter, honouring Retry-After on 429.
+        
+        Retry-After may be seconds or an HTTP date; either way the wait is
+        capped at LOB_RETRY_MAX_DELAY so a large value can't stall a sender.
+        """
+        if response is not None and response.headers.get("Retry-After"):
+            retry_after = parse_retry_after(response.headers["Retry-After"])
+            if retry_after is not None:
+                return min(settings.LOB_RETRY_MAX_DELAY, retry_after)
+        ceiling = min(settings.LOB_RETRY_MAX_DELAY, self.retry_base_delay * 2 ** attempt)
+        return random.uniform(0, ceiling)
+    
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        idempotency_key: Optional[str] = None,
+        **kwargs
+    ) -> httpx.Response:
+        """
+        Send a rate-limited request, retrying transient failures.
+        
+        Timeouts, connection errors, 429s and 5xx responses are retried up to
+        `max_retries` times. Requests that create resources must pass an
+        idempotency key so a retry cannot create a duplicate.
+        
+        Raises:
+            httpx.HTTPError: If the request still fails after the last retry,
+                or fails with a non-retryable status
+        """
+        headers = {"Idempotency-Key": idempotency_key} if idempotency_key else {}
+        attributes = {"http.method": method, "lob.path": path}
+        with tracer.start_span("lob.request", attributes) as span:
+            attempt = 0
+            while True:
+                span.set_attribute("lob.retries", attempt)
+                await self.rate_limiter.acquire()
+                started = time.perf_counter()
+                try:
+                    response = await self.http.request(method, path, headers=headers, **kwargs)
+                except httpx.TransportError as e:
+                    metrics.observe_lob(method, path, e.__class__.__name__, time.perf_counter() - started)
+                    if attempt >= self.max_retries:
+                        raise
+                    logger.warning(
+                        "Lob request failed, retrying",
+                        extra={"method": method, "path": path, "error": e.__class__.__name__, "attempt": attempt}
+                    )
+                    await asyncio.sleep(self._retry_delay(attempt))
+                else:
+                    metrics.observe_lob(method, path, response.status_code, time.perf_counter() - started)
+                    span.set_attribute("http.status_code", response.status_code)
+                    if response.status_code not in RETRYABLE_STATUS_CODES or attempt >= self.max_retries:
+                        response.raise_for_status()
+                        return response
+                    logger.warning(
+                        "Lob request returned a retryable status, retrying",
+                        extra={"method": method, "path": path, "status": response.status_code, "attempt": attempt}
+                    )
+                    await asyncio.sleep(self._retry_delay(attempt, response))
+                attempt += 1
     
     def _format_address_for_lob(self, address: Dict[str, Any]) -> Dict[str, str]:
         """
@@ -17,7 +206,7 @@ class LobService:
         
         Args:
             address: Dictionary with address fields
-            
+        
         Returns:
             Lob-formatted address dictionary
         """
@@ -39,7 +228,8 @@ class LobService:
         to_address: Dict[str, Any],
         from_address: Dict[str, Any],
         letter_html: str,
-        description: str = "Security Deposit Demand Letter"
+        description: str = "Security Deposit Demand Letter",
+        idempotency_key: Optional[str] = None
     ) -> MailingResult:
         """
         Send certified mail via Lob API.
@@ -49,49 +239,87 @@ class LobService:
             from_address: Sender address
             letter_html: HTML content of letter
             description: Letter description
-            
+            idempotency_key: Key that makes retries safe (see lob_idempotency_key)
+        
         Returns:
             MailingResult with tracking info
-            
+        
         Raises:
-            lob.error.LobError: If API call fails
+            ValueError: If the Lob API call fails
         """
         try:
-            # Format addresses for Lob
-            to_lob = self._format_address_for_lob(to_address)
-            from_lob = self._format_address_for_lob(from_address)
-            
             # Create letter via Lob API
-            letter = self.client.Letter.create(
-                description=description,
-                to_address=to_lob,
-                from_address=from_lob,
-                file=letter_html,
-                color=True,
-                double_sided=False,
-                extra_service="certified",
-                mail_type="usps_first_class"
-            )
-            
-            # Extract tracking information
-            tracking_url = None
-            if hasattr(letter, 'tracking_events') and letter.tracking_events:
-                tracking_url = letter.tracking_events[0].get('url')
-            
-            expected_delivery = None
-            if hasattr(letter, 'expected_delivery_date'):
-                # Parse date string if needed
-                expected_delivery = letter.expected_delivery_date
-            
-            return MailingResult(
-                lob_id=letter.id,
-                tracking_url=tracking_url,
-                expected_delivery=expected_delivery
+            response = await self._request(
+                "POST",
+                "/letters",
+                idempotency_key=idempotency_key,
+                json={
+                    "description": description,
+                    "to": self._format_address_for_lob(to_address),
+                    "from": self._format_address_for_lob(from_address),
+                    "file": letter_html,
+                    "color": True,
+                    "double_sided": False,
+                    "extra_service": "certified",
+                    "mail_type": "usps_first_class"
+                }
             )
-            
-        except lob.error.LobError as e:
+        except httpx.HTTPStatusError as e:
             # Re-raise with more context
-            raise ValueError(f"Lob API error: {str(e)}")
+            raise ValueError(f"Lob API error: {e.response.status_code} {e.response.text}")
+        except httpx.HTTPError as e:
+            raise ValueError(f"Lob API error: {e.__class__.__name__}: {e}")
+        
+        letter = response.json()
+        
+        # Extract tracking information
+        tracking_url = None
+        if letter.get("tracking_events"):
+            tracking_url = letter["tracking_events"][0].get("url")
+        
+        return MailingResult(
+            lob_id=letter["id"],
+            tracking_url=tracking_url,
+            expected_delivery=letter.get("expected_delivery_date")
+        )
+    
+    async def bulk_verify_addresses(self, addresses: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Verify US addresses with Lob's bulk verification API.
+        
+        Sends one request per BULK_VERIFY_MAX_ADDRESSES addresses.
+        
+        Args:
+            addresses: Addresses in internal format
+        
+        Returns:
+            Lob verification objects, one per input address in order. Entries
+            Lob could not process carry an `error` key instead.
+        
+        Raises:
+            httpx.HTTPError: If a request fails
+        """
+        results: List[Dict[str, Any]] = []
+        for start in range(0, len(addresses), self.BULK_VERIFY_MAX_ADDRESSES):
+            chunk = addresses[start:start + self.BULK_VERIFY_MAX_ADDRESSES]
+            response = await self._request(
+                "POST",
+                "/bulk/us_verifications",
+                json={
+                    "addresses": [
+                        {
+                            "primary_line": address["address_line1"],
+                            "secondary_line": address.get("address_line2") or "",
+                            "city": address["address_city"],
+                            "state": address["address_state"],
+                            "zip_code": address["address_zip"]
+                        }
+                        for address in chunk
+                    ]
+                }
+            )
+            results.extend(response.json()["addresses"])
+        return results
     
     async def verify_address(self, address: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -99,32 +327,25 @@ class LobService:
         
         Args:
             address: Address to verify
-            
+        
         Returns:
             Verified/corrected address or original if verification fails
         """
         try:
-            lob_address = self._format_address_for_lob(address)
-            verified = self.client.USVerification.create(**lob_address)
-            
-            if hasattr(verified, 'deliverability') and verified.deliverability == 'deliverable':
-                # Return corrected address
-                return {
-                    "name": address["name"],
-                    "address_line1": verified.primary_line,
-                    "address_line2": verified.secondary_line or "",
-                    "address_city": verified.components.city,
-                    "address_state": verified.components.state,
-                    "address_zip": verified.components.zip_code
-                }
-            else:
-                # Address not deliverable - return original
-                return address
-                
-        except lob.error.LobError:
+            verified = (await self.bulk_verify_addresses([address]))[0]
+        except httpx.HTTPError:
             # Verification failed - return original address
             return address
-
-
-# Singleton instance
-lob_service = LobService()
+        
+        if verified.get("deliverability") == "deliverable":
+            # Return corrected address
+            return {
+                "name": address["name"],
+                "address_line1": verified["primary_line"],
+                "address_line2": verified.get("secondary_line") or "",
+                "address_city": verified["components"]["city"],
+                "address_state": verified["components"]["state"],
+                "address_zip": verified["components"]["zip_code"]
+            }
+        # Address not deliverable - return original
+        return address
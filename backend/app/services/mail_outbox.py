@@ -0,0 +1,177 @@
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.database import MailOutbox
+from app.services.db_service import async_db_service
+from app.services.metrics import case_metrics
+from app.services.structured_logging import log_context
+from app.services.tracing import tracer
+from fastapi.encoders import jsonable_encoder
+from typing import TYPE_CHECKING, Any, Dict, Optional
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+import asyncio
+import logging
+import random
+
+if TYPE_CHECKING:
+    from app.providers import Providers
+
+logger = logging.getLogger(__name__)
+
+
+class MailSender:
+    """
+    Background sender that drains the mail outbox.
+
+    Claims due rows in batches, mails them concurrently through Lob and
+    records each result in the same transaction that moves the case to
+    "mailed". Delivery is at-least-once: a row whose sender dies mid-send is
+    claimed again once its lease expires. Every send carries the row's
+    idempotency key, so a repeated send returns the letter Lob already
+    created instead of mailing a second copy. Letters go through the Lob
+    service of the provider container the sender was started (or
+    constructed) with.
+    """
+
+    def __init__(
+        self,
+        batch_size: Optional[int] = None,
+        poll_seconds: Optional[float] = None,
+        max_attempts: Optional[int] = None,
+        session_factory=AsyncSessionLocal,
+        providers: Optional["Providers"] = None
+    ):
+        self.batch_size = batch_size or settings.MAIL_OUTBOX_BATCH_SIZE
+        self.poll_seconds = poll_seconds or settings.MAIL_OUTBOX_POLL_SECONDS
+        self.max_attempts = max_attempts or settings.MAIL_OUTBOX_MAX_ATTEMPTS
+        self.session_factory = session_factory
+        self.providers = providers
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    async def start(self, providers: "Providers") -> None:
+        """Start draining the outbox in the background, mailing through `providers`' Lob service."""
+        if self.running:
+            return
+        self.providers = providers
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the sender; rows being sent are reclaimed after their lease."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        self._wakeup = None
+
+    def wake(self) -> None:
+        """Drain now instead of at the next poll (called after enqueueing)."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def enqueue(self, state: Dict[str, Any], letter_html: str, **letter: Any) -> MailOutbox:
+        """
+        Commit an approved letter to the outbox and wake the sender.
+
+        Args:
+            state: Agent state to store on the case alongside the row
+            letter_html: Approved letter HTML
+            **letter: idempotency_key, to_address, from_address, description
+
+        Returns:
+            The outbox row
+        """
+        async with self.session_factory() as db:
+            mail = await async_db_service.enqueue_mail(
+                db,
+                UUID(str(state["case_id"])),
+                agent_state=jsonable_encoder(state),
+                letter_html=letter_html,
+                **letter
+            )
+        self.wake()
+        return mail
+
+    async def drain_once(self) -> int:
+        """
+        Claim and send one batch.
+
+        Returns:
+            Number of rows claimed
+        """
+        async with self.session_factory() as db:
+            batch = await async_db_service.claim_mail_batch(
+                db, self.batch_size, settings.MAIL_OUTBOX_LEASE_SECONDS, self.max_attempts
+            )
+        await asyncio.gather(*[self._send(mail) for mail in batch])
+        return len(batch)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                claimed = await self.drain_once()
+            except Exception:
+                logger.exception("Outbox drain failed")
+                claimed = 0
+            if claimed >= self.batch_size:
+                # Likely more due rows waiting
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def _send(self, mail: MailOutbox) -> None:
+        with tracer.start_span("mail.send", {"case.id": str(mail.case_id), "mail.attempt": mail.attempts}), \
+                log_context(case_id=str(mail.case_id)):
+            await self._send_one(mail)
+
+    async def _send_one(self, mail: MailOutbox) -> None:
+        try:
+            with case_metrics() as collected:
+                result = await self.providers.lob.send_certified_letter(
+                    to_address=mail.to_address,
+                    from_address=mail.from_address,
+                    letter_html=mail.letter_html,
+                    description=mail.description,
+                    idempotency_key=mail.idempotency_key
+                )
+        except Exception as e:
+            retry_at = None
+            if mail.attempts < self.max_attempts:
+                retry_at = datetime.now(timezone.utc) + self._backoff(mail.attempts)
+            logger.warning("Send failed (attempt %d): %s", mail.attempts, e)
+            async with self.session_factory() as db:
+                await async_db_service.fail_mail(db, mail.id, str(e), retry_at=retry_at)
+            return
+
+        async with self.session_factory() as db:
+            await async_db_service.complete_mail(
+                db,
+                mail.id,
+                jsonable_encoder({
+                    "status": "mailed",
+                    "needs_approval": False,
+                    "lob_mail_id": result.lob_id,
+                    "tracking_url": result.tracking_url,
+                    "expected_delivery": result.expected_delivery,
+                    "metrics": {"lob": collected.to_dict()["lob"]}
+                })
+            )
+        logger.info("Mail sent", extra={"lob_mail_id": result.lob_id})
+
+    @staticmethod
+    def _backoff(attempts: int) -> timedelta:
+        # Lob calls already retry transient errors; this spaces out whole attempts
+        return timedelta(seconds=random.uniform(0, min(600, 5 * 2 ** attempts)))
+
+
+# Singleton sender, started with the app
+mail_sender = MailSender()
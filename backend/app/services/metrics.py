@@ -0,0 +1,277 @@
+from app.services.token_usage import USAGE_FIELDS
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import copy
+import math
+import os
+import threading
+import time
+
+# Content type of the Prometheus text exposition format
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; covers fast DB queries through long letter generations
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# SQL verbs reported as their own db_query_seconds label; the rest are "OTHER"
+DB_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE"}
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf"
+    return repr(float(value))
+
+
+class Counter:
+    """Monotonic counter with labels."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = tuple(str(labels[name]) for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self, const_labels: Optional[Dict[str, str]] = None) -> List[str]:
+        const = const_labels or {}
+        names = tuple(const) + self.labels
+        with self._lock:
+            values = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(names, tuple(const.values()) + key)} {_format_value(value)}"
+            for key, value in values
+        ]
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS
+    ):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._series: Dict[LabelValues, Tuple[List[int], float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = tuple(str(labels[name]) for name in self.labels)
+        with self._lock:
+            counts, total = self._series.get(key) or ([0] * len(self.buckets), 0.0)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._series[key] = (counts, total + value)
+
+    def render(self, const_labels: Optional[Dict[str, str]] = None) -> List[str]:
+        const = const_labels or {}
+        names = tuple(const) + self.labels
+        with self._lock:
+            series = sorted((key, (list(counts), total)) for key, (counts, total) in self._series.items())
+        lines = []
+        for key, (counts, total) in series:
+            key = tuple(const.values()) + key
+            for bound, count in zip(self.buckets, counts):
+                le = _format_labels(names, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{le} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(names, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(names, key)} {counts[-1]}")
+        return lines
+
+
+class CaseMetrics:
+    """
+    Cost and timing of one case, stored in its agent_state under "metrics".
+
+    Starts from the metrics already on the state so totals accumulate across
+    nodes and runs.
+    """
+
+    def __init__(self, existing: Optional[Dict[str, Any]] = None):
+        self.data: Dict[str, Any] = {
+            "nodes": {},
+            "claude": {"calls": 0, "seconds": 0.0, **{field: 0 for field in USAGE_FIELDS}},
+            "lob": {"calls": 0, "seconds": 0.0},
+            "db": {"queries": 0, "seconds": 0.0}
+        }
+        if existing:
+            merge_case_metrics(self.data, existing)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return _rounded(copy.deepcopy(self.data))
+
+
+def merge_case_metrics(target: Dict[str, Any], other: Dict[str, Any]) -> Dict[str, Any]:
+    """Add the numbers in `other` into `target` (nested dicts merged key by key)."""
+    for key, value in other.items():
+        if isinstance(value, dict):
+            merge_case_metrics(target.setdefault(key, {}), value)
+        else:
+            target[key] = target.get(key, 0) + value
+    return target
+
+
+def _rounded(data: Dict[str, Any]) -> Dict[str, Any]:
+    for key, value in data.items():
+        if isinstance(value, dict):
+            _rounded(value)
+        elif isinstance(value, float):
+            data[key] = round(value, 6)
+    return data
+
+
+_current_case: ContextVar[Optional[CaseMetrics]] = ContextVar("current_case_metrics", default=None)
+
+
+@contextmanager
+def case_metrics(existing: Optional[Dict[str, Any]] = None) -> Iterator[CaseMetrics]:
+    """
+    Attribute Claude, Lob and DB work in this context to one case.
+
+    Context variables follow asyncio tasks and SQLAlchemy's greenlets, so
+    everything awaited inside the block is counted.
+    """
+    collected = CaseMetrics(existing)
+    token = _current_case.set(collected)
+    try:
+        yield collected
+    finally:
+        _current_case.reset(token)
+
+
+class AppMetrics:
+    """
+    Process-wide metrics, rendered in Prometheus text format at /metrics.
+
+    Every observation also goes to the case collector active in the current
+    context (see case_metrics), if any. Each worker process keeps its own
+    registry, so every series carries a worker label (the process id).
+    """
+
+    def __init__(self):
+        self.node_seconds = Histogram(
+            "agent_node_seconds", "Wall time of agent graph nodes.", ("node",)
+        )
+        self.claude_seconds = Histogram(
+            "claude_request_seconds", "Latency of Claude API calls.", ("kind",)
+        )
+        self.claude_tokens = Counter(
+            "claude_tokens_total",
+            "Claude tokens by call kind and type (input is the uncached part).",
+            ("kind", "type")
+        )
+        self.lob_seconds = Histogram(
+            "lob_request_seconds", "Latency of Lob API requests, per attempt.", ("method", "path", "status")
+        )
+        self.db_seconds = Histogram(
+            "db_query_seconds", "Database statement execution time.", ("operation",)
+        )
+        self._metrics = [
+            self.node_seconds,
+            self.claude_seconds,
+            self.claude_tokens,
+            self.lob_seconds,
+            self.db_seconds
+        ]
+
+    def observe_node(self, node: str, seconds: float) -> None:
+        self.node_seconds.observe(seconds, node=node)
+        current = _current_case.get()
+        if current is not None:
+            nodes = current.data["nodes"]
+            nodes[node] = nodes.get(node, 0.0) + seconds
+
+    def observe_claude(self, record: Dict[str, Any], seconds: float) -> None:
+        """Record a Claude call from its token_usage record."""
+        kind = record["kind"]
+        self.claude_seconds.observe(seconds, kind=kind)
+        for field in USAGE_FIELDS:
+            self.claude_tokens.inc(record[field], kind=kind, type=field[:-len("_tokens")])
+        current = _current_case.get()
+        if current is not None:
+            claude = current.data["claude"]
+            claude["calls"] += 1
+            claude["seconds"] += seconds
+            for field in USAGE_FIELDS:
+                claude[field] += record[field]
+
+    def observe_lob(self, method: str, path: str, status: Any, seconds: float) -> None:
+        self.lob_seconds.observe(seconds, method=method, path=path, status=status)
+        current = _current_case.get()
+        if current is not None:
+            current.data["lob"]["calls"] += 1
+            current.data["lob"]["seconds"] += seconds
+
+    def observe_db(self, statement: str, seconds: float) -> None:
+        words = statement.lstrip().split(None, 1)
+        operation = words[0].upper() if words else ""
+        self.db_seconds.observe(seconds, operation=operation if operation in DB_OPERATIONS else "OTHER")
+        current = _current_case.get()
+        if current is not None:
+            current.data["db"]["queries"] += 1
+            current.data["db"]["seconds"] += seconds
+
+    def instrument_engine(self, engine: Any) -> None:
+        """Time every statement run on a (sync) SQLAlchemy engine."""
+        from sqlalchemy import event
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def _start(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def _stop(conn, cursor, statement, parameters, context, executemany):
+            started = conn.info["query_started"].pop()
+            self.observe_db(statement, time.perf_counter() - started)
+
+        @event.listens_for(engine, "handle_error")
+        def _failed(exception_context):
+            # after_cursor_execute never fires for a failed statement
+            conn = exception_context.connection
+            if conn is not None and conn.info.get("query_started"):
+                started = conn.info["query_started"].pop()
+                self.observe_db(exception_context.statement or "", time.perf_counter() - started)
+
+    def render(self) -> str:
+        # Read at render time: workers fork after this module is imported
+        worker = {"worker": str(os.getpid())}
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render(worker))
+        return "\n".join(lines) + "\n"
+
+
+# Singleton registry
+metrics = AppMetrics()
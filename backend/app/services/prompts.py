@@ -0,0 +1,151 @@
+"""
+Prompt text for ClaudeService.
+
+Everything here is static and goes in the system prompt ahead of any case
+facts, so the provider can cache it: the statute corpus is shared by every
+call, and each task's instructions are shared by every call of that task.
+Case-specific facts go in the (small) user message that follows.
+
+Results come back as forced tool calls whose input schemas are generated
+from the pydantic models they are validated against.
+"""
+from app.models.schemas import AnalysisFindings, CasePackage, DemandLetterDraft
+from pydantic import BaseModel
+from typing import Any, Dict, Type
+
+STATUTE_CORPUS = """You are a Texas landlord-tenant law expert specializing in residential security deposit disputes under Texas Property Code Chapter 92, Subchapter C.
+
+REFERENCE: TEXAS PROPERTY CODE CHAPTER 92, SUBCHAPTER C (SECURITY DEPOSITS), SUMMARIZED
+
+§92.101 Application. The subchapter applies to all residential leases and security deposits.
+
+§92.102 Security Deposit. A security deposit is any advance of money, other than an advance payment of rent, that is intended primarily to secure performance under a lease of a dwelling that has been entered into by a landlord and a tenant.
+
+§92.103 Obligation to Refund.
+(a) The landlord shall refund a security deposit to the tenant on or before the 30th day after the date the tenant surrenders the premises.
+(b) A requirement that a tenant give advance notice of surrender as a condition for refunding the security deposit is effective only if the requirement is underlined or printed in conspicuous bold print in the lease.
+(c) A lease may not contain a provision that a tenant forfeits the deposit solely for failing to give advance notice of surrender unless the provision is underlined or printed in conspicuous bold print.
+
+§92.104 Retention of Security Deposit; Accounting.
+(a) Before returning a security deposit, the landlord may deduct from the deposit damages and charges for which the tenant is legally liable under the lease or as a result of breaching the lease.
+(b) The landlord may not retain any portion of a security deposit to cover normal wear and tear.
+(c) If the landlord retains all or part of a security deposit, the landlord shall give the tenant the balance of the deposit, if any, together with a written description and itemized list of all deductions. The landlord is not required to give the tenant a description and itemized list if the tenant owes rent when the tenant surrenders possession and there is no controversy concerning the amount of rent owed.
+
+§92.1041 Landlord's Burden of Proof. A landlord who does not provide the tenant with the written description and itemized list of deductions is presumed to have unlawfully withheld the deposit, unless the tenant owed undisputed rent at surrender.
+
+§92.107 Tenant's Forwarding Address.
+(a) The landlord is not obligated to return a tenant's security deposit or give the tenant a written description of damages and charges until the tenant gives the landlord a written statement of the tenant's forwarding address for the purpose of refunding the security deposit.
+(b) The tenant does not forfeit the right to a refund or to the description of damages and charges merely for failing to give a forwarding address.
+
+§92.108 Liability for Withholding Last Month's Rent.
+(a) The tenant may not withhold payment of any portion of the last month's rent on grounds that the security deposit is security for unpaid rent.
+(b) A tenant who in bad faith violates this section is liable to the landlord for three times the rent wrongfully withheld and the landlord's reasonable attorney's fees in a suit to recover the rent.
+
+§92.109 Liability of Landlord.
+(a) A landlord who in bad faith retains a security deposit in violation of this subchapter is liable for an amount equal to the sum of $100, three times the portion of the deposit wrongfully withheld, and the tenant's reasonable attorney's fees in a suit to recover the deposit.
+(b) A landlord who in bad faith does not provide a written description and itemization of damages and charges in violation of this subchapter forfeits the right to withhold any portion of the security deposit or to bring suit against the tenant for damages to the premises, and is liable for the tenant's reasonable attorney's fees in a suit to recover the deposit.
+(c) In a suit brought by a tenant under this subchapter, the landlord has the burden of proving that the retention of any portion of the security deposit was reasonable.
+(d) A landlord who fails either to return a security deposit or to provide a written description and itemization of deductions on or before the 30th day after the date the tenant surrenders possession is presumed to have acted in bad faith.
+
+§92.110 Cessation of Owner's Interest. A new owner who acquires the landlord's interest is bound by the security deposit obligations, and the prior owner remains liable until the new owner delivers a signed statement acknowledging receipt of the deposits.
+
+§92.111 Landlord's Duty in Case of Tenant's Death. Special refund procedures apply when the sole tenant of a dwelling dies.
+
+DAMAGES RULES (applied by our own calculator; never recompute them)
+- Base damages: the portion of the deposit withheld.
+- Treble damages: three times the portion wrongfully withheld (§92.109(a)).
+- Statutory penalty: $100 (§92.109(a)).
+- Bad faith is presumed when neither a refund nor an itemized accounting was provided within 30 days of surrender (§92.109(d)).
+- Attorney's fees are recoverable but are not part of the computed total."""
+
+ANALYSIS_INSTRUCTIONS = """TASK: STATUTORY COMPLIANCE ANALYSIS
+
+You are a precise legal analyst. You will receive the facts of one case, including damages that have already been calculated. Identify the statutory violations and explain the findings. Do not recalculate damages.
+
+Record the result by calling the record_analysis tool."""
+
+LETTER_INSTRUCTIONS = """TASK: DEMAND LETTER
+
+You are a professional Texas attorney drafting a demand letter for a security deposit dispute. You will receive the client and landlord details, the case facts, the legal analysis, and the computed damages.
+
+Draft a professional, firm demand letter demanding the full amount. The letter should:
+1. State the facts clearly
+2. Cite specific Texas Property Code sections violated
+3. Demand payment of the total demand within 7 days
+4. Reference potential small claims court action if not resolved
+5. Be formatted in proper business letter format with date
+
+Record the letter by calling the record_demand_letter tool. The HTML should be a complete professional letter with proper formatting, ready to be printed and mailed."""
+
+CASE_PACKAGE_INSTRUCTIONS = """TASK: STATUTORY ANALYSIS AND DEMAND LETTER
+
+You are a Texas attorney handling a security deposit dispute. You will receive the client and landlord details, the case facts, and damages that have already been calculated. In a single response:
+1. Identify the statutory violations and explain the findings. Do not recalculate damages.
+2. Draft a professional, firm demand letter demanding the full computed total. The letter should state the facts clearly, cite the specific Texas Property Code sections violated, demand payment within 7 days, reference potential small claims court action if not resolved, and be formatted in proper business letter format with date.
+
+Record both by calling the record_case_package tool. The letter HTML should be a complete professional letter with proper formatting, ready to be printed and mailed."""
+
+
+def cached_system(instructions: str) -> list:
+    """
+    System prompt blocks: the shared corpus, then the task instructions.
+
+    Both blocks carry a cache breakpoint. The corpus entry is reused by
+    every call of either task, and the corpus plus instructions entry by
+    every call of the same task.
+    """
+    return [
+        {"type": "text", "text": STATUTE_CORPUS, "cache_control": {"type": "ephemeral"}},
+        {"type": "text", "text": instructions, "cache_control": {"type": "ephemeral"}}
+    ]
+
+
+def tool_schema(model: Type[BaseModel]) -> Dict[str, Any]:
+    """
+    JSON schema for a tool's input, generated from a pydantic model.
+
+    Nested model references are inlined and titles dropped, leaving the
+    field types, descriptions and required lists Claude needs. The model's
+    own docstring is dropped too; the tool description covers it.
+    """
+    schema = model.model_json_schema()
+    defs = schema.pop("$defs", {})
+    schema.pop("description", None)
+
+    def inline(node: Any) -> Any:
+        if isinstance(node, dict):
+            if "$ref" in node:
+                return inline(defs[node["$ref"].rsplit("/", 1)[-1]])
+            return {
+                key: inline(value) for key, value in node.items()
+                if not (key == "title" and isinstance(value, str))
+            }
+        if isinstance(node, list):
+            return [inline(value) for value in node]
+        return node
+
+    return inline(schema)
+
+
+ANALYSIS_TOOL = {
+    "name": "record_analysis",
+    "description": "Record the statutory violations and summary for a case.",
+    "input_schema": tool_schema(AnalysisFindings)
+}
+
+LETTER_TOOL = {
+    "name": "record_demand_letter",
+    "description": "Record the drafted demand letter.",
+    "input_schema": tool_schema(DemandLetterDraft)
+}
+
+CASE_PACKAGE_TOOL = {
+    "name": "record_case_package",
+    "description": "Record the statutory analysis and demand letter for a case.",
+    "input_schema": tool_schema(CasePackage)
+}
+
+# Every request sends the same tool list (tool_choice picks one): tool
+# definitions precede the system prompt in the cached prefix, so per-task
+# lists would stop the corpus from being shared between tasks.
+TOOLS = [ANALYSIS_TOOL, LETTER_TOOL, CASE_PACKAGE_TOOL]
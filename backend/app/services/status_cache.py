@@ -0,0 +1,129 @@
+from app.config import settings
+from collections import OrderedDict
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+import asyncio
+import hashlib
+import json
+import time
+
+
+class CaseProgress(NamedTuple):
+    """The small status record polled while a case is analyzing."""
+
+    case_id: str
+    status: str
+    current_step: Optional[str] = None
+    error: Optional[str] = None
+
+    @property
+    def etag(self) -> str:
+        """Strong ETag over the record's content, the same in every worker."""
+        body = json.dumps(self, separators=(",", ":"))
+        return '"' + hashlib.sha256(body.encode("utf-8")).hexdigest()[:32] + '"'
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self._asdict()
+
+    @classmethod
+    def from_case(cls, case_id: Any, status: str, agent_state: Optional[Dict[str, Any]]) -> "CaseProgress":
+        agent_state = agent_state or {}
+        return cls(str(case_id), status, agent_state.get("current_step"), agent_state.get("error"))
+
+
+class StatusCache:
+    """
+    Process-local TTL cache of case progress records, with change notification.
+
+    Agent runs put a fresh record after every node; every other write to a
+    case's status invalidates its entry (see AsyncDatabaseService). Long-poll
+    handlers wait on a case and are woken by either. Entries expire after
+    the TTL so a case written by another worker process is re-read from the
+    database within that time.
+    """
+
+    def __init__(self, ttl_seconds: Optional[float] = None, max_entries: Optional[int] = None):
+        self.ttl_seconds = ttl_seconds or settings.STATUS_CACHE_TTL_SECONDS
+        self.max_entries = max_entries or settings.STATUS_CACHE_MAX_ENTRIES
+        self._entries: "OrderedDict[str, Tuple[float, CaseProgress]]" = OrderedDict()
+        self._waiters: Dict[str, List[Tuple[asyncio.AbstractEventLoop, asyncio.Event]]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, case_id: Any) -> Optional[CaseProgress]:
+        """Cached record for a case, or None if missing or expired."""
+        key = str(case_id)
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, progress = entry
+            if expires_at > time.monotonic():
+                self.hits += 1
+                return progress
+            self._entries.pop(key, None)
+        self.misses += 1
+        return None
+
+    def put(self, progress: CaseProgress) -> None:
+        """Store a record and wake anyone waiting on the case."""
+        self._store(progress)
+        self._notify(progress.case_id)
+
+    def fill(self, progress: CaseProgress) -> None:
+        """Cache a record read from the database, unless a writer got there first."""
+        entry = self._entries.get(progress.case_id)
+        if entry is None or entry[0] <= time.monotonic():
+            self._store(progress)
+
+    def invalidate(self, case_id: Any) -> None:
+        """Drop a case's record and wake its waiters so they re-read it."""
+        key = str(case_id)
+        self._entries.pop(key, None)
+        self._notify(key)
+
+    async def wait(self, case_id: Any, timeout: float) -> bool:
+        """
+        Wait until the case's record is replaced or invalidated.
+
+        Returns:
+            True if woken by a change, False on timeout
+        """
+        key = str(case_id)
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        self._waiters.setdefault(key, []).append(waiter)
+        try:
+            await asyncio.wait_for(waiter[1].wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            waiters = self._waiters.get(key, [])
+            if waiter in waiters:
+                waiters.remove(waiter)
+            if not waiters:
+                self._waiters.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "waiters": sum(len(waiters) for waiters in self._waiters.values()),
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+    def _store(self, progress: CaseProgress) -> None:
+        self._entries[progress.case_id] = (time.monotonic() + self.ttl_seconds, progress)
+        self._entries.move_to_end(progress.case_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _notify(self, key: str) -> None:
+        # Writers may run on another thread's loop (sync code, tests)
+        for loop, event in list(self._waiters.get(key, ())):
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                # Waiter's loop already closed
+                pass
+
+
+# Singleton cache shared by the agent runner, database service and routers
+status_cache = StatusCache()
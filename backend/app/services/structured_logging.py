@@ -0,0 +1,179 @@
+from app.config import settings
+from app.services.tracing import tracer
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Iterator, Optional
+import json
+import logging
+import queue
+import random
+import sys
+import zlib
+
+# Application loggers live under this name (logging.getLogger(__name__) in app modules)
+APP_LOGGER = "app"
+
+# LogRecord attributes that are not user-supplied `extra` fields
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+_log_context: ContextVar[Dict[str, Any]] = ContextVar("log_context", default={})
+
+
+@contextmanager
+def log_context(**fields: Any) -> Iterator[None]:
+    """
+    Attach fields (case_id, correlation_id, ...) to every record logged in
+    this context, including from tasks started inside it.
+    """
+    token = _log_context.set({**_log_context.get(), **{k: v for k, v in fields.items() if v is not None}})
+    try:
+        yield
+    finally:
+        _log_context.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """
+    Copy the log context and current trace ids onto the record.
+
+    Runs in the thread that logs, since context variables are not visible to
+    the queue listener.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        for key, value in _log_context.get().items():
+            setattr(record, key, value)
+        span = tracer.current_span()
+        if span is not None:
+            record.trace_id = span.trace_id
+            record.span_id = span.span_id
+        return True
+
+
+class DebugSampler(logging.Filter):
+    """
+    Keep a fraction of DEBUG records; other levels always pass.
+
+    Records with a correlation id are sampled per correlation id, so a case
+    run's debug output is kept or dropped as a whole.
+    """
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or self.rate >= 1:
+            return True
+        correlation_id = getattr(record, "correlation_id", None)
+        if correlation_id is None:
+            return random.random() < self.rate
+        return zlib.crc32(str(correlation_id).encode()) % 10000 < self.rate * 10000
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: timestamp, level, logger, message and fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Hand records to a bounded queue without blocking the caller.
+
+    Unlike QueueHandler, formatting is left to the listener thread; only the
+    message and traceback text are resolved here. When the queue is full the
+    record is dropped and counted rather than waited on.
+    """
+
+    def __init__(self, log_queue: "queue.Queue[logging.LogRecord]"):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_listener: Optional[QueueListener] = None
+_handler: Optional[NonBlockingQueueHandler] = None
+
+
+def configure_logging(
+    level: Optional[str] = None,
+    debug_sample_rate: Optional[float] = None,
+    queue_size: Optional[int] = None,
+    stream: Any = None
+) -> NonBlockingQueueHandler:
+    """
+    Route the app's loggers through a queue to a JSON handler on a background thread.
+
+    Args:
+        level: Minimum level (defaults to settings.LOG_LEVEL)
+        debug_sample_rate: Fraction of DEBUG records kept (defaults to settings.LOG_DEBUG_SAMPLE_RATE)
+        queue_size: Records buffered before new ones are dropped (defaults to settings.LOG_QUEUE_SIZE)
+        stream: Output stream (defaults to stdout)
+
+    Returns:
+        The queue handler, whose `dropped` count reports lost records
+    """
+    global _listener, _handler
+    shutdown_logging()
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JsonFormatter())
+
+    handler = NonBlockingQueueHandler(queue.Queue(queue_size or settings.LOG_QUEUE_SIZE))
+    handler.addFilter(ContextFilter())
+    handler.addFilter(DebugSampler(
+        settings.LOG_DEBUG_SAMPLE_RATE if debug_sample_rate is None else debug_sample_rate
+    ))
+
+    logger = logging.getLogger(APP_LOGGER)
+    logger.addHandler(handler)
+    logger.setLevel((level or settings.LOG_LEVEL).upper())
+    logger.propagate = False
+
+    _handler = handler
+    _listener = QueueListener(handler.queue, output, respect_handler_level=True)
+    _listener.start()
+    return handler
+
+
+def shutdown_logging() -> None:
+    """Flush queued records, stop the listener thread and detach the queue handler."""
+    global _listener, _handler
+    if _handler is not None:
+        logger = logging.getLogger(APP_LOGGER)
+        logger.removeHandler(_handler)
+        logger.propagate = True
+        _handler = None
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,86 @@
+from collections import deque
+from typing import Any, Deque, Dict, List
+
+# Usage fields reported by the Messages API. `input_tokens` counts only the
+# uncached part of the prompt; cache reads and writes are reported separately.
+USAGE_FIELDS = (
+    "input_tokens",
+    "cache_creation_input_tokens",
+    "cache_read_input_tokens",
+    "output_tokens",
+)
+
+
+def usage_record(kind: str, usage: Any) -> Dict[str, Any]:
+    """
+    Flatten a Messages API `usage` object into a per-call record.
+
+    Cache fields are missing from responses that used no cache breakpoints,
+    and may be None; both count as zero.
+    """
+    record: Dict[str, Any] = {"kind": kind}
+    for field in USAGE_FIELDS:
+        record[field] = getattr(usage, field, None) or 0
+    return record
+
+
+class TokenUsageTracker:
+    """
+    Running Claude token totals, split into cached and uncached input.
+
+    Keeps totals per call kind plus the most recent per-call records, so the
+    effect of prompt caching can be checked without provider dashboards.
+    """
+
+    def __init__(self, recent_size: int = 100):
+        self.totals: Dict[str, Dict[str, int]] = {}
+        self.recent: Deque[Dict[str, Any]] = deque(maxlen=recent_size)
+
+    def record(self, kind: str, usage: Any) -> Dict[str, Any]:
+        """
+        Add one call's usage to the totals.
+
+        Args:
+            kind: Call kind, e.g. "statutory_analysis"
+            usage: `usage` object from the API response
+
+        Returns:
+            The per-call record
+        """
+        record = usage_record(kind, usage)
+        totals = self.totals.setdefault(kind, {"calls": 0, **{field: 0 for field in USAGE_FIELDS}})
+        totals["calls"] += 1
+        for field in USAGE_FIELDS:
+            totals[field] += record[field]
+        self.recent.append(record)
+        return record
+
+    def reset(self) -> None:
+        self.totals.clear()
+        self.recent.clear()
+
+    @staticmethod
+    def cached_ratio(totals: Dict[str, int]) -> float:
+        """Share of prompt tokens served from the provider's cache."""
+        prompt = (
+            totals["input_tokens"]
+            + totals["cache_creation_input_tokens"]
+            + totals["cache_read_input_tokens"]
+        )
+        return totals["cache_read_input_tokens"] / prompt if prompt else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        """Totals per kind and overall, with cached input ratios."""
+        overall = {"calls": 0, **{field: 0 for field in USAGE_FIELDS}}
+        by_kind: Dict[str, Dict[str, Any]] = {}
+        for kind, totals in self.totals.items():
+            for field, value in totals.items():
+                overall[field] += value
+            by_kind[kind] = {**totals, "cached_input_ratio": self.cached_ratio(totals)}
+        recent: List[Dict[str, Any]] = list(self.recent)
+        return {
+            **overall,
+            "cached_input_ratio": self.cached_ratio(overall),
+            "by_kind": by_kind,
+            "recent": recent
+        }
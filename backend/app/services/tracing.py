@@ -0,0 +1,290 @@
+from app.config import settings
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional
+import functools
+import inspect
+import json
+import logging
+import os
+import queue
+import re
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class SpanContext(NamedTuple):
+    """Identifies a span across task boundaries (W3C trace-context ids)."""
+    trace_id: str
+    span_id: str
+
+
+class Span:
+    """
+    A timed operation in a trace, modelled on OpenTelemetry spans.
+
+    Ids are W3C trace-context hex strings, times are epoch nanoseconds, and
+    attribute names follow OpenTelemetry conventions where one exists
+    (`http.method`, `db.operation`).
+    """
+
+    def __init__(self, name: str, parent: Optional[SpanContext], attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent else None
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.status = "ok"
+        self.start_time = time.time_ns()
+        self.end_time: Optional[int] = None
+
+    @property
+    def context(self) -> SpanContext:
+        return SpanContext(self.trace_id, self.span_id)
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_attributes(self, attributes: Dict[str, Any]) -> None:
+        self.attributes.update(attributes)
+
+    def record_exception(self, error: BaseException) -> None:
+        self.status = "error"
+        self.attributes["exception.type"] = error.__class__.__name__
+        self.attributes["exception.message"] = str(error)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "duration_ms": round((self.end_time - self.start_time) / 1e6, 3) if self.end_time else None,
+            "status": self.status,
+            "attributes": self.attributes
+        }
+
+
+class ConsoleSpanExporter:
+    """Writes each finished span as a JSON line to stdout."""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+
+    def export(self, span: Span) -> None:
+        self.stream.write(json.dumps(span.to_dict(), default=str) + "\n")
+
+
+class FileSpanExporter:
+    """
+    Appends each finished span as a JSON line to a file, from a background thread.
+
+    export() only puts the span on a bounded queue, so ending a span on the
+    event loop never waits on the disk; the writer thread serializes queued
+    spans and appends them in batches. When the queue is full the span is
+    dropped and counted, like log records in structured_logging.
+    """
+
+    def __init__(self, path: str, queue_size: Optional[int] = None):
+        self.path = path
+        self.queue: "queue.Queue[Optional[Span]]" = queue.Queue(queue_size or settings.TRACING_QUEUE_SIZE)
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def export(self, span: Span) -> None:
+        if self._thread is None:
+            self._start()
+        try:
+            self.queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self) -> None:
+        """Block until every span queued so far has been written."""
+        if self._thread is not None:
+            self.queue.join()
+
+    def shutdown(self) -> None:
+        """Write the queued spans and stop the writer thread (restarted on next export)."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self.queue.put(None)
+            thread.join()
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._write, name="span-exporter", daemon=True)
+                self._thread.start()
+
+    def _write(self) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            while True:
+                batch = [self.queue.get()]
+                while True:
+                    try:
+                        batch.append(self.queue.get_nowait())
+                    except queue.Empty:
+                        break
+                spans = [span for span in batch if span is not None]
+                try:
+                    f.writelines(json.dumps(span.to_dict(), default=str) + "\n" for span in spans)
+                    f.flush()
+                except Exception as e:
+                    logger.warning("FileSpanExporter failed: %s", e)
+                finally:
+                    for _ in batch:
+                        self.queue.task_done()
+                if len(spans) < len(batch):
+                    return
+
+
+class InMemorySpanExporter:
+    """Keeps finished spans in a list (for tests)."""
+
+    def __init__(self):
+        self.spans: List[Span] = []
+
+    def export(self, span: Span) -> None:
+        self.spans.append(span)
+
+    def clear(self) -> None:
+        self.spans.clear()
+
+
+TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+
+def parse_traceparent(header: Optional[str]) -> Optional[SpanContext]:
+    """Parse a W3C `traceparent` header into a parent span context."""
+    match = TRACEPARENT.match((header or "").strip().lower())
+    return SpanContext(match.group(1), match.group(2)) if match else None
+
+
+def format_traceparent(context: SpanContext) -> str:
+    return f"00-{context.trace_id}-{context.span_id}-01"
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class Tracer:
+    """
+    Creates spans and hands finished ones to the configured exporters.
+
+    The current span lives in a context variable, so spans opened while
+    handling a request or running a graph node nest under it automatically,
+    across awaits. Work handed to another task carries its parent along as
+    a SpanContext (see current_context).
+    """
+
+    def __init__(self, exporters: Optional[List[Any]] = None):
+        self.exporters = list(exporters or [])
+
+    @classmethod
+    def from_settings(cls) -> "Tracer":
+        exporters = []
+        for name in (settings.TRACING_EXPORTERS or "").split(","):
+            name = name.strip().lower()
+            if name == "console":
+                exporters.append(ConsoleSpanExporter())
+            elif name == "file":
+                exporters.append(FileSpanExporter(settings.TRACING_FILE))
+            elif name:
+                raise ValueError(f"Unknown tracing exporter: {name}")
+        return cls(exporters)
+
+    def current_span(self) -> Optional[Span]:
+        return _current_span.get()
+
+    def current_context(self) -> Optional[SpanContext]:
+        span = _current_span.get()
+        return span.context if span else None
+
+    @contextmanager
+    def start_span(
+        self,
+        name: str,
+        attributes: Optional[Dict[str, Any]] = None,
+        parent: Optional[SpanContext] = None
+    ) -> Iterator[Span]:
+        """
+        Open a span as a child of `parent` or of the current span.
+
+        Exceptions leaving the block mark the span as an error and propagate.
+        """
+        span = Span(name, parent or self.current_context(), attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_exception(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            self.end(span)
+
+    def start_detached(self, name: str, attributes: Optional[Dict[str, Any]] = None) -> Span:
+        """Open a child span of the current span without making it current."""
+        return Span(name, self.current_context(), attributes)
+
+    def shutdown(self) -> None:
+        """Flush and stop exporters that write in the background."""
+        for exporter in self.exporters:
+            if hasattr(exporter, "shutdown"):
+                exporter.shutdown()
+
+    def end(self, span: Span) -> None:
+        span.end_time = time.time_ns()
+        for exporter in self.exporters:
+            try:
+                exporter.export(span)
+            except Exception as e:
+                logger.warning("%s failed: %s", exporter.__class__.__name__, e)
+
+
+# Singleton tracer, configured from TRACING_EXPORTERS
+tracer = Tracer.from_settings()
+
+
+def _traced(name: str, func: Any) -> Any:
+    signature = inspect.signature(func)
+
+    def attributes(args, kwargs) -> Dict[str, Any]:
+        if "case_id" not in signature.parameters:
+            return {}
+        bound = signature.bind_partial(*args, **kwargs).arguments
+        return {"case.id": str(bound["case_id"])} if "case_id" in bound else {}
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def run_async(*args, **kwargs):
+            with tracer.start_span(name, attributes(args, kwargs)):
+                return await func(*args, **kwargs)
+        return run_async
+
+    @functools.wraps(func)
+    def run(*args, **kwargs):
+        with tracer.start_span(name, attributes(args, kwargs)):
+            return func(*args, **kwargs)
+    return run
+
+
+def trace_methods(prefix: str):
+    """
+    Class decorator opening a `<prefix>.<method>` span around every public
+    static method, tagged with the case id when the method takes one.
+    """
+    def decorate(cls):
+        for attr, value in list(vars(cls).items()):
+            if isinstance(value, staticmethod) and not attr.startswith("_"):
+                setattr(cls, attr, staticmethod(_traced(f"{prefix}.{attr}", value.__func__)))
+        return cls
+    return decorate
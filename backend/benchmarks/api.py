@@ -0,0 +1,307 @@
+"""
+Load-test the case API and agent pipeline against local Anthropic and Lob stubs.
+
+Drives the app in-process (httpx ASGI transport, inside its lifespan) at
+each concurrency level and reports throughput and p50/p95/p99 latency as
+JSON for:
+
+- create_case: POST /api/cases/ (includes intake address verification)
+- list_cases:  GET /api/cases/
+- execute:     POST /execute until the case awaits approval
+- approve:     POST /approve until Lob has mailed the letter
+
+execute and approve are timed end to end, since both endpoints only queue
+work; their request latency alone is reported under "request". The stubs
+add a fixed delay per call and fail a seeded fraction of requests with the
+API's transient error, so retries show up in the numbers.
+
+With --baseline, p95 latency and throughput are compared against a stored
+report and the run exits non-zero on a regression beyond --tolerance.
+
+Usage (from backend/):
+    python -m benchmarks.api [--concurrency 1,4,16] [--requests 50] [--cases 8]
+        [--claude-latency 0.2] [--lob-latency 0.05] [--error-rate 0.02]
+        [--output results.json] [--baseline benchmarks/baselines/api.json]
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+FIXTURES = BACKEND_DIR / "benchmarks" / "fixtures" / "cases.json"
+BASELINE = BACKEND_DIR / "benchmarks" / "baselines" / "api.json"
+OPERATIONS = ("create_case", "list_cases", "execute", "approve")
+POLL_SECONDS = 0.02
+
+
+def case_payload(case: Dict[str, Any]) -> Dict[str, Any]:
+    """POST /api/cases/ body for a fixture case."""
+    def address(name: str, fields: Dict[str, Any]) -> Dict[str, Any]:
+        return {"name": name, "address_state": "TX", **fields}
+
+    return {
+        **case,
+        "tenant_address": address(case["tenant_name"], case["tenant_address"]),
+        "landlord_address": address(case["landlord_name"], case["landlord_address"]),
+        "evidence_urls": []
+    }
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Linearly interpolated percentile of sorted `values` (q in 0..1)."""
+    if not values:
+        return None
+    k = (len(values) - 1) * q
+    low = math.floor(k)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (k - low)
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+    """Throughput and latency percentiles (ms) of successful calls."""
+    values = sorted(latencies)
+
+    def ms(value: Optional[float]) -> Optional[float]:
+        return round(value * 1000, 2) if value is not None else None
+
+    return {
+        "requests": len(values) + errors,
+        "errors": errors,
+        "seconds": round(elapsed, 4),
+        "throughput_per_s": round(len(values) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": ms(percentile(values, 0.50)),
+        "p95_ms": ms(percentile(values, 0.95)),
+        "p99_ms": ms(percentile(values, 0.99)),
+        "mean_ms": ms(sum(values) / len(values) if values else None),
+        "max_ms": ms(values[-1] if values else None)
+    }
+
+
+async def run_concurrently(
+    items: Iterable[Any],
+    concurrency: int,
+    call: Callable[[Any], Awaitable[bool]]
+) -> Dict[str, Any]:
+    """Run `call` over `items` with `concurrency` clients; False or an exception is an error."""
+    pending = iter(items)
+    latencies: List[float] = []
+    errors = 0
+
+    async def client() -> None:
+        nonlocal errors
+        for item in pending:
+            started = time.perf_counter()
+            try:
+                ok = await call(item)
+            except Exception:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*[client() for _ in range(concurrency)])
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+async def wait_for_status(client, case_id: str, done: Set[str], timeout: float) -> bool:
+    """Poll the status endpoint until the case reaches `done` (True) or fails (False)."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        response = await client.get(f"/api/agent/cases/{case_id}/status")
+        status = response.json()["data"]["status"]
+        if status in done:
+            return True
+        if status == "error":
+            return False
+        await asyncio.sleep(POLL_SECONDS)
+    return False
+
+
+async def run_level(client, concurrency: int, args: argparse.Namespace, payloads: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Run every operation once at one concurrency level."""
+    results: Dict[str, Any] = {}
+    case_ids: List[str] = []
+
+    async def create(payload: Dict[str, Any]) -> bool:
+        response = await client.post("/api/cases/", json=payload)
+        if response.status_code != 201:
+            return False
+        case_ids.append(response.json()["data"]["id"])
+        return True
+
+    async def list_page(_: int) -> bool:
+        return (await client.get("/api/cases/", params={"limit": 20})).status_code == 200
+
+    def pipeline(path: str, body: Optional[Dict[str, Any]], done: Set[str], request_latencies: List[float]):
+        async def call(case_id: str) -> bool:
+            started = time.perf_counter()
+            response = await client.post(f"/api/agent/cases/{case_id}/{path}", json=body)
+            request_latencies.append(time.perf_counter() - started)
+            if response.status_code != 202:
+                return False
+            return await wait_for_status(client, case_id, done, args.timeout)
+        return call
+
+    results["create_case"] = await run_concurrently(
+        (payloads[i % len(payloads)] for i in range(max(args.requests, args.cases))), concurrency, create
+    )
+    results["list_cases"] = await run_concurrently(range(args.requests), concurrency, list_page)
+
+    targets = case_ids[:args.cases]
+    for name, path, body, done in (
+        ("execute", "execute", None, {"awaiting_approval"}),
+        ("approve", "approve", {"approved": True}, {"mailed"})
+    ):
+        request_latencies: List[float] = []
+        results[name] = await run_concurrently(
+            targets, concurrency, pipeline(path, body, done, request_latencies)
+        )
+        results[name]["request"] = {
+            key: value for key, value in summarize(request_latencies, 0, 0).items()
+            if key.endswith("_ms")
+        }
+    return results
+
+
+async def benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    import httpx
+    from app.database import init_db
+    from app.main import app
+
+    payloads = [case_payload(case) for case in json.loads(args.cases_file.read_text())]
+    transport = httpx.ASGITransport(app=app)
+    results: Dict[str, Dict[str, Any]] = {operation: {} for operation in OPERATIONS}
+
+    # Startup only checks the schema version, so migrate the scratch database first
+    init_db()
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=args.timeout) as client:
+            for concurrency in args.concurrency:
+                level = await run_level(client, concurrency, args, payloads)
+                for operation, summary in level.items():
+                    results[operation][str(concurrency)] = summary
+    return results
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> Dict[str, Any]:
+    """
+    Compare p95 latency and throughput with a baseline report.
+
+    A regression is a p95 more than `tolerance` above the baseline, or a
+    throughput more than `tolerance` below it, for the same operation and
+    concurrency.
+    """
+    def ratio(value: Optional[float], base: Optional[float]) -> Optional[float]:
+        return round(value / base, 4) if value is not None and base else None
+
+    operations: Dict[str, Dict[str, Any]] = {}
+    regressions = []
+    for operation, levels in report["results"].items():
+        for concurrency, current in levels.items():
+            base = baseline.get("results", {}).get(operation, {}).get(concurrency)
+            if base is None:
+                continue
+            p95_ratio = ratio(current["p95_ms"], base["p95_ms"])
+            throughput_ratio = ratio(current["throughput_per_s"], base["throughput_per_s"])
+            operations.setdefault(operation, {})[concurrency] = {
+                "p95_ratio": p95_ratio,
+                "throughput_ratio": throughput_ratio
+            }
+            if p95_ratio is not None and p95_ratio > 1 + tolerance:
+                regressions.append(f"{operation} @ {concurrency}: p95 {base['p95_ms']} -> {current['p95_ms']} ms")
+            if throughput_ratio is not None and throughput_ratio < 1 - tolerance:
+                regressions.append(
+                    f"{operation} @ {concurrency}: throughput "
+                    f"{base['throughput_per_s']} -> {current['throughput_per_s']}/s"
+                )
+            if current["errors"] > base["errors"]:
+                regressions.append(f"{operation} @ {concurrency}: errors {base['errors']} -> {current['errors']}")
+    return {"tolerance": tolerance, "operations": operations, "regressions": regressions}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--concurrency", type=lambda value: [int(n) for n in value.split(",")], default=[1, 4, 16],
+        help="comma-separated client counts"
+    )
+    parser.add_argument("--requests", type=int, default=50, help="create/list requests per level")
+    parser.add_argument("--cases", type=int, default=8, help="cases executed and approved per level")
+    parser.add_argument("--claude-latency", type=float, default=0.2, help="stub delay per Claude call, seconds")
+    parser.add_argument("--lob-latency", type=float, default=0.05, help="stub delay per Lob call, seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of stub calls that fail")
+    parser.add_argument("--seed", type=int, default=0, help="seed for injected stub failures")
+    parser.add_argument("--timeout", type=float, default=60.0, help="per-operation timeout, seconds")
+    parser.add_argument("--database-url", help="database to run against (default: a temporary SQLite file)")
+    parser.add_argument("--cases-file", type=Path, default=FIXTURES, help="fixture cases (JSON list)")
+    parser.add_argument("--output", type=Path, help="also write the JSON report to this file")
+    parser.add_argument("--baseline", type=Path, help=f"compare with a stored report (e.g. {BASELINE.relative_to(BACKEND_DIR)})")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative regression")
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(BACKEND_DIR))
+    sys.path.insert(0, str(BACKEND_DIR / "tests"))
+    from stub_servers import StubAnthropicServer, StubLobServer
+
+    workdir = tempfile.mkdtemp(prefix="depositguard-bench-")
+    stubs = {
+        "claude": StubAnthropicServer(latency=args.claude_latency, error_rate=args.error_rate, seed=args.seed),
+        "lob": StubLobServer(latency=args.lob_latency, error_rate=args.error_rate, seed=args.seed)
+    }
+    try:
+        with stubs["claude"] as claude, stubs["lob"] as lob:
+            # Settings are read at import, so the app is imported after this
+            os.environ.update({
+                "DATABASE_URL": args.database_url or f"sqlite:///{workdir}/benchmark.db",
+                "ANTHROPIC_API_KEY": "benchmark-key",
+                "LOB_API_KEY": "benchmark-key",
+                "CLAUDE_BASE_URL": claude.url,
+                "LOB_BASE_URL": f"{lob.url}/v1",
+                "LLM_CACHE_ENABLED": "false",
+                "LOG_LEVEL": os.environ.get("LOG_LEVEL", "ERROR")
+            })
+            results = asyncio.run(benchmark(args))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report: Dict[str, Any] = {
+        "benchmark": "api",
+        "config": {
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "cases": args.cases,
+            "claude_latency": args.claude_latency,
+            "lob_latency": args.lob_latency,
+            "error_rate": args.error_rate,
+            "database": "custom" if args.database_url else "sqlite"
+        },
+        "stubs": {
+            name: {"requests": stub.request_count, "injected_errors": stub.error_count}
+            for name, stub in stubs.items()
+        },
+        "results": results
+    }
+    if args.baseline:
+        report["comparison"] = compare(report, json.loads(args.baseline.read_text()), args.tolerance)
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(text + "\n")
+    if report.get("comparison", {}).get("regressions"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
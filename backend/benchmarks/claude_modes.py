@@ -0,0 +1,145 @@
+"""
+Compare the two-step and fused Claude drafting paths.
+
+Runs every fixture case through both paths and reports end-to-end latency
+and token usage as JSON. By default requests go to the local Anthropic stub
+from the test suite, with a fixed delay per call, which measures the cost
+of the extra round-trip and the tokens each layout sends. Pass --live to
+call the API configured in the environment instead.
+
+Usage (from backend/):
+    python -m benchmarks.claude_modes [--latency 0.5] [--live] [--output results.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Any, Dict, List
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+FIXTURES = BACKEND_DIR / "benchmarks" / "fixtures" / "cases.json"
+MODES = ("two_step", "fused")
+
+
+def load_cases(path: Path = FIXTURES) -> List[Dict[str, Any]]:
+    return json.loads(path.read_text())
+
+
+async def run_case(service, case_data: Dict[str, Any], mode: str) -> None:
+    from app.services.damages import calculate_damages
+    from decimal import Decimal
+    from datetime import date
+
+    damages = calculate_damages(
+        Decimal(str(case_data["withheld_amount"])), date.fromisoformat(case_data["move_out_date"])
+    )
+    if mode == "fused":
+        await service.draft_case_package(case_data, damages)
+    else:
+        analysis = await service.analyze_statutory_compliance(case_data, damages)
+        await service.generate_demand_letter(case_data, analysis)
+
+
+async def run_mode(mode: str, cases: List[Dict[str, Any]], base_url=None) -> Dict[str, Any]:
+    """Run all cases sequentially through one path with a fresh, uncached service."""
+    from app.services.claude_service import ClaudeService
+
+    service = ClaudeService(base_url=base_url, cache=None)
+    latencies = []
+    try:
+        started = time.perf_counter()
+        for case_data in cases:
+            case_started = time.perf_counter()
+            await run_case(service, case_data, mode)
+            latencies.append(time.perf_counter() - case_started)
+        total = time.perf_counter() - started
+    finally:
+        await service.aclose()
+
+    usage = service.usage.stats()
+    return {
+        "mode": mode,
+        "cases": len(cases),
+        "calls": usage["calls"],
+        "total_seconds": round(total, 4),
+        "mean_case_seconds": round(statistics.mean(latencies), 4),
+        "median_case_seconds": round(statistics.median(latencies), 4),
+        "tokens": {
+            "input": usage["input_tokens"],
+            "cache_read_input": usage["cache_read_input_tokens"],
+            "cache_creation_input": usage["cache_creation_input_tokens"],
+            "output": usage["output_tokens"]
+        },
+        "cached_input_ratio": round(usage["cached_input_ratio"], 4)
+    }
+
+
+def compare(results: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Fused relative to two-step (ratios below 1 mean the fused path is cheaper)."""
+    two_step, fused = results["two_step"], results["fused"]
+
+    def ratio(a: float, b: float) -> float:
+        return round(a / b, 4) if b else 0.0
+
+    def prompt_tokens(result: Dict[str, Any]) -> int:
+        tokens = result["tokens"]
+        return tokens["input"] + tokens["cache_read_input"] + tokens["cache_creation_input"]
+
+    return {
+        "latency_ratio": ratio(fused["total_seconds"], two_step["total_seconds"]),
+        "prompt_token_ratio": ratio(prompt_tokens(fused), prompt_tokens(two_step)),
+        "uncached_input_token_ratio": ratio(fused["tokens"]["input"], two_step["tokens"]["input"]),
+        "output_token_ratio": ratio(fused["tokens"]["output"], two_step["tokens"]["output"])
+    }
+
+
+async def benchmark(cases: List[Dict[str, Any]], latency: float, live: bool) -> Dict[str, Any]:
+    results = {}
+    for mode in MODES:
+        if live:
+            stub = nullcontext()
+        else:
+            from stub_servers import StubAnthropicServer
+            stub = StubAnthropicServer(latency=latency)
+        # A fresh stub per mode so each path starts with a cold prompt cache
+        with stub as server:
+            results[mode] = await run_mode(mode, cases, base_url=None if live else server.url)
+    return {
+        "target": "live" if live else f"stub (latency {latency}s per call)",
+        "results": results,
+        "comparison": compare(results)
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--latency", type=float, default=0.5, help="stub delay per Claude call, seconds")
+    parser.add_argument("--live", action="store_true", help="call the configured Claude API")
+    parser.add_argument("--cases", type=Path, default=FIXTURES, help="fixture cases (JSON list)")
+    parser.add_argument("--output", type=Path, help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(BACKEND_DIR))
+    if not args.live:
+        sys.path.insert(0, str(BACKEND_DIR / "tests"))
+        for name, value in (
+            ("DATABASE_URL", "sqlite:///./benchmark.db"),
+            ("ANTHROPIC_API_KEY", "benchmark-key"),
+            ("LOB_API_KEY", "benchmark-key")
+        ):
+            os.environ.setdefault(name, value)
+
+    report = asyncio.run(benchmark(load_cases(args.cases), args.latency, args.live))
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        args.output.write_text(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
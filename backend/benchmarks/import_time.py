@@ -0,0 +1,168 @@
+"""
+Measure how long importing the app takes, with and without building its providers.
+
+Each run imports the module in a fresh interpreter, without API keys set, and
+records the import time and which of the deferred packages (anthropic,
+langgraph) it loaded. The "eager" runs then build the Claude, Lob and agent
+graph providers straight away, which is what importing the app used to do;
+the difference between the two medians is the startup time saved by building
+them on first use.
+
+With --baseline, the lazy import time is compared against a stored report and
+the run exits non-zero if it regressed beyond --tolerance or a deferred
+package is imported again.
+
+Usage (from backend/):
+    python -m benchmarks.import_time [--module app.main] [--runs 10]
+        [--output results.json] [--baseline benchmarks/baselines/import_time.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+BASELINE = BACKEND_DIR / "benchmarks" / "baselines" / "import_time.json"
+MODES = ("lazy", "eager")
+
+# Packages only the providers need; importing the app must not load them
+DEFERRED_MODULES = ("anthropic", "langgraph", "langchain_core")
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+result = {{
+    "import_ms": (time.perf_counter() - started) * 1000,
+    "loaded": sorted(name for name in {deferred!r} if name in sys.modules),
+    "build_ms": {{}}
+}}
+if {eager!r}:
+    from app.providers import PROVIDER_NAMES, Providers
+    providers = Providers()
+    for name in PROVIDER_NAMES:
+        started = time.perf_counter()
+        getattr(providers, name)
+        result["build_ms"][name] = (time.perf_counter() - started) * 1000
+print(json.dumps(result))
+"""
+
+
+def probe(module: str, eager: bool, database_url: str) -> Dict[str, Any]:
+    """Import `module` in a fresh interpreter and report its timings."""
+    env = {
+        key: value for key, value in os.environ.items()
+        if key not in ("ANTHROPIC_API_KEY", "LOB_API_KEY")
+    }
+    env["DATABASE_URL"] = database_url
+    if eager:
+        # Building Claude and Lob needs keys; nothing is called
+        env.update({"ANTHROPIC_API_KEY": "benchmark-key", "LOB_API_KEY": "benchmark-key"})
+    completed = subprocess.run(
+        [sys.executable, "-c", PROBE.format(module=module, deferred=DEFERRED_MODULES, eager=eager)],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def summarize(samples: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Median/min/max import and build times over the runs of one mode."""
+    def stats(values: List[float]) -> Dict[str, float]:
+        return {
+            "median_ms": round(statistics.median(values), 2),
+            "min_ms": round(min(values), 2),
+            "max_ms": round(max(values), 2)
+        }
+
+    totals = [sample["import_ms"] + sum(sample["build_ms"].values()) for sample in samples]
+    summary = {
+        "import": stats([sample["import_ms"] for sample in samples]),
+        "total": stats(totals),
+        "loaded": sorted({name for sample in samples for name in sample["loaded"]})
+    }
+    builds = samples[0]["build_ms"]
+    if builds:
+        summary["build"] = {
+            name: stats([sample["build_ms"][name] for sample in samples]) for name in builds
+        }
+    return summary
+
+
+def run(module: str, runs: int) -> Dict[str, Any]:
+    """Alternate lazy and eager imports so both see the same machine load."""
+    samples: Dict[str, List[Dict[str, Any]]] = {mode: [] for mode in MODES}
+    with tempfile.TemporaryDirectory(prefix="depositguard-import-") as workdir:
+        database_url = f"sqlite:///{workdir}/benchmark.db"
+        # Warm-up: compile bytecode so the first timed run isn't penalized
+        probe(module, True, database_url)
+        for _ in range(runs):
+            for mode in MODES:
+                samples[mode].append(probe(module, mode == "eager", database_url))
+
+    results = {mode: summarize(samples[mode]) for mode in MODES}
+    lazy = results["lazy"]["total"]["median_ms"]
+    eager = results["eager"]["total"]["median_ms"]
+    results["reduction"] = {
+        "ms": round(eager - lazy, 2),
+        "ratio": round(1 - lazy / eager, 4) if eager else None
+    }
+    return results
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> Dict[str, Any]:
+    """
+    Compare the lazy import time with a baseline report.
+
+    A regression is a median lazy import more than `tolerance` above the
+    baseline, or a deferred package loaded by the import.
+    """
+    current = report["results"]["lazy"]
+    base = baseline.get("results", {}).get("lazy")
+    regressions = [f"import loads {name}" for name in current["loaded"]]
+    ratio = None
+    if base:
+        ratio = round(current["import"]["median_ms"] / base["import"]["median_ms"], 4)
+        if ratio > 1 + tolerance:
+            regressions.append(
+                f"import: median {base['import']['median_ms']} -> {current['import']['median_ms']} ms"
+            )
+    return {"tolerance": tolerance, "import_ratio": ratio, "regressions": regressions}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--module", default="app.main", help="module to import")
+    parser.add_argument("--runs", type=int, default=10, help="fresh interpreters per mode")
+    parser.add_argument("--output", type=Path, help="also write the JSON report to this file")
+    parser.add_argument("--baseline", type=Path, help=f"compare with a stored report (e.g. {BASELINE.relative_to(BACKEND_DIR)})")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative regression")
+    args = parser.parse_args()
+
+    report: Dict[str, Any] = {
+        "benchmark": "import_time",
+        "config": {"module": args.module, "runs": args.runs, "python": sys.version.split()[0]},
+        "results": run(args.module, args.runs)
+    }
+    if args.baseline:
+        report["comparison"] = compare(report, json.loads(args.baseline.read_text()), args.tolerance)
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(text + "\n")
+    if report.get("comparison", {}).get("regressions"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
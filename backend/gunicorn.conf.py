@@ -0,0 +1,39 @@
+"""
+gunicorn settings for multi-worker deployments behind gunicorn.
+
+    pip install gunicorn
+    gunicorn -c gunicorn.conf.py app.main:app
+
+`python -m app.serve` does the same with uvicorn alone. Worker count comes
+from WEB_CONCURRENCY (0 or unset = one per CPU, up to WEB_MAX_WORKERS).
+"""
+import os
+
+from app.config import settings
+from app.serve import check_workers, worker_count
+
+workers = worker_count(int(os.environ.get("WEB_CONCURRENCY", "0")))
+check_workers(workers)
+# Workers read this back through Settings to size their pools
+os.environ["WEB_CONCURRENCY"] = str(workers)
+
+worker_class = "uvicorn.workers.UvicornWorker"
+bind = os.environ.get("BIND", "0.0.0.0:8000")
+# Import the app in each worker, so database and HTTP pools are never shared across a fork
+preload_app = False
+# Agent jobs interrupted by a restart are re-queued by the next worker to start
+graceful_timeout = 30
+timeout = 120
+
+
+def post_fork(server, worker):
+    """
+    Re-read Settings in the new worker.
+
+    Importing app.serve above loaded Settings in the master before the
+    resolved WEB_CONCURRENCY was exported, and forked workers inherit that
+    object. Re-initializing it in place (modules hold references to it)
+    picks up the exported count, so per_worker() gives each worker its
+    share of the pools and rate limits rather than the whole of them.
+    """
+    settings.__init__()
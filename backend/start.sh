@@ -31,9 +31,9 @@ if grep -q "localhost:5432" .env; then
     sleep 3
 fi
 
-# Initialize database
-echo "🗄️  Initializing database..."
-python -c "from app.database import init_db; init_db()" 2>/dev/null || echo "Database already initialized"
+# Apply pending schema migrations (startup only checks the version)
+echo "🗄️  Migrating database..."
+python -m app.migrate upgrade
 
 # Start server
 echo "✅ Starting FastAPI server..."
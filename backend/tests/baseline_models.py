@@ -0,0 +1,71 @@
+"""
+The models as first released (before migrations), for upgrade tests.
+
+A copy of app/models/database.py from that release: the schema
+the app's create_all built on databases that migrations now have to adopt.
+It ran on PostgreSQL only, so JSONB is rendered as JSON on SQLite here.
+"""
+from sqlalchemy import Column, String, DECIMAL, Date, DateTime, Text, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.sql import func
+import uuid
+
+Base = declarative_base()
+
+
+@compiles(JSONB, "sqlite")
+def _jsonb_on_sqlite(type_, compiler, **kw):
+    return "JSON"
+
+
+class Case(Base):
+    """Main case table storing security deposit disputes."""
+    
+    __tablename__ = "cases"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    
+    # Party Information
+    tenant_name = Column(String(255), nullable=False)
+    landlord_name = Column(String(255), nullable=False)
+    
+    # Financial Information
+    deposit_amount = Column(DECIMAL(10, 2), nullable=False)
+    withheld_amount = Column(DECIMAL(10, 2), nullable=False)
+    
+    # Timeline
+    move_out_date = Column(Date, nullable=False)
+    
+    # Addresses (stored as JSONB)
+    tenant_address = Column(JSONB, nullable=False)
+    landlord_address = Column(JSONB, nullable=False)
+    
+    # Dispute Details
+    dispute_description = Column(Text, nullable=False)
+    evidence_urls = Column(JSONB, default=list)
+    
+    # Agent State
+    agent_state = Column(JSONB, default=dict)
+    status = Column(String(50), default="draft")  # draft, analyzing, awaiting_approval, mailed, error
+    
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class Checkpoint(Base):
+    """LangGraph checkpoint storage for agent state persistence."""
+    
+    __tablename__ = "checkpoints"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    case_id = Column(UUID(as_uuid=True), ForeignKey("cases.id", ondelete="CASCADE"), nullable=False)
+    
+    # LangGraph checkpoint data
+    checkpoint_data = Column(JSONB, nullable=False)
+    checkpoint_ns = Column(String(255))
+    
+    # Timestamp
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
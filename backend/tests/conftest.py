@@ -1,47 +1,75 @@
+import os
+import time
+from typing import Iterable, Optional
+
+# Test database URL (file-backed SQLite shared with the app engine)
+TEST_DATABASE_URL = "sqlite:///./test.db"
+
+os.environ.setdefault("DATABASE_URL", TEST_DATABASE_URL)
+os.environ.setdefault("ANTHROPIC_API_KEY", "test-anthropic-key")
+os.environ.setdefault("LOB_API_KEY", "test_lob_key")
+# Intake verification would call Lob; tests that need it enable it explicitly
+os.environ.setdefault("ADDRESS_VERIFICATION_ENABLED", "false")
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 from app.main import app
-from app.database import Base, get_db
+from app.database import get_async_db
+from app.migrations.runner import downgrade, upgrade
 from app.models.schemas import CaseCreate, AddressSchema
 from datetime import date
 from decimal import Decimal
 
-# Test database URL (in-memory SQLite)
-TEST_DATABASE_URL = "sqlite:///./test.db"
-
 engine = create_engine(TEST_DATABASE_URL, connect_args={"check_same_thread": False})
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_engine(
+    TEST_DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://"),
+    poolclass=NullPool
+)
+TestingAsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 
 @pytest.fixture(scope="function")
 def db_session():
-    """Create test database session."""
-    Base.metadata.create_all(bind=engine)
+    """Create test database session on a freshly migrated schema."""
+    upgrade(engine)
     db = TestingSessionLocal()
     try:
         yield db
     finally:
         db.close()
-        Base.metadata.drop_all(bind=engine)
+        downgrade(engine, "base")
 
 
 @pytest.fixture(scope="function")
 def client(db_session):
     """Create test client with overridden database dependency."""
-    def override_get_db():
-        try:
-            yield db_session
-        finally:
-            pass
+    async def override_get_async_db():
+        async with TestingAsyncSessionLocal() as session:
+            yield session
     
-    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
     with TestClient(app) as test_client:
         yield test_client
     app.dependency_overrides.clear()
 
 
+@pytest.fixture
+def providers(client):
+    """The running app's provider container; swap its services with monkeypatch.setattr."""
+    return client.app.state.providers
+
+
 @pytest.fixture
 def sample_case_data():
     """Sample case data for testing."""
@@ -69,3 +97,101 @@ def sample_case_data():
         dispute_description="Landlord withheld full deposit without providing itemized deductions within 30 days of move-out.",
         evidence_urls=[]
     )
+
+
+@pytest.fixture
+def create_case(client, sample_case_data):
+    """Create a case from sample_case_data through the API; returns a callable giving its id."""
+    def create() -> str:
+        response = client.post("/api/cases/", json=sample_case_data.model_dump(mode="json"))
+        assert response.status_code == 201, response.text
+        return response.json()["data"]["id"]
+    return create
+
+
+@pytest.fixture
+def wait_for_status(client):
+    """
+    Poll a case's status endpoint; returns a callable giving the last status payload.
+    
+    The callable waits until the case reaches one of `statuses`, or, when
+    none are given, until its agent job has finished.
+    """
+    def wait(case_id: str, statuses: Optional[Iterable[str]] = None, timeout: float = 10.0) -> dict:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            data = client.get(f"/api/agent/cases/{case_id}/status").json()["data"]
+            if statuses is not None:
+                if data["status"] in statuses:
+                    return data
+            elif data["job"] and data["job"]["status"] in ("succeeded", "failed"):
+                return data
+            time.sleep(0.05)
+        raise AssertionError(f"Case {case_id} never reached {statuses or 'a finished job'}")
+    return wait
+
+
+@pytest.fixture
+def fake_agent_services(providers, monkeypatch):
+    """
+    Replace Claude and Lob calls with canned responses.
+    
+    Returns a dict of call counters keyed by service method name.
+    """
+    from app.models.schemas import (
+        StatutoryAnalysis,
+        ViolationFinding,
+        DemandLetterDraft,
+        MailingResult
+    )
+    
+    calls = {"analyze": 0, "generate": 0, "mail": 0, "mailed_html": []}
+    
+    async def fake_analyze(case_data, damages=None):
+        calls["analyze"] += 1
+        calls["damages"] = damages
+        return StatutoryAnalysis(
+            violations=[
+                ViolationFinding(
+                    statute="Texas Property Code §92.103",
+                    violation_type="Late refund",
+                    description="No refund or itemized accounting within 30 days",
+                    damages_applicable=True
+                )
+            ],
+            days_elapsed=case_data["days_elapsed"],
+            is_compliant=False,
+            base_damages=Decimal("1500.00"),
+            treble_damages=Decimal("4500.00"),
+            statutory_penalty=Decimal("100.00"),
+            total_damages=Decimal("6100.00"),
+            summary="Landlord failed to return the deposit."
+        )
+    
+    async def fake_generate(case_data, analysis, on_text=None, refresh=False):
+        calls["generate"] += 1
+        return DemandLetterDraft(
+            letter_html="<p>Generated demand letter</p>",
+            letter_text="Generated demand letter",
+            citations=["Texas Property Code §92.103"]
+        )
+    
+    async def fake_send(
+        to_address,
+        from_address,
+        letter_html,
+        description="Security Deposit Demand Letter",
+        idempotency_key=None
+    ):
+        calls["mail"] += 1
+        calls["mailed_html"].append(letter_html)
+        return MailingResult(
+            lob_id="ltr_test123",
+            tracking_url="https://lob.test/track/ltr_test123",
+            expected_delivery=date(2025, 1, 10)
+        )
+    
+    monkeypatch.setattr(providers.claude, "analyze_statutory_compliance", fake_analyze)
+    monkeypatch.setattr(providers.claude, "generate_demand_letter", fake_generate)
+    monkeypatch.setattr(providers.lob, "send_certified_letter", fake_send)
+    return calls
@@ -0,0 +1,337 @@
+"""Local HTTP stand-ins for external APIs used by load and integration tests."""
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Tuple
+
+
+ANALYSIS_RESPONSE = {
+    "violations": [
+        {
+            "statute": "Texas Property Code §92.103",
+            "violation_type": "Late refund",
+            "description": "No refund or itemized accounting within 30 days",
+            "damages_applicable": True
+        }
+    ],
+    "summary": "Landlord failed to return the deposit or provide an accounting."
+}
+
+LETTER_RESPONSE = {
+    "letter_html": "<p>Stub demand letter</p>",
+    # Newlines, quotes and non-ASCII arrive as JSON escapes when streamed
+    "letter_text": "Stub demand letter\n\nUnder \"§92.109\" you owe $4,600 📬",
+    "citations": ["Texas Property Code §92.103"]
+}
+
+
+class StubHTTPError(Exception):
+    """Raised from `respond` to send an error status instead of a 200."""
+    
+    def __init__(self, status: int, body: Dict[str, Any], headers: Dict[str, str] = None):
+        super().__init__(status)
+        self.status = status
+        self.body = body
+        self.headers = headers or {}
+
+
+class StubServer:
+    """
+    Threaded HTTP server with configurable latency and error rate.
+
+    Tracks request count and the peak number of requests in flight, which
+    is what concurrency tests assert on. A fraction `error_rate` of requests
+    fails with the API's TRANSIENT_ERROR (drawn from a seeded RNG, so runs
+    are repeatable).
+    """
+
+    # (status, body) returned for injected transient failures
+    TRANSIENT_ERROR: Tuple[int, Dict[str, Any]] = (503, {"error": {"message": "injected outage"}})
+
+    def __init__(self, latency: float = 0.0, error_rate: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_count = 0
+        self._random = random.Random(seed)
+        self.request_count = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def respond(self, path: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the JSON response for a request; overridden per API."""
+        raise NotImplementedError
+
+    def respond_stream(self, path: str, body: Dict[str, Any]) -> List[Tuple[str, Dict[str, Any]]]:
+        """Build the SSE events for a streaming request; overridden per API."""
+        raise NotImplementedError
+
+    def _maybe_fail(self) -> None:
+        with self._lock:
+            failed = self.error_rate and self._random.random() < self.error_rate
+            if failed:
+                self.error_count += 1
+        if failed:
+            status, body = self.TRANSIENT_ERROR
+            raise StubHTTPError(status, body)
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                with stub._lock:
+                    stub.request_count += 1
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                status, extra_headers = 200, {}
+                try:
+                    time.sleep(stub.latency)
+                    stub._maybe_fail()
+                    if body.get("stream"):
+                        events = stub.respond_stream(self.path, body)
+                    else:
+                        payload = json.dumps(stub.respond(self.path, body, dict(self.headers))).encode()
+                except StubHTTPError as e:
+                    status, extra_headers = e.status, e.headers
+                    payload = json.dumps(e.body).encode()
+                finally:
+                    with stub._lock:
+                        stub.in_flight -= 1
+
+                if body.get("stream") and status == 200:
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/event-stream")
+                    self.end_headers()
+                    for event, data in events:
+                        self.wfile.write(f"event: {event}\ndata: {json.dumps(data)}\n\n".encode())
+                        self.wfile.flush()
+                    return
+
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in extra_headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self) -> "StubServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class StubAnthropicServer(StubServer):
+    """
+    Minimal Anthropic Messages API returning canned analysis/letter results.
+
+    Forced tool calls get the canned fields their tool's schema asks for.
+    Entries in `faults` are consumed one per tool call and merged into its
+    input, to simulate malformed output (e.g. {"citations": "§92.103"}).
+    Request bodies are kept in `requests`.
+
+    Mimics prompt caching in the reported usage: tools and system blocks up
+    to a `cache_control` breakpoint are a cacheable prefix, written on first
+    sight and read afterwards. Tokens are estimated as characters / 4.
+    """
+
+    # Characters per streamed text / JSON delta
+    CHUNK_SIZE = 16
+
+    TRANSIENT_ERROR = (529, {"type": "error", "error": {"type": "overloaded_error", "message": "Overloaded"}})
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        faults: List[Dict[str, Any]] = None,
+        error_rate: float = 0.0,
+        seed: int = 0
+    ):
+        super().__init__(latency, error_rate, seed)
+        self.faults = list(faults or [])
+        self.requests: List[Dict[str, Any]] = []
+        self.cached_prefixes: Dict[str, int] = {}
+
+    def _usage(self, body: Dict[str, Any]) -> Dict[str, int]:
+        # Not exact: with a cache breakpoint only in the system prompt, a
+        # prefix also covers the tool list, so tool changes miss the cache.
+        system = body.get("system") or []
+        if isinstance(system, str):
+            system = [{"type": "text", "text": system}]
+        # Tool definitions come first in the cached prefix
+        prefixes, text = [], json.dumps(body["tools"]) if body.get("tools") else ""
+        for block in system:
+            text += block["text"]
+            if block.get("cache_control"):
+                prefixes.append(text)
+        cacheable = prefixes[-1] if prefixes else ""
+        with self._lock:
+            read = max((len(p) for p in prefixes if p in self.cached_prefixes), default=0)
+            for prefix in prefixes:
+                self.cached_prefixes[prefix] = len(prefix)
+        uncached = text[len(cacheable):] + json.dumps(body["messages"])
+        return {
+            "input_tokens": len(uncached) // 4,
+            "cache_creation_input_tokens": (len(cacheable) - read) // 4,
+            "cache_read_input_tokens": read // 4,
+            "output_tokens": 50
+        }
+
+    def _content(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            self.requests.append(body)
+            fault = self.faults.pop(0) if self.faults and body.get("tools") else {}
+        if not body.get("tools"):
+            prompt = body["messages"][-1]["content"]
+            result = LETTER_RESPONSE if "demand letter" in prompt else ANALYSIS_RESPONSE
+            return {"type": "text", "text": json.dumps(result)}
+        tool = next(t for t in body["tools"] if t["name"] == body["tool_choice"]["name"])
+        fields = {**ANALYSIS_RESPONSE, **LETTER_RESPONSE}
+        return {
+            "type": "tool_use",
+            "id": f"toolu_stub_{self.request_count}",
+            "name": tool["name"],
+            "input": {
+                **{name: fields[name] for name in tool["input_schema"]["properties"] if name in fields},
+                **fault
+            }
+        }
+
+    def _message(self, body: Dict[str, Any], content: List[Dict[str, Any]], stop_reason: str) -> Dict[str, Any]:
+        return {
+            "id": f"msg_stub_{self.request_count}",
+            "type": "message",
+            "role": "assistant",
+            "model": body["model"],
+            "content": content,
+            "stop_reason": stop_reason,
+            "stop_sequence": None,
+            "usage": self._usage(body)
+        }
+
+    def respond(self, path: str, body: Dict[str, Any], headers: Dict[str, str]) -> Dict[str, Any]:
+        content = self._content(body)
+        return self._message(body, [content], "tool_use" if content["type"] == "tool_use" else "end_turn")
+
+    def respond_stream(self, path: str, body: Dict[str, Any]) -> List[Tuple[str, Dict[str, Any]]]:
+        content = self._content(body)
+        if content["type"] == "tool_use":
+            text, stop_reason = json.dumps(content["input"]), "tool_use"
+            start = {**content, "input": {}}
+            delta = lambda chunk: {"type": "input_json_delta", "partial_json": chunk}
+        else:
+            text, stop_reason = content["text"], "end_turn"
+            start = {"type": "text", "text": ""}
+            delta = lambda chunk: {"type": "text_delta", "text": chunk}
+        message = self._message(body, [], None)
+        events = [
+            ("message_start", {"type": "message_start", "message": message}),
+            ("content_block_start", {"type": "content_block_start", "index": 0, "content_block": start})
+        ]
+        for i in range(0, len(text), self.CHUNK_SIZE):
+            events.append(("content_block_delta", {
+                "type": "content_block_delta",
+                "index": 0,
+                "delta": delta(text[i:i + self.CHUNK_SIZE])
+            }))
+        events += [
+            ("content_block_stop", {"type": "content_block_stop", "index": 0}),
+            ("message_delta", {
+                "type": "message_delta",
+                "delta": {"stop_reason": stop_reason, "stop_sequence": None},
+                "usage": {"output_tokens": 50}
+            }),
+            ("message_stop", {"type": "message_stop"})
+        ]
+        return events
+
+
+class StubLobServer(StubServer):
+    """
+    Minimal Lob API with fault injection.
+    
+    Bulk US verifications echo the address back upper-cased. Letters honour
+    the Idempotency-Key header like Lob does: a repeated key returns the
+    letter created the first time. Entries in `faults` are consumed one per
+    letter request: an HTTP status (e.g. 500, 429) fails the request, and
+    "timeout" creates the letter but answers only after `hang_seconds`.
+    """
+    
+    def __init__(
+        self,
+        latency: float = 0.0,
+        faults: List[Any] = None,
+        hang_seconds: float = 1.0,
+        error_rate: float = 0.0,
+        seed: int = 0
+    ):
+        super().__init__(latency, error_rate, seed)
+        self.faults = list(faults or [])
+        self.hang_seconds = hang_seconds
+        self.verified_addresses: List[Dict[str, Any]] = []
+        self.letters: Dict[str, Dict[str, Any]] = {}
+        self.letter_requests = 0
+    
+    def respond(self, path: str, body: Dict[str, Any], headers: Dict[str, str]) -> Dict[str, Any]:
+        if path == "/v1/bulk/us_verifications":
+            self.verified_addresses.extend(body["addresses"])
+            return {"addresses": [self._verification(address) for address in body["addresses"]]}
+        if path == "/v1/letters":
+            return self._create_letter(body, headers.get("Idempotency-Key"))
+        raise StubHTTPError(404, {"error": {"message": f"Unknown path {path}"}})
+    
+    def _create_letter(self, body: Dict[str, Any], idempotency_key: str) -> Dict[str, Any]:
+        with self._lock:
+            self.letter_requests += 1
+            fault = self.faults.pop(0) if self.faults else None
+        if isinstance(fault, int):
+            headers = {"Retry-After": "0"} if fault == 429 else {}
+            raise StubHTTPError(fault, {"error": {"message": "injected failure"}}, headers)
+        
+        key = idempotency_key or f"anonymous-{len(self.letters)}"
+        with self._lock:
+            letter = self.letters.setdefault(key, {
+                "id": f"ltr_stub{len(self.letters)}",
+                "description": body["description"],
+                "expected_delivery_date": "2025-01-10",
+                "tracking_events": [{"url": f"https://lob.example/track/{len(self.letters)}"}]
+            })
+        if fault == "timeout":
+            time.sleep(self.hang_seconds)
+        return letter
+    
+    @staticmethod
+    def _verification(address: Dict[str, Any]) -> Dict[str, Any]:
+        if "NOWHERE" in address["primary_line"].upper():
+            return {"deliverability": "undeliverable", "primary_line": "", "components": {}}
+        return {
+            "deliverability": "deliverable",
+            "primary_line": address["primary_line"].upper(),
+            "secondary_line": address["secondary_line"].upper(),
+            "components": {
+                "city": address["city"].upper(),
+                "state": address["state"].upper(),
+                "zip_code": address["zip_code"]
+            }
+        }
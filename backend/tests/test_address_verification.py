@@ -0,0 +1,113 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.providers import Providers
+from app.services.address_verification import address_key, address_verifier, normalize_address
+from app.services.lob_service import LobService
+from stub_servers import StubLobServer
+
+
+@pytest.fixture
+def stub_lob(db_session):
+    """A local stub Lob server."""
+    with StubLobServer() as server:
+        yield server
+
+
+@pytest.fixture
+def lob_providers(stub_lob):
+    """Provider container that verifies addresses with the stub Lob server."""
+    container = Providers()
+    container.lob = LobService(api_key="test_lob_key", base_url=f"{stub_lob.url}/v1")
+    return container
+
+
+@pytest.fixture
+def app_lob(stub_lob, providers, monkeypatch):
+    """Point the running app's address verification at the stub Lob server."""
+    monkeypatch.setattr(providers, "lob", LobService(api_key="test_lob_key", base_url=f"{stub_lob.url}/v1"))
+
+
+def _address(line1: str = "456 Business Blvd", **overrides) -> dict:
+    return {
+        "name": "Property Manager",
+        "address_line1": line1,
+        "address_line2": None,
+        "address_city": "Austin",
+        "address_state": "TX",
+        "address_zip": "78702",
+        **overrides
+    }
+
+
+def test_normalize_address_folds_formatting():
+    """Test spelling variants of one address share a key and names are ignored."""
+    variants = [
+        _address("456 Business Boulevard"),
+        _address("456  business blvd.", name="Other Name", address_city="AUSTIN"),
+        _address("456 Business Blvd", address_state="tx", address_zip="78702-1234"),
+    ]
+    assert len({address_key(normalize_address(address)) for address in variants}) == 1
+    assert normalize_address(variants[0])["address_line1"] == "456 BUSINESS BLVD"
+
+
+def test_verify_many_dedupes_and_caches(stub_lob, lob_providers):
+    """Test duplicates collapse to one Lob lookup and repeats hit the cache."""
+    addresses = [_address("456 Business Boulevard"), _address("456 business blvd.")] * 5
+    addresses.append(_address("1 Nowhere Rd"))
+    
+    results = asyncio.run(address_verifier.verify_many(addresses, lob_providers))
+    assert stub_lob.request_count == 1
+    assert len(stub_lob.verified_addresses) == 2
+    assert sorted(result["deliverability"] for result in results.values()) == ["deliverable", "undeliverable"]
+    
+    asyncio.run(address_verifier.verify_many(addresses + [_address("789 Oak Ave")], lob_providers))
+    assert stub_lob.request_count == 2
+    assert len(stub_lob.verified_addresses) == 3
+
+
+def test_resolve_uses_cache_only(stub_lob, lob_providers):
+    """Test mailing gets the corrected address from the cache without calling Lob."""
+    original = _address("456 business blvd")
+    assert asyncio.run(address_verifier.resolve(original)) == original
+    assert stub_lob.request_count == 0
+    
+    asyncio.run(address_verifier.verify_many([original, _address("1 Nowhere Rd")], lob_providers))
+    resolved = asyncio.run(address_verifier.resolve(original))
+    assert resolved["name"] == "Property Manager"
+    assert resolved["address_line1"] == "456 BUSINESS BLVD"
+    assert asyncio.run(address_verifier.resolve(_address("1 Nowhere Rd")))["address_line1"] == "1 Nowhere Rd"
+    assert stub_lob.request_count == 1
+
+
+def test_import_preverifies_addresses(client: TestClient, sample_case_data, stub_lob, app_lob, monkeypatch):
+    """Test imported cases are verified in one deduplicated background batch."""
+    monkeypatch.setattr(settings, "ADDRESS_VERIFICATION_ENABLED", True)
+    body = "\n".join(sample_case_data.model_dump_json() for _ in range(10))
+    
+    response = client.post("/api/cases/import", content=body)
+    assert response.json()["data"]["imported"] == 10
+    
+    # One tenant and one landlord address across all ten cases
+    assert stub_lob.request_count == 1
+    assert len(stub_lob.verified_addresses) == 2
+    
+    client.post("/api/cases/", json=sample_case_data.model_dump(mode="json"))
+    assert stub_lob.request_count == 1
+
+
+def test_update_reverifies_changed_addresses(client: TestClient, sample_case_data, stub_lob, app_lob, monkeypatch):
+    """Test PATCHing an address verifies the new one, and other edits don't call Lob."""
+    monkeypatch.setattr(settings, "ADDRESS_VERIFICATION_ENABLED", True)
+    case_id = client.post("/api/cases/", json=sample_case_data.model_dump(mode="json")).json()["data"]["id"]
+    assert stub_lob.request_count == 1
+    
+    client.patch(f"/api/cases/{case_id}", json={"tenant_name": "Jane Q. Tenant"})
+    assert stub_lob.request_count == 1
+    
+    client.patch(f"/api/cases/{case_id}", json={"landlord_address": _address("789 Oak Ave")})
+    assert stub_lob.request_count == 2
+    assert len(stub_lob.verified_addresses) == 3
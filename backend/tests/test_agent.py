@@ -0,0 +1,125 @@
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture
+def execute(client: TestClient, wait_for_status):
+    """Queue the agent for a case and wait for its job to finish."""
+    def run(case_id: str) -> dict:
+        response = client.post(f"/api/agent/cases/{case_id}/execute")
+        assert response.status_code == 202, response.text
+        return wait_for_status(case_id)
+    return run
+
+
+def test_execute_returns_job_immediately(
+    client: TestClient, create_case, wait_for_status, fake_agent_services
+):
+    """Test execution is queued and answered with 202 and a job id."""
+    case_id = create_case()
+    
+    response = client.post(f"/api/agent/cases/{case_id}/execute")
+    assert response.status_code == 202
+    data = response.json()["data"]
+    assert data["status"] == "queued"
+    
+    job = client.get(f"/api/agent/jobs/{data['job_id']}").json()["data"]
+    assert job["case_id"] == case_id
+    wait_for_status(case_id)
+
+
+def test_execute_stops_at_approval_gate(create_case, execute, fake_agent_services):
+    """Test execution runs research and generation, then pauses before mailing."""
+    case_id = create_case()
+    
+    data = execute(case_id)
+    assert data["status"] == "awaiting_approval"
+    assert data["current_step"] == "awaiting_approval"
+    assert data["job"]["status"] == "succeeded"
+    assert data["agent_state"]["needs_approval"] is True
+    assert fake_agent_services["damages"].bad_faith_presumed is True
+    assert fake_agent_services["analyze"] == 1
+    assert fake_agent_services["generate"] == 1
+    assert fake_agent_services["mail"] == 0
+
+
+def test_approve_resumes_at_mail_node(
+    client: TestClient, create_case, execute, wait_for_status, fake_agent_services
+):
+    """Test approval mails the approved draft without re-running Claude."""
+    case_id = create_case()
+    execute(case_id)
+    
+    response = client.post(
+        f"/api/agent/cases/{case_id}/approve",
+        json={"approved": True, "edited_letter_html": "<p>Edited letter</p>"}
+    )
+    assert response.status_code == 202
+    assert response.json()["data"]["status"] == "mail_queued"
+    
+    status = wait_for_status(case_id, ("mailed", "error"))
+    assert status["status"] == "mailed"
+    assert status["agent_state"]["lob_mail_id"] == "ltr_test123"
+    assert status["mail"]["status"] == "sent"
+    assert status["agent_state"]["demand_letter_draft"]["letter_html"] == "<p>Generated demand letter</p>"
+    
+    # Research and generation ran exactly once, during execute
+    assert fake_agent_services["analyze"] == 1
+    assert fake_agent_services["generate"] == 1
+    assert fake_agent_services["mailed_html"] == ["<p>Edited letter</p>"]
+
+
+def test_approve_without_checkpoint_uses_stored_state(
+    client: TestClient, create_case, execute, wait_for_status, fake_agent_services, providers
+):
+    """Test approval still skips research/generation when no checkpoint exists."""
+    case_id = create_case()
+    execute(case_id)
+    providers.graph.checkpointer.delete_thread(case_id)
+    
+    response = client.post(f"/api/agent/cases/{case_id}/approve", json={"approved": True})
+    assert response.status_code == 202
+    assert wait_for_status(case_id, ("mailed", "error"))["status"] == "mailed"
+    assert fake_agent_services["analyze"] == 1
+    assert fake_agent_services["generate"] == 1
+    assert fake_agent_services["mailed_html"] == ["<p>Generated demand letter</p>"]
+
+
+def test_reject_returns_case_to_draft(client: TestClient, create_case, execute, fake_agent_services):
+    """Test rejection does not mail the letter."""
+    case_id = create_case()
+    execute(case_id)
+    
+    response = client.post(f"/api/agent/cases/{case_id}/approve", json={"approved": False})
+    assert response.status_code == 200
+    assert fake_agent_services["mail"] == 0
+    assert client.get(f"/api/cases/{case_id}").json()["data"]["status"] == "draft"
+
+
+def test_execute_conflicts_while_job_active(
+    client: TestClient, create_case, wait_for_status, fake_agent_services
+):
+    """Test a second execute for a case with a pending job is rejected."""
+    case_id = create_case()
+    
+    first = client.post(f"/api/agent/cases/{case_id}/execute")
+    second = client.post(f"/api/agent/cases/{case_id}/execute")
+    assert first.status_code == 202
+    assert second.status_code == 409
+    wait_for_status(case_id)
+
+
+def test_failed_execution_marks_job_failed(
+    create_case, execute, fake_agent_services, providers, monkeypatch
+):
+    """Test errors inside the worker are recorded on the case and job."""
+    async def broken_analyze(case_data, damages=None):
+        raise ValueError("Failed to parse Claude response")
+    
+    monkeypatch.setattr(providers.claude, "analyze_statutory_compliance", broken_analyze)
+    case_id = create_case()
+    
+    data = execute(case_id)
+    assert data["status"] == "error"
+    assert data["job"]["status"] == "failed"
+    assert "Failed to parse" in data["job"]["error"]
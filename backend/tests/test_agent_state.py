@@ -0,0 +1,74 @@
+import asyncio
+from uuid import UUID
+
+from fastapi.testclient import TestClient
+
+from app.database import AsyncSessionLocal
+from app.models.database import Mailing
+from app.services.db_service import AGENT_STATE_POINTER_KEYS, async_db_service
+
+
+def test_execute_stores_outputs_in_their_tables(
+    client: TestClient, create_case, wait_for_status, fake_agent_services
+):
+    """Test a run appends an analysis and a letter version and keeps only pointers on the case."""
+    case_id = create_case()
+    client.post(f"/api/agent/cases/{case_id}/execute")
+    status = wait_for_status(case_id, ("awaiting_approval", "error"))
+
+    async def stored_state():
+        async with AsyncSessionLocal() as db:
+            return (await async_db_service.get_case(db, UUID(case_id))).agent_state
+
+    stored = asyncio.run(stored_state())
+    assert set(stored) <= set(AGENT_STATE_POINTER_KEYS)
+    assert stored["analysis_id"] and stored["letter_draft_id"]
+
+    # Case and status reads still return the full state
+    case = client.get(f"/api/cases/{case_id}").json()["data"]
+    assert case["agent_state"]["statutory_analysis"]["summary"]
+    assert status["agent_state"]["demand_letter_draft"]["letter_html"] == "<p>Generated demand letter</p>"
+
+
+def test_edited_approval_adds_letter_version(
+    client: TestClient, create_case, wait_for_status, fake_agent_services
+):
+    """Test approving an edited letter records it as version 2 and links the mailing to it."""
+    case_id = create_case()
+    client.post(f"/api/agent/cases/{case_id}/execute")
+    wait_for_status(case_id, ("awaiting_approval", "error"))
+
+    client.post(
+        f"/api/agent/cases/{case_id}/approve",
+        json={"approved": True, "edited_letter_html": "<p>Edited letter</p>"}
+    )
+    status = wait_for_status(case_id, ("mailed", "error"))
+    assert status["agent_state"]["edited_letter_html"] == "<p>Edited letter</p>"
+
+    letters = client.get(f"/api/agent/cases/{case_id}/letters").json()["data"]
+    assert [(letter["version"], letter["source"]) for letter in letters] == [(1, "generated"), (2, "edited")]
+
+    async def mailing():
+        async with AsyncSessionLocal() as db:
+            db_case = await async_db_service.get_case(db, UUID(case_id))
+            return await db.get(Mailing, UUID(db_case.agent_state["mailing_id"]))
+
+    record = asyncio.run(mailing())
+    assert record.lob_mail_id == "ltr_test123"
+    assert str(record.letter_draft_id) == letters[1]["id"]
+
+
+def test_update_returns_full_agent_state(
+    client: TestClient, create_case, wait_for_status, fake_agent_services
+):
+    """Test PATCH returns the expanded agent state, not the stored pointers."""
+    case_id = create_case()
+    client.post(f"/api/agent/cases/{case_id}/execute")
+    wait_for_status(case_id, ("awaiting_approval", "error"))
+
+    response = client.patch(f"/api/cases/{case_id}", json={"tenant_name": "Jane Q. Tenant"})
+    assert response.status_code == 200
+    case = response.json()["data"]
+    assert case["tenant_name"] == "Jane Q. Tenant"
+    assert case["agent_state"] == client.get(f"/api/cases/{case_id}").json()["data"]["agent_state"]
+    assert case["agent_state"]["demand_letter_draft"]["letter_html"] == "<p>Generated demand letter</p>"
@@ -56,6 +56,45 @@ def test_list_cases(client: TestClient, sample_case_data):
     assert len(data["data"]) >= 3
 
 
+def test_list_cases_returns_summaries(client: TestClient, sample_case_data):
+    """Test the list omits agent state and the dispute description."""
+    client.post("/api/cases/", json=sample_case_data.model_dump(mode="json"))
+    
+    case = client.get("/api/cases/").json()["data"][0]
+    assert case["tenant_name"] == "John Doe"
+    assert "agent_state" not in case
+    assert "dispute_description" not in case
+
+
+def test_list_cases_keyset_pagination(client: TestClient, sample_case_data):
+    """Test following X-Next-Cursor walks every case exactly once, newest first."""
+    # Bulk import so several cases share a creation transaction
+    body = "\n".join(sample_case_data.model_dump_json() for _ in range(5))
+    client.post("/api/cases/import", content=body)
+    client.post("/api/cases/", json=sample_case_data.model_dump(mode="json"))
+    
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/api/cases/", params=params)
+        assert response.status_code == 200
+        seen.extend(response.json()["data"])
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    
+    assert len(seen) == 6
+    assert len({case["id"] for case in seen}) == 6
+    keys = [(case["created_at"], case["id"]) for case in seen]
+    assert keys == sorted(keys, reverse=True)
+
+
+def test_list_cases_invalid_cursor(client: TestClient):
+    """Test a malformed cursor is a 400."""
+    response = client.get("/api/cases/", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+
 def test_update_case(client: TestClient, sample_case_data):
     """Test updating a case."""
     # Create case
@@ -0,0 +1,60 @@
+import httpx
+
+from benchmarks.api import compare, percentile, summarize
+from benchmarks.import_time import compare as compare_import_time, probe
+from stub_servers import StubLobServer
+
+
+def _report(p95_ms, throughput, errors=0):
+    return {"results": {"execute": {"4": {"p95_ms": p95_ms, "throughput_per_s": throughput, "errors": errors}}}}
+
+
+def test_summary_percentiles_interpolate():
+    """Test latency percentiles and throughput from raw samples."""
+    summary = summarize([0.4, 0.1, 0.3, 0.2], errors=1, elapsed=2.0)
+
+    assert percentile([1.0, 2.0, 3.0], 0.5) == 2.0
+    assert percentile([], 0.5) is None
+    assert summary["requests"] == 5 and summary["throughput_per_s"] == 2.0
+    assert summary["p50_ms"] == 250.0
+    assert summary["p99_ms"] == 397.0
+    assert summary["max_ms"] == 400.0
+
+
+def test_baseline_comparison_flags_regressions():
+    """Test slower p95, lower throughput and new errors beyond the tolerance are regressions."""
+    baseline = _report(100.0, 10.0)
+
+    assert compare(_report(120.0, 9.0), baseline, tolerance=0.25)["regressions"] == []
+    slower = compare(_report(130.0, 7.0, errors=1), baseline, tolerance=0.25)
+    assert slower["operations"]["execute"]["4"] == {"p95_ratio": 1.3, "throughput_ratio": 0.7}
+    assert len(slower["regressions"]) == 3
+    assert compare(_report(500.0, 1.0), {"results": {}}, tolerance=0.25)["regressions"] == []
+
+
+def test_stub_error_rate_is_seeded():
+    """Test injected stub failures are repeatable for a seed."""
+    def statuses(seed):
+        with StubLobServer(error_rate=0.5, seed=seed) as server:
+            codes = [
+                httpx.post(f"{server.url}/v1/letters", json={"description": "x"}).status_code
+                for _ in range(20)
+            ]
+        return codes, server.error_count
+
+    codes, errors = statuses(seed=1)
+    assert set(codes) == {200, 503}
+    assert errors == codes.count(503)
+    assert statuses(seed=1) == (codes, errors)
+
+
+def test_app_import_defers_providers(tmp_path):
+    """Test importing the app needs no API keys and loads neither anthropic nor langgraph."""
+    lazy = probe("app.main", eager=False, database_url=f"sqlite:///{tmp_path}/import.db")
+    assert lazy["loaded"] == [] and lazy["build_ms"] == {}
+
+    report = {"results": {"lazy": {"import": {"median_ms": 130.0}, "loaded": ["langgraph"]}}}
+    baseline = {"results": {"lazy": {"import": {"median_ms": 100.0}}}}
+    assert compare_import_time(report, baseline, tolerance=0.25)["regressions"] == [
+        "import loads langgraph", "import: median 100.0 -> 130.0 ms"
+    ]
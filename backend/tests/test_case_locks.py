@@ -0,0 +1,129 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from uuid import UUID, uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import serve
+from app.agents.jobs import AgentJobQueue
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.services.case_locks import CaseLockedError, CaseLockManager
+from app.services.db_service import async_db_service
+
+
+def _acquire(case_id, owner, ttl_seconds=60):
+    async def run():
+        async with AsyncSessionLocal() as db:
+            return await async_db_service.acquire_case_lock(db, case_id, "execute", owner, ttl_seconds)
+    return asyncio.run(run())
+
+
+def test_lock_is_exclusive_until_released_or_expired(db_session):
+    """Test a second holder is refused until the lock is released or its lease lapses."""
+    case_id = uuid4()
+    locks = CaseLockManager(ttl_seconds=60)
+
+    async def run():
+        async with locks.hold(case_id, "approve"):
+            with pytest.raises(CaseLockedError):
+                async with locks.hold(case_id, "execute", wait=0.2):
+                    pass
+        async with locks.hold(case_id, "execute"):
+            pass
+
+    asyncio.run(run())
+    assert _acquire(case_id, "crashed-worker", ttl_seconds=0)
+    assert _acquire(case_id, "next-worker")
+    assert not _acquire(case_id, "another-worker")
+
+
+def test_locked_case_rejects_execute_and_approve(client: TestClient, create_case):
+    """Test requests for a case another worker holds get 409 instead of running."""
+    case_id = create_case()
+    assert _acquire(UUID(case_id), "other-worker")
+
+    execute = client.post(f"/api/agent/cases/{case_id}/execute")
+    approve = client.post(f"/api/agent/cases/{case_id}/approve", json={"approved": True})
+
+    assert execute.status_code == 409 and approve.status_code == 409
+    assert "busy" in execute.json()["detail"]
+    assert client.get(f"/api/cases/{case_id}").json()["data"]["status"] == "draft"
+
+
+def test_batch_execute_skips_locked_cases(client: TestClient, create_case, fake_agent_services):
+    """Test a batch execute reports cases another worker holds as skipped and queues the rest."""
+    locked, free = create_case(), create_case()
+    assert _acquire(UUID(locked), "other-worker")
+
+    response = client.post("/api/agent/cases/execute", json={"case_ids": [locked, free]})
+
+    data = response.json()["data"]
+    assert data["queued"] == 1 and data["skipped"] == 1
+    results = {result["case_id"]: result for result in data["results"]}
+    assert results[locked]["error"] == "Case is busy with another operation"
+    assert results[free]["queued"]
+    assert client.get(f"/api/cases/{locked}").json()["data"]["status"] == "draft"
+
+
+def test_job_picked_up_by_two_workers_runs_once(create_case, fake_agent_services, providers):
+    """Test a job re-queued by two processes is executed by only one of them."""
+    case_id = create_case()
+
+    async def run():
+        async with AsyncSessionLocal() as db:
+            job = await async_db_service.create_job(db, UUID(case_id))
+        await asyncio.gather(AgentJobQueue(1, providers)._run(job.id), AgentJobQueue(1, providers)._run(job.id))
+        async with AsyncSessionLocal() as db:
+            return await async_db_service.get_job(db, job.id)
+
+    job = asyncio.run(run())
+    assert job.status == "succeeded"
+    assert fake_agent_services["analyze"] == 1
+    assert fake_agent_services["generate"] == 1
+
+
+def test_limits_are_split_across_workers(monkeypatch):
+    """Test per-worker shares of pool sizes and rate limits, and CPU-aware worker counts."""
+    four_workers = settings.model_copy(update={"WEB_CONCURRENCY": 4})
+    assert four_workers.per_worker(10) == 2
+    assert four_workers.per_worker(3) == 1
+    assert four_workers.per_worker(25.0) == 6.25
+    assert settings.model_copy(update={"WEB_CONCURRENCY": 0}).per_worker(10) == 10
+
+    monkeypatch.setattr(serve, "available_cpus", lambda: 32)
+    assert serve.worker_count() == settings.WEB_MAX_WORKERS
+    assert serve.worker_count(3) == 3
+    with pytest.raises(SystemExit, match="SQLite"):
+        serve.check_workers(2)
+    serve.check_workers(1)
+
+
+GUNICORN_PROBE = """
+import json, os, runpy
+os.sched_getaffinity = lambda pid: set(range(32))
+config = runpy.run_path("gunicorn.conf.py")
+config["post_fork"](None, None)
+from app.config import settings
+print(json.dumps({"workers": config["workers"], "worker_count": settings.worker_count,
+                  "pool": settings.per_worker(20)}))
+"""
+
+
+def test_gunicorn_workers_get_their_share():
+    """Test gunicorn workers size their pools from the resolved worker count, not the whole."""
+    backend = Path(__file__).resolve().parents[1]
+    env = {key: value for key, value in os.environ.items() if key != "WEB_CONCURRENCY"}
+    env.update({"DATABASE_URL": "postgresql://localhost/depositguard", "WEB_MAX_WORKERS": "4"})
+    completed = subprocess.run(
+        [sys.executable, "-c", GUNICORN_PROBE], cwd=backend, env=env,
+        capture_output=True, text=True, check=True
+    )
+    assert json.loads(completed.stdout.strip().splitlines()[-1]) == {
+        "workers": 4, "worker_count": 4, "pool": 5
+    }
@@ -0,0 +1,67 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.services.damages import calculate_damages, calculate_damages_batch
+
+MOVE_OUT = date(2024, 12, 1)
+
+
+def test_damages_after_deadline_are_trebled():
+    """Test bad faith is presumed once the 30-day deadline has passed."""
+    damages = calculate_damages(Decimal("1500.00"), MOVE_OUT, as_of=MOVE_OUT + timedelta(days=45))
+    assert damages.days_elapsed == 45
+    assert damages.refund_deadline_passed is True
+    assert damages.bad_faith_presumed is True
+    assert damages.base_damages == Decimal("1500.00")
+    assert damages.treble_damages == Decimal("4500.00")
+    assert damages.statutory_penalty == Decimal("100.00")
+    assert damages.total_damages == Decimal("6100.00")
+
+
+@pytest.mark.parametrize("days", [0, 15, 30])
+def test_no_damages_before_deadline(days):
+    """Test the landlord still has until the 30th day to refund or account."""
+    damages = calculate_damages("800", MOVE_OUT, as_of=MOVE_OUT + timedelta(days=days))
+    assert damages.refund_deadline_passed is False
+    assert damages.bad_faith_presumed is False
+    assert damages.total_damages == Decimal("0.00")
+
+
+def test_no_damages_when_nothing_withheld():
+    """Test a full refund after the deadline carries no penalty."""
+    damages = calculate_damages("0", MOVE_OUT, as_of=MOVE_OUT + timedelta(days=60))
+    assert damages.refund_deadline_passed is True
+    assert damages.bad_faith_presumed is False
+    assert damages.total_damages == Decimal("0.00")
+
+
+def test_batch_matches_single_case():
+    """Test the batch API returns the same results as per-case scoring."""
+    as_of = date(2025, 2, 1)
+    withheld = [Decimal("1500.00"), "250.50", 0, "999.99"]
+    move_outs = [MOVE_OUT, "2025-01-15", date(2024, 10, 1), date(2024, 11, 20)]
+    
+    batch = calculate_damages_batch(withheld, move_outs, as_of=as_of)
+    single = [calculate_damages(w, m, as_of=as_of) for w, m in zip(withheld, move_outs)]
+    assert batch == single
+
+
+def test_batch_rejects_misaligned_columns():
+    with pytest.raises(ValueError):
+        calculate_damages_batch(["100"], [MOVE_OUT, MOVE_OUT])
+
+
+def test_score_stored_cases(client: TestClient, sample_case_data):
+    """Test stored cases are re-scored without calling Claude."""
+    for _ in range(2):
+        client.post("/api/cases/", json=sample_case_data.model_dump(mode="json"))
+    
+    response = client.get("/api/cases/damages")
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert len(data) == 2
+    assert data[0]["bad_faith_presumed"] is True
+    assert Decimal(data[0]["total_damages"]) == Decimal("6100.00")
@@ -0,0 +1,82 @@
+import asyncio
+from datetime import date
+from decimal import Decimal
+
+from langgraph.checkpoint.memory import MemorySaver
+
+from app.agents.graph import create_agent_graph, thread_config
+from app.providers import Providers
+from app.services.claude_service import ClaudeService
+from app.services.damages import calculate_damages
+from stub_servers import LETTER_RESPONSE, StubAnthropicServer
+
+ADDRESS = {"address_line1": "1 Main St", "address_city": "Austin", "address_zip": "78701"}
+CASE_DATA = {
+    "tenant_name": "Jane Tenant",
+    "landlord_name": "Acme Properties",
+    "tenant_address": ADDRESS,
+    "landlord_address": ADDRESS,
+    "deposit_amount": 1500.0,
+    "withheld_amount": 1500.0,
+    "move_out_date": "2024-12-01",
+    "dispute_description": "Landlord withheld full deposit without an itemized list."
+}
+
+
+def test_case_package_returns_analysis_and_letter_in_one_call():
+    """Test the fused call yields both results with locally computed damages."""
+    damages = calculate_damages(Decimal("1500.00"), date(2024, 12, 1), as_of=date(2025, 1, 15))
+    streamed = []
+
+    async def run():
+        service = ClaudeService(api_key="test-key", base_url=server.url)
+        try:
+            return service, await service.draft_case_package(CASE_DATA, damages, on_text=streamed.append)
+        finally:
+            await service.aclose()
+
+    with StubAnthropicServer() as server:
+        service, (analysis, letter) = asyncio.run(run())
+
+    assert server.request_count == 1
+    assert analysis.total_damages == Decimal("6100.00")
+    assert analysis.violations[0].statute == "Texas Property Code §92.103"
+    assert letter.letter_html == LETTER_RESPONSE["letter_html"]
+    assert "".join(streamed) == letter.letter_text
+    assert service.usage.totals["case_package"]["calls"] == 1
+
+
+def test_fused_graph_pauses_for_approval_after_one_call():
+    """Test the fused graph drafts with a single node and stops before mailing."""
+    state = {
+        "case_id": "case-1",
+        **CASE_DATA,
+        "days_elapsed": 45,
+        "evidence_urls": [],
+        "statutory_analysis": None,
+        "violation_findings": [],
+        "demand_letter_draft": None,
+        "human_approved": False,
+        "status": "analyzing"
+    }
+
+    async def run():
+        service = ClaudeService(api_key="test-key", base_url=server.url)
+        providers = Providers()
+        providers.claude = service
+        graph = create_agent_graph(providers, checkpointer=MemorySaver(), fused=True)
+        try:
+            final = await graph.ainvoke(state, thread_config("case-1"))
+            snapshot = await graph.aget_state(thread_config("case-1"))
+        finally:
+            await service.aclose()
+        return final, snapshot
+
+    with StubAnthropicServer() as server:
+        final, snapshot = asyncio.run(run())
+
+    assert server.request_count == 1
+    assert snapshot.next == ("mail",)
+    assert final["status"] == "awaiting_approval"
+    assert final["demand_letter_draft"]["letter_text"] == LETTER_RESPONSE["letter_text"]
+    assert final["violation_findings"]
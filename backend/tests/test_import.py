@@ -0,0 +1,148 @@
+import json
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+
+from app.config import settings
+
+CSV_HEADER = (
+    "tenant_name,landlord_name,deposit_amount,withheld_amount,move_out_date,"
+    "tenant_address.name,tenant_address.address_line1,tenant_address.address_city,"
+    "tenant_address.address_state,tenant_address.address_zip,"
+    "landlord_address.name,landlord_address.address_line1,landlord_address.address_city,"
+    "landlord_address.address_state,landlord_address.address_zip,"
+    "dispute_description,evidence_urls"
+)
+
+
+def _csv_row(tenant: str, description: str, withheld: str = "1500.00") -> str:
+    return (
+        f"{tenant},Bad Landlord LLC,1500.00,{withheld},2024-12-01,"
+        f"{tenant},123 Main St,Austin,TX,78701,"
+        "Bad Landlord LLC,456 Oak Ave,Austin,TX,78702,"
+        f"{description},https://example.com/a.jpg;https://example.com/b.jpg"
+    )
+
+
+def _ndjson(records) -> str:
+    return "\n".join(
+        record if isinstance(record, str) else json.dumps(record) for record in records
+    ) + "\n"
+
+
+def test_import_ndjson_reports_invalid_rows(client: TestClient, sample_case_data, monkeypatch):
+    """Test NDJSON rows are validated individually and inserted across chunks."""
+    monkeypatch.setattr(settings, "CASE_IMPORT_CHUNK_SIZE", 2)
+    valid = sample_case_data.model_dump(mode="json")
+    body = _ndjson([
+        valid,
+        {**valid, "tenant_name": "Second Tenant"},
+        "{not json",
+        {**valid, "deposit_amount": "-5"},
+        "",
+        {**valid, "tenant_name": "Third Tenant"}
+    ])
+    
+    response = client.post(
+        "/api/cases/import", content=body, headers={"Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert data["imported"] == 3
+    assert [error["row"] for error in data["errors"]] == [3, 4]
+    assert "invalid JSON" in data["errors"][0]["errors"][0]
+    assert data["errors"][1]["errors"][0].startswith("deposit_amount")
+    
+    cases = client.get("/api/cases/").json()["data"]
+    assert sorted(case["id"] for case in cases) == sorted(data["case_ids"])
+
+
+def test_import_csv_with_multiline_cells(client: TestClient):
+    """Test CSV rows map dotted columns to addresses and keep quoted newlines."""
+    body = "\r\n".join([
+        CSV_HEADER,
+        _csv_row("Jane Doe", '"Landlord kept the deposit.\nNo itemized list was sent."'),
+        _csv_row("John Roe", "Too short"),
+        _csv_row("Ann Poe", "Deposit withheld for normal wear and tear.")
+    ])
+    
+    response = client.post(
+        "/api/cases/import", content=body, headers={"Content-Type": "text/csv"}
+    )
+    data = response.json()["data"]
+    assert data["imported"] == 2
+    assert data["errors"] == [
+        {"row": 4, "errors": ["dispute_description: String should have at least 10 characters"]}
+    ]
+    
+    case = client.get(f"/api/cases/{data['case_ids'][0]}").json()["data"]
+    assert case["tenant_address"]["address_city"] == "Austin"
+    assert case["tenant_address"]["address_line2"] is None
+    assert case["dispute_description"] == "Landlord kept the deposit.\nNo itemized list was sent."
+    assert case["evidence_urls"] == ["https://example.com/a.jpg", "https://example.com/b.jpg"]
+
+
+def test_import_reports_rows_that_are_not_utf8(client: TestClient, sample_case_data):
+    """Test a row in another encoding is a per-row error, not a failed upload."""
+    valid = sample_case_data.model_dump(mode="json")
+    cp1252 = json.dumps({**valid, "tenant_name": "José"}, ensure_ascii=False).encode("cp1252")
+    body = _ndjson([valid, {**valid, "tenant_name": "Second Tenant"}]).encode() + cp1252 + b"\n" + (
+        _ndjson([{**valid, "tenant_name": "Third Tenant"}]).encode()
+    )
+    
+    response = client.post("/api/cases/import", content=body, headers={"Content-Type": "application/x-ndjson"})
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert data["imported"] == 3
+    assert [error["row"] for error in data["errors"]] == [3]
+    assert "invalid UTF-8" in data["errors"][0]["errors"][0]
+    
+    body = "\r\n".join([CSV_HEADER, _csv_row("Jane Doe", "Deposit withheld for normal wear and tear.")])
+    body = body.encode() + b"\r\n" + _csv_row("Jos\xe9 Roe", "Deposit withheld for normal wear and tear.").encode("latin-1")
+    data = client.post("/api/cases/import", content=body, headers={"Content-Type": "text/csv"}).json()["data"]
+    assert data["imported"] == 1
+    assert [error["row"] for error in data["errors"]] == [3]
+
+
+def test_import_rejects_unknown_format(client: TestClient):
+    """Test an unsupported format is a 400."""
+    response = client.post("/api/cases/import?format=xlsx", content=b"")
+    assert response.status_code == 400
+
+
+def test_batch_execute_reports_per_case_results(
+    client: TestClient, sample_case_data, wait_for_status, fake_agent_services
+):
+    """Test batch execute queues imported cases and skips unknown ones."""
+    valid = sample_case_data.model_dump(mode="json")
+    imported = client.post(
+        "/api/cases/import", content=_ndjson([valid, valid, valid])
+    ).json()["data"]["case_ids"]
+    missing = str(uuid4())
+    
+    response = client.post(
+        "/api/agent/cases/execute", json={"case_ids": imported + [missing, imported[0]]}
+    )
+    assert response.status_code == 202
+    data = response.json()["data"]
+    assert data["queued"] == 3
+    assert data["skipped"] == 1
+    results = {result["case_id"]: result for result in data["results"]}
+    assert results[missing] == {
+        "case_id": missing, "queued": False, "job_id": None, "error": "Case not found"
+    }
+    job_ids = [results[case_id]["job_id"] for case_id in imported]
+    
+    finished = [wait_for_status(case_id) for case_id in imported]
+    assert [status["job"]["id"] for status in finished] == job_ids
+    assert [status["job"]["status"] for status in finished] == ["succeeded"] * 3
+    assert [status["status"] for status in finished] == ["awaiting_approval"] * 3
+    
+    # Cases past draft keep their analysis and letter pointers
+    rerun = client.post("/api/agent/cases/execute", json={"case_ids": imported}).json()["data"]
+    assert rerun["queued"] == 0 and rerun["skipped"] == 3
+    assert {result["error"] for result in rerun["results"]} == {"Case is awaiting_approval"}
+    for case_id in imported:
+        case = client.get(f"/api/cases/{case_id}").json()["data"]
+        assert case["status"] == "awaiting_approval"
+        assert case["agent_state"]["analysis_id"] and case["agent_state"]["letter_draft_id"]
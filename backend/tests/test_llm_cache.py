@@ -0,0 +1,128 @@
+import asyncio
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.database import AsyncSessionLocal
+from app.services.claude_service import ClaudeService
+from app.services.damages import calculate_damages
+from app.services.db_service import async_db_service
+from app.services.llm_cache import LLMResponseCache
+from stub_servers import StubAnthropicServer
+
+CASE_DATA = {
+    "deposit_amount": 1500.0,
+    "withheld_amount": 1500.0,
+    "move_out_date": "2024-12-01",
+    "days_elapsed": 45,
+    "dispute_description": "Landlord withheld full deposit without an itemized list.",
+    "tenant_address": {},
+    "landlord_address": {}
+}
+DAMAGES = calculate_damages(Decimal("1500.00"), date(2024, 12, 1), as_of=date(2025, 1, 15))
+
+
+def _cache() -> LLMResponseCache:
+    return LLMResponseCache()
+
+
+def _analyze(service: ClaudeService, case_data=CASE_DATA):
+    async def run():
+        try:
+            return await service.analyze_statutory_compliance(case_data, DAMAGES)
+        finally:
+            await service.aclose()
+    return asyncio.run(run())
+
+
+def test_identical_facts_hit_memory_cache(db_session):
+    """Test repeated analysis of identical facts skips the network."""
+    cache = _cache()
+    with StubAnthropicServer() as server:
+        service = ClaudeService(api_key="test-key", base_url=server.url, cache=cache)
+        first = _analyze(service)
+        second = _analyze(service, {
+            **CASE_DATA,
+            "dispute_description": "  Landlord withheld full deposit\n without an itemized list. "
+        })
+    
+    assert server.request_count == 1
+    assert second == first
+    assert cache.stats()["memory_hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_database_tier_survives_memory_loss(db_session):
+    """Test a fresh cache instance is served from the database tier."""
+    with StubAnthropicServer() as server:
+        _analyze(ClaudeService(api_key="test-key", base_url=server.url, cache=_cache()))
+        
+        cold_cache = _cache()
+        result = _analyze(ClaudeService(api_key="test-key", base_url=server.url, cache=cold_cache))
+    
+    assert server.request_count == 1
+    assert result.total_damages == Decimal("6100.00")
+    assert cold_cache.stats()["db_hits"] == 1
+
+
+def test_different_facts_miss(db_session):
+    """Test changed facts produce a different key."""
+    cache = _cache()
+    with StubAnthropicServer() as server:
+        service = ClaudeService(api_key="test-key", base_url=server.url, cache=cache)
+        _analyze(service)
+        _analyze(service, {**CASE_DATA, "withheld_amount": 900.0})
+    
+    assert server.request_count == 2
+
+
+def test_eviction_keeps_newest_entries(db_session):
+    """Test size eviction removes the oldest database entries."""
+    cache = _cache()
+    
+    async def run():
+        for i in range(3):
+            await cache.set(f"key-{i}", "statutory_analysis", "model", {"i": i})
+        async with AsyncSessionLocal() as db:
+            evicted = await async_db_service.evict_cache_entries(db, max_entries=1)
+            remaining = [
+                await async_db_service.get_cache_entry(db, f"key-{i}") for i in range(3)
+            ]
+        return evicted, remaining
+    
+    evicted, remaining = asyncio.run(run())
+    assert evicted == 2
+    assert [entry is not None for entry in remaining] == [False, False, True]
+
+
+def test_cache_stats_endpoint(client: TestClient):
+    response = client.get("/api/agent/cache/stats")
+    assert response.status_code == 200
+    assert "hit_rate" in response.json()["data"]
+
+
+def test_rejected_letter_is_redrafted(
+    client: TestClient, create_case, wait_for_status, providers, monkeypatch
+):
+    """Test re-executing a case after rejecting its letter asks Claude for a new draft."""
+    def execute(case_id):
+        assert client.post(f"/api/agent/cases/{case_id}/execute").status_code == 202
+        assert wait_for_status(case_id)["status"] == "awaiting_approval"
+
+    with StubAnthropicServer() as server:
+        service = ClaudeService(api_key="test-key", base_url=server.url, cache=_cache())
+        monkeypatch.setattr(providers, "claude", service)
+        case_id = create_case()
+        
+        execute(case_id)
+        assert client.post(f"/api/agent/cases/{case_id}/approve", json={"approved": False}).status_code == 200
+        execute(case_id)
+    
+    # Analysis served from the cache the second time, the letter is not
+    assert [request["tool_choice"]["name"] for request in server.requests] == [
+        "record_analysis", "record_demand_letter", "record_demand_letter"
+    ]
+    drafts = client.get(f"/api/agent/cases/{case_id}/letters").json()["data"]
+    assert len(drafts) == 2
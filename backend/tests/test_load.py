@@ -0,0 +1,62 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from app.agents.jobs import agent_job_queue
+from app.main import app
+from app.services.claude_service import ClaudeService
+from stub_servers import StubAnthropicServer
+
+CONCURRENT_CASES = 5
+STUB_LATENCY = 0.3  # seconds per Claude call; each case makes two calls
+
+
+@pytest.fixture
+def stub_claude(monkeypatch):
+    """A local stub Anthropic server, with one agent worker per concurrent case."""
+    with StubAnthropicServer(latency=STUB_LATENCY) as server:
+        monkeypatch.setattr(agent_job_queue, "concurrency", CONCURRENT_CASES)
+        yield server
+
+
+def test_concurrent_executions_overlap(db_session, sample_case_data, stub_claude):
+    """Test N concurrent /execute calls overlap instead of running back to back."""
+
+    async def run() -> float:
+        async with app.router.lifespan_context(app):
+            # Point the agent nodes at the stub; the lifespan closes it on exit
+            app.state.providers.claude = ClaudeService(api_key="test-key", base_url=stub_claude.url)
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                case_ids = []
+                for _ in range(CONCURRENT_CASES):
+                    response = await client.post(
+                        "/api/cases/", json=sample_case_data.model_dump(mode="json")
+                    )
+                    case_ids.append(response.json()["data"]["id"])
+
+                started = time.perf_counter()
+                responses = await asyncio.gather(*[
+                    client.post(f"/api/agent/cases/{case_id}/execute")
+                    for case_id in case_ids
+                ])
+                await asyncio.wait_for(agent_job_queue.join(), timeout=30)
+                elapsed = time.perf_counter() - started
+
+                statuses = [
+                    (await client.get(f"/api/agent/cases/{case_id}/status")).json()["data"]["status"]
+                    for case_id in case_ids
+                ]
+
+        assert all(r.status_code == 202 for r in responses), [r.text for r in responses]
+        assert statuses == ["awaiting_approval"] * CONCURRENT_CASES
+        return elapsed
+
+    elapsed = asyncio.run(run())
+
+    serial_time = CONCURRENT_CASES * 2 * STUB_LATENCY
+    assert stub_claude.request_count == CONCURRENT_CASES * 2
+    assert stub_claude.max_in_flight > 1
+    assert elapsed < serial_time / 2, f"{elapsed:.2f}s vs {serial_time:.2f}s serial"
@@ -0,0 +1,169 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import httpx
+import pytest
+
+from app.config import settings
+from app.services.lob_service import LobService, RateLimiter, lob_idempotency_key, parse_retry_after
+from app.services.tracing import InMemorySpanExporter, tracer
+from stub_servers import StubLobServer
+
+TO_ADDRESS = {
+    "name": "Bad Landlord LLC",
+    "address_line1": "456 Business Blvd",
+    "address_city": "Austin",
+    "address_state": "TX",
+    "address_zip": "78702"
+}
+FROM_ADDRESS = {
+    "name": "John Doe",
+    "address_line1": "123 Main St",
+    "address_line2": "Apt 4",
+    "address_city": "Austin",
+    "address_state": "TX",
+    "address_zip": "78701"
+}
+
+
+def _service(server: StubLobServer, **kwargs) -> LobService:
+    return LobService(
+        api_key="test_lob_key",
+        base_url=f"{server.url}/v1",
+        retry_base_delay=0.01,
+        rate_limiter=RateLimiter(rate=1000, burst=100),
+        **kwargs
+    )
+
+
+def _send(service: LobService, letter_html: str = "<p>Letter</p>", case_id: str = "case-1"):
+    async def run():
+        try:
+            return await service.send_certified_letter(
+                TO_ADDRESS,
+                FROM_ADDRESS,
+                letter_html,
+                idempotency_key=lob_idempotency_key(case_id, letter_html)
+            )
+        finally:
+            await service.aclose()
+    return asyncio.run(run())
+
+
+def test_idempotency_key_tracks_case_and_letter():
+    """Test the key is stable per case and letter, and changes with either."""
+    key = lob_idempotency_key("case-1", "<p>Letter</p>")
+    assert key == lob_idempotency_key("case-1", "<p>Letter</p>")
+    assert key != lob_idempotency_key("case-2", "<p>Letter</p>")
+    assert key != lob_idempotency_key("case-1", "<p>Edited</p>")
+
+
+def test_send_retries_transient_failures():
+    """Test 5xx and 429 responses are retried until the letter is created."""
+    with StubLobServer(faults=[500, 429, 503]) as server:
+        result = _send(_service(server))
+    
+    assert server.letter_requests == 4
+    assert len(server.letters) == 1
+    assert result.lob_id == "ltr_stub0"
+    assert result.tracking_url == "https://lob.example/track/0"
+    assert str(result.expected_delivery) == "2025-01-10"
+
+
+def test_request_span_records_retries(monkeypatch):
+    """Test a retried request is one span carrying its retry count and final status."""
+    exporter = InMemorySpanExporter()
+    monkeypatch.setattr(tracer, "exporters", [exporter])
+    with StubLobServer(faults=[503, 429]) as server:
+        _send(_service(server))
+    
+    letter_span = next(span for span in exporter.spans if span.attributes["http.method"] == "POST")
+    assert letter_span.name == "lob.request"
+    assert letter_span.attributes["lob.retries"] == 2
+    assert letter_span.attributes["http.status_code"] == 200
+
+
+def test_timeout_retry_does_not_mail_twice(monkeypatch):
+    """Test a retry after a timeout returns the letter Lob already created."""
+    monkeypatch.setattr(settings, "LOB_TIMEOUT_SECONDS", 0.2)
+    with StubLobServer(faults=["timeout"], hang_seconds=0.5) as server:
+        result = _send(_service(server))
+    
+    assert server.letter_requests == 2
+    assert len(server.letters) == 1
+    assert result.lob_id == "ltr_stub0"
+
+
+def test_send_gives_up_after_max_retries():
+    """Test persistent failures surface as a Lob API error."""
+    with StubLobServer(faults=[503, 503, 503]) as server:
+        with pytest.raises(ValueError, match="Lob API error: 503"):
+            _send(_service(server, max_retries=2))
+    assert server.letter_requests == 3
+    assert server.letters == {}
+
+
+def test_client_errors_are_not_retried():
+    """Test a 4xx other than 429 fails immediately."""
+    with StubLobServer(faults=[422]) as server:
+        with pytest.raises(ValueError, match="Lob API error: 422"):
+            _send(_service(server))
+    assert server.letter_requests == 1
+
+
+def test_sends_do_not_block_each_other():
+    """Test concurrent letters overlap on the async client."""
+    with StubLobServer(latency=0.2) as server:
+        service = _service(server)
+        
+        async def run() -> float:
+            started = time.perf_counter()
+            await asyncio.gather(*[
+                service.send_certified_letter(
+                    TO_ADDRESS, FROM_ADDRESS, f"<p>{i}</p>",
+                    idempotency_key=lob_idempotency_key(i, f"<p>{i}</p>")
+                )
+                for i in range(5)
+            ])
+            await service.aclose()
+            return time.perf_counter() - started
+        
+        elapsed = asyncio.run(run())
+    
+    assert len(server.letters) == 5
+    assert server.max_in_flight > 1
+    assert elapsed < 5 * 0.2 / 2
+
+
+def test_rate_limiter_spaces_requests_after_burst():
+    """Test the token bucket allows a burst, then paces at the configured rate."""
+    limiter = RateLimiter(rate=20, burst=2)
+    
+    async def run() -> float:
+        started = time.perf_counter()
+        for _ in range(6):
+            await limiter.acquire()
+        return time.perf_counter() - started
+    
+    elapsed = asyncio.run(run())
+    assert 0.18 <= elapsed < 0.5
+
+
+def test_retry_after_is_parsed_and_capped(monkeypatch):
+    """Test Retry-After seconds and HTTP dates are honoured up to LOB_RETRY_MAX_DELAY."""
+    in_three_seconds = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=3), usegmt=True)
+    assert parse_retry_after("2") == 2.0
+    assert 1.0 < parse_retry_after(in_three_seconds) <= 3.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after("soon") is None
+
+    monkeypatch.setattr(settings, "LOB_RETRY_MAX_DELAY", 8.0)
+    service = LobService(api_key="test_lob_key")
+    def delay(retry_after):
+        return service._retry_delay(0, httpx.Response(429, headers={"Retry-After": retry_after}))
+    assert delay("2") == 2.0
+    assert delay("86400") == 8.0
+    assert delay("inf") == 8.0
+    assert 0.0 <= delay("nan") <= service.retry_base_delay
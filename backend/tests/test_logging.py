@@ -0,0 +1,92 @@
+import asyncio
+import io
+import json
+import logging
+import queue
+
+import pytest
+
+from app.agents.nodes import timed_node
+from app.services.structured_logging import (
+    DebugSampler,
+    NonBlockingQueueHandler,
+    configure_logging,
+    log_context,
+    shutdown_logging
+)
+from app.services.tracing import Tracer
+
+logger = logging.getLogger("app.tests")
+
+
+@pytest.fixture
+def log_output():
+    """Route app logs to a buffer; read it after shutdown_logging() flushes."""
+    stream = io.StringIO()
+    configure_logging(level="DEBUG", debug_sample_rate=1.0, stream=stream)
+    yield stream
+    shutdown_logging()
+
+
+def _entries(stream: io.StringIO):
+    shutdown_logging()
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_records_are_json_with_context_fields(log_output):
+    """Test bound context, extra fields, trace ids and tracebacks reach the JSON line."""
+    with Tracer().start_span("request") as span, log_context(case_id="case-1", correlation_id="run-1"):
+        logger.info("Analysis complete", extra={"violations": 2})
+        try:
+            raise RuntimeError("boom")
+        except RuntimeError:
+            logger.exception("Send failed for %s", "case-1")
+    logger.info("outside")
+
+    first, failure, outside = _entries(log_output)
+    assert first["message"] == "Analysis complete" and first["level"] == "INFO"
+    assert first["logger"] == "app.tests"
+    assert first["violations"] == 2
+    assert first["case_id"] == "case-1" and first["correlation_id"] == "run-1"
+    assert first["trace_id"] == span.trace_id and first["span_id"] == span.span_id
+    assert failure["message"] == "Send failed for case-1"
+    assert "RuntimeError: boom" in failure["exception"]
+    assert "case_id" not in outside and "trace_id" not in outside
+
+
+def test_nodes_log_with_the_case_correlation_id(log_output):
+    """Test timed_node binds the case and correlation id from the state."""
+    async def node(state):
+        logger.info("inside node")
+        return state
+
+    asyncio.run(timed_node("research", node)({"case_id": "case-7", "correlation_id": "abc", "metrics": None}))
+
+    entry = next(e for e in _entries(log_output) if e["message"] == "inside node")
+    assert entry["case_id"] == "case-7" and entry["correlation_id"] == "abc"
+
+
+def test_debug_sampling_is_per_correlation_id():
+    """Test DEBUG records of a run are kept or dropped together; INFO always passes."""
+    sampler = DebugSampler(rate=0.5)
+
+    def record(level, correlation_id):
+        entry = logging.makeLogRecord({"levelno": level, "msg": "x"})
+        entry.correlation_id = correlation_id
+        return entry
+
+    decisions = {cid: sampler.filter(record(logging.DEBUG, cid)) for cid in map(str, range(200))}
+    assert 50 < sum(decisions.values()) < 150
+    assert all(sampler.filter(record(logging.DEBUG, cid)) == kept for cid, kept in decisions.items())
+    assert all(sampler.filter(record(logging.INFO, cid)) for cid in decisions)
+    assert not DebugSampler(rate=0).filter(record(logging.DEBUG, "1"))
+
+
+def test_full_queue_drops_instead_of_blocking():
+    """Test records beyond the queue bound are counted and dropped."""
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+    for i in range(3):
+        handler.handle(logging.makeLogRecord({"msg": "record %d", "args": (i,)}))
+
+    assert handler.dropped == 2
+    assert handler.queue.get_nowait().msg == "record 0"
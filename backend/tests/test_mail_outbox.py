@@ -0,0 +1,168 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.database import AsyncSessionLocal
+from app.models.database import MailOutbox
+from app.providers import Providers
+from app.services.db_service import async_db_service
+from app.services.lob_service import LobService, RateLimiter, lob_idempotency_key
+from app.services.mail_outbox import MailSender
+from stub_servers import StubLobServer
+
+
+@pytest.fixture
+def stub_lob(db_session):
+    """A local stub Lob server."""
+    with StubLobServer() as server:
+        yield server
+
+
+@pytest.fixture
+def providers(stub_lob):
+    """Provider container that sends outbox letters to the stub Lob server."""
+    container = Providers()
+    container.lob = LobService(
+        api_key="test_lob_key",
+        base_url=f"{stub_lob.url}/v1",
+        max_retries=0,
+        rate_limiter=RateLimiter(rate=1000, burst=100)
+    )
+    return container
+
+
+async def _queue_letter(sender: MailSender, sample_case_data) -> MailOutbox:
+    async with AsyncSessionLocal() as db:
+        db_case = await async_db_service.create_case(db, sample_case_data)
+    state = {"case_id": str(db_case.id), "status": "mail_queued"}
+    return await sender.enqueue(
+        state,
+        "<p>Letter</p>",
+        idempotency_key=lob_idempotency_key(db_case.id, "<p>Letter</p>"),
+        to_address=sample_case_data.landlord_address.model_dump(),
+        from_address=sample_case_data.tenant_address.model_dump(),
+        description="Demand Letter"
+    )
+
+
+async def _reload(mail_id):
+    async with AsyncSessionLocal() as db:
+        mail = await db.get(MailOutbox, mail_id)
+        db_case = await async_db_service.get_case(db, mail.case_id)
+        return mail, db_case
+
+
+async def _make_due(mail_id, **values):
+    async with AsyncSessionLocal() as db:
+        mail = await db.get(MailOutbox, mail_id)
+        for key, value in values.items():
+            setattr(mail, key, value)
+        await db.commit()
+
+
+def test_enqueue_commits_row_and_case_status(stub_lob, providers, sample_case_data):
+    """Test queuing a letter moves the case to mail_queued without calling Lob."""
+    async def run():
+        mail = await _queue_letter(MailSender(providers=providers), sample_case_data)
+        return await _reload(mail.id)
+    
+    mail, db_case = asyncio.run(run())
+    assert mail.status == "pending"
+    assert db_case.status == "mail_queued"
+    assert stub_lob.letter_requests == 0
+
+
+def test_drain_sends_and_marks_case_mailed(stub_lob, providers, sample_case_data):
+    """Test a drained letter is sent once and recorded on the case."""
+    async def run():
+        sender = MailSender(providers=providers)
+        mail = await _queue_letter(sender, sample_case_data)
+        assert await sender.drain_once() == 1
+        assert await sender.drain_once() == 0
+        mail, db_case = await _reload(mail.id)
+        async with AsyncSessionLocal() as db:
+            return mail, db_case, await async_db_service.load_agent_state(db, db_case)
+    
+    mail, db_case, state = asyncio.run(run())
+    assert mail.status == "sent"
+    assert mail.lob_id == "ltr_stub0"
+    assert db_case.status == "mailed"
+    assert "mailing_id" in db_case.agent_state
+    assert state["lob_mail_id"] == "ltr_stub0"
+    assert stub_lob.letter_requests == 1
+
+
+def test_failed_send_is_retried_then_given_up(stub_lob, providers, sample_case_data):
+    """Test failures are rescheduled with backoff until max attempts, then flag the case."""
+    stub_lob.faults = [500, 500]
+    
+    async def run():
+        sender = MailSender(max_attempts=2, providers=providers)
+        mail = await _queue_letter(sender, sample_case_data)
+        
+        await sender.drain_once()
+        retried, _ = await _reload(mail.id)
+        assert retried.status == "pending"
+        assert retried.next_attempt_at.replace(tzinfo=timezone.utc) > datetime.now(timezone.utc)
+        assert await sender.drain_once() == 0  # not due yet
+        
+        await _make_due(mail.id, next_attempt_at=datetime.now(timezone.utc))
+        await sender.drain_once()
+        return await _reload(mail.id)
+    
+    mail, db_case = asyncio.run(run())
+    assert mail.status == "failed"
+    assert mail.attempts == 2
+    assert "500" in mail.last_error
+    assert db_case.status == "error"
+
+
+def test_send_crashing_every_attempt_is_given_up(stub_lob, providers, sample_case_data):
+    """Test a row whose lease keeps expiring is failed at max attempts instead of reclaimed."""
+    async def run():
+        sender = MailSender(max_attempts=2, providers=providers)
+        mail = await _queue_letter(sender, sample_case_data)
+        
+        # Each claim's sender dies before recording a result
+        for _ in range(2):
+            async with AsyncSessionLocal() as db:
+                assert len(await async_db_service.claim_mail_batch(db, 10, 300, max_attempts=2)) == 1
+            await _make_due(mail.id, claimed_at=datetime.now(timezone.utc) - timedelta(seconds=301))
+        
+        assert await sender.drain_once() == 0
+        return await _reload(mail.id)
+    
+    mail, db_case = asyncio.run(run())
+    assert mail.status == "failed"
+    assert mail.attempts == 2
+    assert "lease expired" in mail.last_error
+    assert db_case.status == "error"
+    assert stub_lob.letter_requests == 0
+
+
+def test_crashed_send_is_reclaimed_without_double_mailing(stub_lob, providers, sample_case_data):
+    """Test a row left "sending" is re-sent after its lease and Lob dedupes it."""
+    async def run():
+        sender = MailSender(providers=providers)
+        mail = await _queue_letter(sender, sample_case_data)
+        
+        # A sender claims the row, reaches Lob, then dies before recording it
+        async with AsyncSessionLocal() as db:
+            [claimed] = await async_db_service.claim_mail_batch(db, 10, lease_seconds=300)
+        await providers.lob.send_certified_letter(
+            claimed.to_address, claimed.from_address, claimed.letter_html,
+            idempotency_key=claimed.idempotency_key
+        )
+        assert await sender.drain_once() == 0  # still leased
+        
+        await _make_due(mail.id, claimed_at=datetime.now(timezone.utc) - timedelta(seconds=301))
+        assert await sender.drain_once() == 1
+        return await _reload(mail.id)
+    
+    mail, db_case = asyncio.run(run())
+    assert mail.status == "sent"
+    assert mail.attempts == 2
+    assert db_case.status == "mailed"
+    assert stub_lob.letter_requests == 2
+    assert len(stub_lob.letters) == 1
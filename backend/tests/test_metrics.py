@@ -0,0 +1,85 @@
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.services.claude_service import ClaudeService
+from app.services.llm_cache import LLMResponseCache
+from app.services.metrics import Counter, Histogram, case_metrics, metrics
+from stub_servers import StubAnthropicServer
+
+
+@pytest.fixture
+def stub_claude(providers, monkeypatch):
+    """Run the agent against a stub Anthropic server, with the response cache on."""
+    with StubAnthropicServer() as server:
+        monkeypatch.setattr(
+            providers,
+            "claude",
+            ClaudeService(api_key="test-key", base_url=server.url, cache=LLMResponseCache())
+        )
+        yield server
+
+
+def test_prometheus_text_format():
+    """Test counters and histograms render in the Prometheus exposition format."""
+    counter = Counter("demo_total", "Demo counter.", ("kind",))
+    counter.inc(3, kind='say "hi"')
+    histogram = Histogram("demo_seconds", "Demo histogram.", ("node",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, node="a")
+    histogram.observe(0.5, node="a")
+
+    assert counter.render() == ['demo_total{kind="say \\"hi\\""} 3.0']
+    assert histogram.render() == [
+        'demo_seconds_bucket{node="a",le="0.1"} 1',
+        'demo_seconds_bucket{node="a",le="1.0"} 2',
+        'demo_seconds_bucket{node="a",le="+Inf"} 2',
+        'demo_seconds_sum{node="a"} 0.55',
+        'demo_seconds_count{node="a"} 2'
+    ]
+
+
+def test_case_metrics_only_collect_inside_their_context():
+    """Test observations are attributed to the active case collector only."""
+    record = {
+        "kind": "statutory_analysis",
+        "input_tokens": 10,
+        "cache_creation_input_tokens": 0,
+        "cache_read_input_tokens": 90,
+        "output_tokens": 5
+    }
+    with case_metrics({"claude": {"calls": 1, "output_tokens": 7}}) as collected:
+        metrics.observe_claude(record, 0.25)
+        metrics.observe_db("SELECT 1", 0.01)
+    metrics.observe_db("SELECT 1", 0.01)
+
+    data = collected.to_dict()
+    assert data["claude"]["calls"] == 2
+    assert data["claude"]["output_tokens"] == 12
+    assert data["claude"]["cache_read_input_tokens"] == 90
+    assert data["db"] == {"queries": 1, "seconds": 0.01}
+
+
+def test_execution_records_case_metrics_and_exports_them(
+    client: TestClient, create_case, wait_for_status, stub_claude
+):
+    """Test a run stores per-case metrics in agent_state and feeds /metrics."""
+    case_id = create_case()
+    assert client.post(f"/api/agent/cases/{case_id}/execute").status_code == 202
+
+    data = wait_for_status(case_id)
+
+    case = data["agent_state"]["metrics"]
+    assert set(case["nodes"]) == {"research", "generate"}
+    assert case["claude"]["calls"] == 2
+    assert case["claude"]["input_tokens"] > 0
+    assert case["claude"]["cache_creation_input_tokens"] > 0
+    assert case["db"]["queries"] > 0
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    worker = f'worker="{os.getpid()}"'
+    assert f'agent_node_seconds_count{{{worker},node="research"}}' in response.text
+    assert f'claude_tokens_total{{{worker},kind="demand_letter",type="output"}}' in response.text
+    assert f'db_query_seconds_count{{{worker},operation="SELECT"}}' in response.text
@@ -0,0 +1,127 @@
+from datetime import date
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import create_engine, insert, inspect, select
+
+from app.migrations import runner
+from app.models.database import Base, Case, LetterDraft, Mailing
+import baseline_models
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/migrations.db")
+    yield engine
+    engine.dispose()
+
+
+def _schema(engine):
+    inspector = inspect(engine)
+    return {
+        table: (
+            {column["name"] for column in inspector.get_columns(table)},
+            {index["name"] for index in inspector.get_indexes(table)}
+        )
+        for table in inspector.get_table_names() if table != runner.VERSION_TABLE
+    }
+
+
+def test_migrations_match_models_and_revert(engine, tmp_path):
+    """Test head builds exactly the models' tables, columns and indexes, and base removes them."""
+    assert runner.upgrade(engine) == ["0001", "0002", "0003", "0004"]
+    assert runner.upgrade(engine) == []
+
+    models = create_engine(f"sqlite:///{tmp_path}/models.db")
+    Base.metadata.create_all(models)
+    assert _schema(engine) == _schema(models)
+
+    # A database created by the old create_all is adopted, not rebuilt
+    assert runner.upgrade(models) == ["0001", "0002", "0003", "0004"]
+    models.dispose()
+
+    assert runner.downgrade(engine, runner.BASE) == ["0004", "0003", "0002", "0001"]
+    assert _schema(engine) == {}
+
+
+def test_first_release_database_is_upgraded_to_models(engine, tmp_path):
+    """Test a database built by the first release's create_all ends up with the models' schema."""
+    baseline_models.Base.metadata.create_all(engine)
+    assert "checkpoint_id" not in _schema(engine)["checkpoints"][0]
+
+    assert runner.upgrade(engine) == ["0001", "0002", "0003", "0004"]
+
+    models = create_engine(f"sqlite:///{tmp_path}/models.db")
+    Base.metadata.create_all(models)
+    assert _schema(engine) == _schema(models)
+    models.dispose()
+
+
+def test_startup_check_needs_head_revision(engine):
+    """Test the schema check fails until migrations are applied, then passes with one query."""
+    with engine.connect() as connection:
+        with pytest.raises(runner.SchemaOutOfDateError, match="app.migrate upgrade"):
+            runner.check_schema(connection)
+
+    runner.upgrade(engine, "0003")
+    with engine.connect() as connection:
+        with pytest.raises(runner.SchemaOutOfDateError) as error:
+            runner.check_schema(connection)
+    assert (error.value.current, error.value.head) == ("0003", "0004")
+
+    runner.upgrade(engine)
+    with engine.connect() as connection:
+        assert runner.check_schema(connection) == "0004"
+    with pytest.raises(runner.MigrationError):
+        runner.upgrade(engine, "9999")
+
+
+def test_upgrade_backfills_inline_agent_state(engine):
+    """Test 0003 moves a pre-split agent state into the new tables and leaves a pointer."""
+    runner.upgrade(engine, "0002")
+    case_id = uuid4()
+    legacy = {
+        "case_id": str(case_id),
+        "tenant_name": "Jane Doe",
+        "status": "mailed",
+        "current_step": "mailed",
+        "statutory_analysis": {"summary": "Late refund", "violations": []},
+        "violation_findings": [],
+        "demand_letter_draft": {"letter_html": "<p>Draft</p>", "letter_text": "Draft", "citations": ["§92.103"]},
+        "edited_letter_html": "<p>Sent</p>",
+        "lob_mail_id": "ltr_legacy",
+        "tracking_url": "https://lob.example/ltr_legacy",
+        "expected_delivery": "2024-01-10"
+    }
+    with engine.begin() as connection:
+        connection.execute(insert(Case.__table__).values(
+            id=case_id,
+            tenant_name="Jane Doe",
+            landlord_name="Bob Smith",
+            deposit_amount=1500,
+            withheld_amount=1500,
+            move_out_date=date(2024, 1, 1),
+            tenant_address={},
+            landlord_address={},
+            dispute_description="Deposit never returned",
+            agent_state=legacy,
+            status="mailed"
+        ))
+
+    runner.upgrade(engine)
+
+    with engine.connect() as connection:
+        pointer = connection.execute(select(Case.agent_state).where(Case.id == case_id)).scalar()
+        drafts = connection.execute(
+            select(LetterDraft.version, LetterDraft.source, LetterDraft.letter_html, LetterDraft.id)
+            .where(LetterDraft.case_id == case_id)
+            .order_by(LetterDraft.version)
+        ).all()
+        mailing = connection.execute(select(Mailing).where(Mailing.case_id == case_id)).one()
+
+    assert set(pointer) == {
+        "status", "current_step", "analysis_id", "letter_draft_id", "approved_letter_draft_id", "mailing_id"
+    }
+    assert [tuple(draft[:3]) for draft in drafts] == [(1, "generated", "<p>Draft</p>"), (2, "edited", "<p>Sent</p>")]
+    assert pointer["approved_letter_draft_id"] == str(drafts[1].id)
+    assert (mailing.lob_mail_id, mailing.letter_draft_id) == ("ltr_legacy", drafts[1].id)
@@ -0,0 +1,88 @@
+import asyncio
+import json
+from datetime import date
+from decimal import Decimal
+
+from app.services.claude_service import ClaudeService
+from app.services.damages import calculate_damages
+from app.services.prompts import STATUTE_CORPUS, TOOLS, cached_system
+from stub_servers import StubAnthropicServer
+
+ADDRESS = {"address_line1": "1 Main St", "address_city": "Austin", "address_zip": "78701"}
+CASE_DATA = {
+    "tenant_name": "Jane Tenant",
+    "landlord_name": "Acme Properties",
+    "tenant_address": ADDRESS,
+    "landlord_address": ADDRESS,
+    "deposit_amount": 1500.0,
+    "withheld_amount": 1500.0,
+    "move_out_date": "2024-12-01",
+    "dispute_description": "Landlord withheld full deposit without an itemized list."
+}
+DAMAGES = calculate_damages(Decimal("1500.00"), date(2024, 12, 1), as_of=date(2025, 1, 15))
+
+
+def _run(server: StubAnthropicServer, coro_fn) -> ClaudeService:
+    async def run():
+        service = ClaudeService(api_key="test-key", base_url=server.url)
+        try:
+            await coro_fn(service)
+        finally:
+            await service.aclose()
+        return service
+    return asyncio.run(run())
+
+
+def test_static_prefix_is_shared_and_facts_stay_in_user_message():
+    """Test the system prefix is identical across cases and facts are not in it."""
+    service = ClaudeService(api_key="test-key")
+    other = {**CASE_DATA, "withheld_amount": 900.0, "dispute_description": "Kept $900 for paint."}
+
+    system = cached_system("instructions")
+    assert system[0]["text"] == STATUTE_CORPUS
+    assert all(block["cache_control"] == {"type": "ephemeral"} for block in system)
+
+    first = service._build_statutory_analysis_prompt(CASE_DATA, DAMAGES)
+    second = service._build_statutory_analysis_prompt(other, DAMAGES)
+    assert "Kept $900 for paint." in second and "Kept $900" not in first
+    assert "§92.110" not in first
+    assert len(first) < len(STATUTE_CORPUS) / 4
+
+
+def test_token_accounting_reports_cache_reads_after_first_call():
+    """Test the second analysis reads the prefix the first one wrote."""
+    other = {**CASE_DATA, "withheld_amount": 900.0}
+
+    async def analyze_twice(service):
+        await service.analyze_statutory_compliance(CASE_DATA, DAMAGES)
+        await service.analyze_statutory_compliance(other, DAMAGES)
+
+    with StubAnthropicServer() as server:
+        service = _run(server, analyze_twice)
+
+    first, second = service.usage.recent
+    assert first["cache_creation_input_tokens"] > 0 and first["cache_read_input_tokens"] == 0
+    assert second["cache_read_input_tokens"] == first["cache_creation_input_tokens"]
+    assert second["cache_creation_input_tokens"] == 0
+    assert second["input_tokens"] < second["cache_read_input_tokens"]
+
+    stats = service.usage.stats()
+    assert stats["calls"] == 2
+    assert stats["by_kind"]["statutory_analysis"]["calls"] == 2
+    assert 0.4 < stats["cached_input_ratio"] < 0.5
+
+
+def test_letter_reuses_corpus_prefix_from_analysis():
+    """Test the letter call reads the shared tools and corpus and writes only its instructions."""
+    async def analyze_then_draft(service):
+        analysis = await service.analyze_statutory_compliance(CASE_DATA, DAMAGES)
+        streamed = []
+        await service.generate_demand_letter(CASE_DATA, analysis, on_text=streamed.append)
+
+    with StubAnthropicServer() as server:
+        service = _run(server, analyze_then_draft)
+
+    analysis, letter = service.usage.recent
+    assert letter["kind"] == "demand_letter"
+    assert letter["cache_read_input_tokens"] == (len(json.dumps(TOOLS)) + len(STATUTE_CORPUS)) // 4
+    assert 0 < letter["cache_creation_input_tokens"] < letter["cache_read_input_tokens"]
@@ -0,0 +1,70 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.main import app
+from app.providers import ProviderNotConfiguredError, Providers, get_claude_service
+
+
+def test_providers_are_built_on_first_use(monkeypatch):
+    """Test services are constructed lazily, once, and a missing key fails only on use."""
+    container = Providers()
+    assert container.built() == {}
+
+    lob = container.lob
+    assert container.lob is lob and list(container.built()) == ["lob"]
+
+    monkeypatch.setattr(settings, "ANTHROPIC_API_KEY", None)
+    with pytest.raises(ProviderNotConfiguredError, match="ANTHROPIC_API_KEY"):
+        container.claude
+    assert "claude" not in container.built()
+
+
+def test_routes_receive_injected_claude_service(client: TestClient):
+    """Test routes get Claude through the dependency, so tests can override it."""
+    class FakeUsage:
+        def stats(self):
+            return {"requests": 7}
+
+    class FakeClaude:
+        usage = FakeUsage()
+        cache = None
+
+    app.dependency_overrides[get_claude_service] = FakeClaude
+    try:
+        usage = client.get("/api/agent/usage/stats").json()["data"]
+        cache = client.get("/api/agent/cache/stats").json()["data"]
+    finally:
+        app.dependency_overrides.pop(get_claude_service)
+
+    assert usage == {"requests": 7}
+    assert cache == {"enabled": False}
+
+
+def test_stats_without_claude_key_are_unavailable(client: TestClient, monkeypatch):
+    """Test the Claude stats routes answer 503, not 500, when no API key is set."""
+    monkeypatch.setattr(settings, "ANTHROPIC_API_KEY", None)
+    for path in ("/api/agent/usage/stats", "/api/agent/cache/stats"):
+        response = client.get(path)
+        assert response.status_code == 503
+        assert "ANTHROPIC_API_KEY" in response.json()["detail"]
+
+
+def test_lifespan_builds_and_closes_the_container(db_session, monkeypatch):
+    """Test the workers run on the container the app's lifespan built, and it's closed on shutdown."""
+    from app.agents.jobs import agent_job_queue
+    from app.services.mail_outbox import mail_sender
+
+    closed = []
+    close = Providers.aclose
+
+    async def aclose(self):
+        closed.append(self)
+        await close(self)
+
+    monkeypatch.setattr(Providers, "aclose", aclose)
+    with TestClient(app) as client:
+        providers = client.app.state.providers
+        assert isinstance(providers, Providers)
+        assert agent_job_queue.providers is providers and mail_sender.providers is providers
+    assert closed == [providers]
@@ -0,0 +1,70 @@
+import gzip
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+
+from app import compression
+from app.models.schemas import APIResponse
+from app.responses import APIJSONResponse, etag_matches
+
+
+def test_unchanged_case_and_list_return_304(client: TestClient, create_case):
+    """Test ETags follow updated_at: 304 while unchanged, a new ETag after an edit."""
+    case_id = create_case()
+
+    first = client.get(f"/api/cases/{case_id}")
+    etag = first.headers["ETag"]
+    cached = client.get(f"/api/cases/{case_id}", headers={"If-None-Match": etag})
+    assert cached.status_code == 304 and cached.content == b""
+
+    page_etag = client.get("/api/cases/").headers["ETag"]
+    assert client.get("/api/cases/", headers={"If-None-Match": page_etag}).status_code == 304
+
+    client.patch(f"/api/cases/{case_id}", json={"tenant_name": "Jane Roe"})
+    changed = client.get(f"/api/cases/{case_id}", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.json()["data"]["tenant_name"] == "Jane Roe"
+    assert changed.headers["ETag"] != etag
+    assert client.get("/api/cases/", headers={"If-None-Match": page_etag}).status_code == 200
+
+    assert etag_matches(f'"other", {etag.removeprefix("W/")}', etag)
+    assert etag_matches("*", etag)
+
+
+def test_large_bodies_are_compressed(client: TestClient, create_case, monkeypatch):
+    """Test gzip above the threshold, identity below it, and brotli only when installed."""
+    for _ in range(10):
+        create_case()
+
+    large = client.get("/api/cases/", headers={"Accept-Encoding": "gzip"})
+    assert large.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in large.headers["Vary"]
+    assert len(large.json()["data"]) == 10
+    assert "Content-Encoding" not in client.get("/health", headers={"Accept-Encoding": "gzip"}).headers
+    assert "Content-Encoding" not in client.get("/api/cases/", headers={"Accept-Encoding": "identity"}).headers
+
+    monkeypatch.setattr(compression, "brotli", None)
+    assert compression.choose_encoding("br, gzip;q=0.5") == "gzip"
+    assert compression.choose_encoding("gzip;q=0, br") is None
+    monkeypatch.setattr(compression, "brotli", object())
+    assert compression.choose_encoding("br, gzip;q=0.5") == "br"
+    assert gzip.decompress(compression.CompressionMiddleware(None).compress(b"x" * 2000, "gzip")) == b"x" * 2000
+
+
+def test_orjson_encoding_matches_pydantic():
+    """Test orjson renders Decimal, UUID, date and datetime exactly as pydantic's JSON mode."""
+    body = APIResponse(
+        success=True,
+        data={
+            "amount": Decimal("1500.00"),
+            "id": uuid4(),
+            "move_out_date": date(2024, 1, 15),
+            "created_at": datetime(2024, 1, 15, 12, 30, 0, 123456, tzinfo=timezone.utc),
+            "naive": datetime(2024, 1, 15, 12, 30)
+        },
+        timestamp=datetime(2024, 1, 16)
+    )
+
+    assert APIJSONResponse(body).body == body.model_dump_json().encode("utf-8")
@@ -0,0 +1,81 @@
+import asyncio
+import threading
+import time
+from uuid import UUID
+
+from fastapi.testclient import TestClient
+
+from app.database import AsyncSessionLocal
+from app.services.db_service import async_db_service
+from app.services.status_cache import CaseProgress, StatusCache, status_cache
+
+
+def test_unchanged_progress_is_304_from_cache(client: TestClient, create_case, monkeypatch):
+    """Test a repeat poll with the ETag gets an empty 304 without loading the case."""
+    case_id = create_case()
+
+    first = client.get(f"/api/agent/cases/{case_id}/progress")
+    assert first.status_code == 200
+    assert first.json()["data"] == {"case_id": case_id, "status": "draft", "current_step": None, "error": None}
+
+    loads = []
+    original = async_db_service.get_case_progress
+
+    async def counting(db, case_id):
+        loads.append(case_id)
+        return await original(db, case_id)
+
+    monkeypatch.setattr(async_db_service, "get_case_progress", counting)
+    again = client.get(f"/api/agent/cases/{case_id}/progress", headers={"If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["ETag"] == first.headers["ETag"]
+    assert loads == []
+    assert client.get(f"/api/agent/cases/{UUID(int=1)}/progress").status_code == 404
+
+
+def test_long_poll_returns_on_status_change(client: TestClient, create_case, fake_agent_services):
+    """Test a long-poll is answered as soon as the case moves, not at its timeout."""
+    case_id = create_case()
+    etag = client.get(f"/api/agent/cases/{case_id}/progress").headers["ETag"]
+
+    result = {}
+
+    def poll():
+        started = time.monotonic()
+        result["response"] = client.get(
+            f"/api/agent/cases/{case_id}/progress", params={"wait": 10}, headers={"If-None-Match": etag}
+        )
+        result["elapsed"] = time.monotonic() - started
+
+    poller = threading.Thread(target=poll)
+    poller.start()
+    time.sleep(0.2)
+    client.post(f"/api/agent/cases/{case_id}/execute")
+    poller.join(timeout=10)
+
+    assert result["response"].status_code == 200
+    assert result["response"].json()["data"]["status"] != "draft"
+    assert result["elapsed"] < 5
+
+
+def test_cache_expires_and_writes_invalidate(db_session, sample_case_data):
+    """Test entries lapse after the TTL and status writes drop them and wake waiters."""
+    cache = StatusCache(ttl_seconds=0.05)
+    cache.put(CaseProgress("a", "analyzing", "research"))
+    assert cache.get("a").current_step == "research"
+    time.sleep(0.06)
+    assert cache.get("a") is None
+
+    async def run():
+        async with AsyncSessionLocal() as db:
+            db_case = await async_db_service.create_case(db, sample_case_data)
+            status_cache.put(CaseProgress(str(db_case.id), "draft"))
+            waiter = asyncio.ensure_future(status_cache.wait(db_case.id, timeout=5))
+            await asyncio.sleep(0)
+            await async_db_service.update_case_status(db, db_case.id, "error", agent_state={"error": "boom"})
+            return db_case.id, await waiter
+
+    case_id, woken = asyncio.run(run())
+    assert woken is True
+    assert status_cache.get(case_id) is None
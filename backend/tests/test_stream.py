@@ -0,0 +1,64 @@
+import json
+from typing import List, Tuple
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.services.claude_service import ClaudeService
+from stub_servers import LETTER_RESPONSE, StubAnthropicServer
+
+
+def _read_events(response) -> List[Tuple[str, dict]]:
+    """Parse an SSE response body into (event, data) pairs."""
+    events, event = [], None
+    for line in response.iter_lines():
+        if line.startswith("event: "):
+            event = line[len("event: "):]
+        elif line.startswith("data: "):
+            events.append((event, json.loads(line[len("data: "):])))
+    return events
+
+
+@pytest.fixture
+def streaming_claude(providers, monkeypatch):
+    """Run the agent against a stub Anthropic server that streams responses."""
+    with StubAnthropicServer(latency=0.3) as server:
+        monkeypatch.setattr(
+            providers, "claude", ClaudeService(api_key="test-key", base_url=server.url)
+        )
+        yield server
+
+
+def test_stream_pushes_nodes_and_letter_tokens(client: TestClient, create_case, streaming_claude):
+    """Test the stream relays node transitions and incremental letter text."""
+    case_id = create_case()
+    assert client.post(f"/api/agent/cases/{case_id}/execute").status_code == 202
+    
+    with client.stream("GET", f"/api/agent/cases/{case_id}/stream") as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = _read_events(response)
+    
+    names = [name for name, _ in events]
+    assert names[0] == "status"
+    assert names[-1] == "done"
+    assert [data["node"] for name, data in events if name == "node"] == ["research", "generate"]
+    
+    # Tokens are the letter's prose taken from the tool input, not its raw JSON
+    tokens = [data["text"] for name, data in events if name == "token"]
+    assert len(tokens) > 1
+    assert "".join(tokens) == LETTER_RESPONSE["letter_text"]
+    assert events[-1][1]["status"] == "awaiting_approval"
+
+
+def test_stream_for_idle_case_closes_immediately(client: TestClient, create_case):
+    """Test a case that is not executing gets a snapshot and done."""
+    case_id = create_case()
+    
+    with client.stream("GET", f"/api/agent/cases/{case_id}/stream") as response:
+        events = _read_events(response)
+    
+    assert events == [
+        ("status", {"case_id": case_id, "status": "draft", "current_step": None}),
+        ("done", {"status": "draft"})
+    ]
@@ -0,0 +1,102 @@
+import asyncio
+import json
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from app.models.schemas import AnalysisFindings, DemandLetterDraft
+from app.services.claude_service import ClaudeService, ToolInputFieldStream
+from app.services.damages import calculate_damages
+from app.services.prompts import ANALYSIS_TOOL, CASE_PACKAGE_TOOL, LETTER_TOOL
+from stub_servers import ANALYSIS_RESPONSE, LETTER_RESPONSE, StubAnthropicServer
+
+ADDRESS = {"address_line1": "1 Main St", "address_city": "Austin", "address_zip": "78701"}
+CASE_DATA = {
+    "tenant_name": "Jane Tenant",
+    "landlord_name": "Acme Properties",
+    "tenant_address": ADDRESS,
+    "landlord_address": ADDRESS,
+    "deposit_amount": 1500.0,
+    "withheld_amount": 1500.0,
+    "move_out_date": "2024-12-01",
+    "dispute_description": "Landlord withheld full deposit without an itemized list."
+}
+DAMAGES = calculate_damages(Decimal("1500.00"), date(2024, 12, 1), as_of=date(2025, 1, 15))
+ANALYSIS = ClaudeService._analysis_from(AnalysisFindings(**ANALYSIS_RESPONSE), DAMAGES)
+
+
+def _run(server: StubAnthropicServer, call, **kwargs):
+    async def run():
+        service = ClaudeService(api_key="test-key", base_url=server.url, **kwargs)
+        try:
+            return service, await call(service)
+        finally:
+            await service.aclose()
+    return asyncio.run(run())
+
+
+def test_tool_schemas_follow_models():
+    """Test tool input schemas are generated from the models that validate them."""
+    assert list(ANALYSIS_TOOL["input_schema"]["properties"]) == list(AnalysisFindings.model_fields)
+    assert set(ANALYSIS_TOOL["input_schema"]["required"]) == {"violations", "summary"}
+    assert list(LETTER_TOOL["input_schema"]["properties"]) == list(DemandLetterDraft.model_fields)
+    violation = ANALYSIS_TOOL["input_schema"]["properties"]["violations"]["items"]
+    assert "$ref" not in str(ANALYSIS_TOOL) and violation["properties"]["damages_applicable"]["type"] == "boolean"
+
+
+def test_streamed_letter_text_is_generated_first_and_decoded_incrementally():
+    """Test letter_text leads the letter fields and is decoded from any fragment split."""
+    assert list(LETTER_TOOL["input_schema"]["properties"])[0] == "letter_text"
+    package_fields = list(CASE_PACKAGE_TOOL["input_schema"]["properties"])
+    assert package_fields.index("letter_text") < package_fields.index("letter_html")
+
+    tool_input = json.dumps({
+        "violations": [{"letter_text": "nested, not streamed"}],
+        "days": 45,
+        **LETTER_RESPONSE
+    })
+    for size in (1, 3, 16):
+        stream = ToolInputFieldStream("letter_text")
+        pieces = [stream.feed(tool_input[i:i + size]) for i in range(0, len(tool_input), size)]
+        assert "".join(pieces) == LETTER_RESPONSE["letter_text"]
+
+
+def test_invalid_field_is_repaired_alone():
+    """Test a malformed field is re-requested without regenerating the rest."""
+    with StubAnthropicServer(faults=[{"citations": "Texas Property Code §92.103"}]) as server:
+        service, letter = _run(server, lambda s: s.generate_demand_letter(CASE_DATA, ANALYSIS))
+
+    assert server.request_count == 2
+    assert letter.citations == LETTER_RESPONSE["citations"]
+    assert letter.letter_html == LETTER_RESPONSE["letter_html"]
+
+    repair = server.requests[1]
+    assert [tool["input_schema"]["required"] for tool in repair["tools"]] == [["citations"]]
+    tool_result = repair["messages"][-1]["content"][0]
+    assert tool_result["type"] == "tool_result" and tool_result["is_error"]
+    assert "citations" in tool_result["content"]
+    assert service.usage.totals["demand_letter_repair"]["calls"] == 1
+
+
+def test_missing_field_is_repaired_during_analysis():
+    """Test a missing summary is filled in by the repair call."""
+    with StubAnthropicServer(faults=[{"summary": None}]) as server:
+        _, analysis = _run(server, lambda s: s.analyze_statutory_compliance(CASE_DATA, DAMAGES))
+
+    assert server.request_count == 2
+    assert analysis.summary == ANALYSIS_RESPONSE["summary"]
+    assert analysis.total_damages == Decimal("6100.00")
+
+
+def test_repair_gives_up_after_configured_attempts():
+    """Test a field that stays invalid fails the call after the repair budget."""
+    with StubAnthropicServer(faults=[{"summary": None}, {"summary": None}]) as server:
+        with pytest.raises(ValueError, match="statutory_analysis"):
+            _run(
+                server,
+                lambda s: s.analyze_statutory_compliance(CASE_DATA, DAMAGES),
+                repair_attempts=1
+            )
+
+    assert server.request_count == 2
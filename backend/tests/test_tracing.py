@@ -0,0 +1,126 @@
+import json
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.services.claude_service import ClaudeService
+from app.services.tracing import (
+    FileSpanExporter,
+    InMemorySpanExporter,
+    Span,
+    Tracer,
+    format_traceparent,
+    parse_traceparent,
+    tracer
+)
+from stub_servers import StubAnthropicServer
+
+
+@pytest.fixture
+def spans(monkeypatch):
+    """Collect finished spans in memory."""
+    exporter = InMemorySpanExporter()
+    monkeypatch.setattr(tracer, "exporters", [exporter])
+    return exporter.spans
+
+
+@pytest.fixture
+def stub_claude(providers, monkeypatch):
+    with StubAnthropicServer() as server:
+        monkeypatch.setattr(providers, "claude", ClaudeService(api_key="test-key", base_url=server.url))
+        yield server
+
+
+def test_spans_nest_and_export_to_file(tmp_path):
+    """Test child spans inherit the trace and are written as JSON lines."""
+    path = tmp_path / "traces.jsonl"
+    exporter = FileSpanExporter(str(path))
+    local = Tracer([exporter])
+
+    with local.start_span("outer", {"case.id": "case-1"}) as outer:
+        with local.start_span("inner"):
+            pass
+        with pytest.raises(RuntimeError):
+            with local.start_span("failing"):
+                raise RuntimeError("boom")
+    local.shutdown()
+
+    inner, failing, exported_outer = [json.loads(line) for line in path.read_text().splitlines()]
+    assert inner["trace_id"] == outer.trace_id and inner["parent_id"] == outer.span_id
+    assert failing["status"] == "error" and failing["attributes"]["exception.message"] == "boom"
+    assert exported_outer["parent_id"] is None
+    assert exported_outer["attributes"] == {"case.id": "case-1"}
+    assert exported_outer["duration_ms"] >= 0
+
+
+def test_file_export_does_not_block_and_drops_when_full(tmp_path):
+    """Test spans are written by a background thread, and dropped while its queue is full."""
+    path = tmp_path / "traces.jsonl"
+    exporter = FileSpanExporter(str(path), queue_size=1)
+    writing, release = threading.Event(), threading.Event()
+
+    class SlowSpan(Span):
+        def to_dict(self):
+            writing.set()
+            release.wait(5)
+            return super().to_dict()
+
+    exporter.export(SlowSpan("slow", None))
+    assert writing.wait(5)
+    exporter.export(Span("queued", None))
+    exporter.export(Span("dropped", None))
+    assert exporter.dropped == 1
+
+    release.set()
+    exporter.flush()
+    assert [json.loads(line)["name"] for line in path.read_text().splitlines()] == ["slow", "queued"]
+    exporter.shutdown()
+
+
+def test_traceparent_round_trip():
+    """Test W3C traceparent headers parse back to the same span context."""
+    with Tracer().start_span("request") as span:
+        assert parse_traceparent(format_traceparent(span.context)) == span.context
+    assert parse_traceparent("not-a-traceparent") is None
+    assert parse_traceparent(None) is None
+
+
+def test_execute_is_traced_from_request_to_service_calls(
+    client: TestClient, create_case, stub_claude, spans
+):
+    """Test the execute request, its nodes and their Claude/DB calls share one trace."""
+    case_id = create_case()
+    response = client.post(f"/api/agent/cases/{case_id}/execute")
+    assert response.status_code == 202
+    trace_id = parse_traceparent(response.headers["traceparent"]).trace_id
+
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        if any(span.name == "agent.job" and span.end_time for span in spans):
+            break
+        time.sleep(0.05)
+
+    trace = [span for span in spans if span.trace_id == trace_id]
+    by_id = {span.span_id: span for span in trace}
+    by_name = {span.name: span for span in trace}
+
+    request = by_name["POST /api/agent/cases/{case_id}/execute"]
+    assert request.parent_id is None
+    assert request.attributes["http.status_code"] == 202
+    assert request.attributes["case.id"] == case_id
+
+    job = by_name["agent.job"]
+    assert job.parent_id == request.span_id
+    research = by_name["agent.node.research"]
+    assert by_id[research.parent_id].name == "agent.job"
+    assert research.attributes["case.id"] == case_id
+
+    analysis = by_name["claude.statutory_analysis"]
+    assert analysis.parent_id == research.span_id
+    assert analysis.attributes["claude.input_tokens"] > 0
+    assert by_name["claude.demand_letter"].parent_id == by_name["agent.node.generate"].span_id
+
+    assert by_name["db.update_job_status"].parent_id == job.span_id
+    assert by_name["db.update_case_status"].attributes["case.id"] == case_id
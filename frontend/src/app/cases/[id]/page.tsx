@@ -18,7 +18,8 @@ export default function CaseDetailPage() {
     queryFn: () => casesApi.get(caseId),
     refetchInterval: (query) => {
       const data = query.state.data;
-      if (data?.status === 'analyzing' || data?.status === 'awaiting_approval') {
+      // mail_queued: approved, waiting for the mail sender to mark it mailed
+      if (data?.status === 'analyzing' || data?.status === 'awaiting_approval' || data?.status === 'mail_queued') {
         return 3000; // Poll every 3 seconds
       }
       return false;
@@ -74,7 +75,7 @@ export default function CaseDetailPage() {
           {/* Step 1: Draft */}
           <div className="flex flex-col items-center flex-1">
             <div className={`w-10 h-10 rounded-full flex items-center justify-center ${
-              ['draft', 'analyzing', 'analyzed', 'awaiting_approval', 'mailed'].includes(caseData.status)
+              ['draft', 'analyzing', 'analyzed', 'awaiting_approval', 'mail_queued', 'mailed'].includes(caseData.status)
                 ? 'bg-primary-600 text-white'
                 : 'bg-gray-200 text-gray-500'
             }`}>
@@ -88,7 +89,7 @@ export default function CaseDetailPage() {
             <div className={`w-10 h-10 rounded-full flex items-center justify-center ${
               caseData.status === 'analyzing'
                 ? 'bg-primary-600 text-white animate-pulse'
-                : ['analyzed', 'awaiting_approval', 'mailed'].includes(caseData.status)
+                : ['analyzed', 'awaiting_approval', 'mail_queued', 'mailed'].includes(caseData.status)
                 ? 'bg-primary-600 text-white'
                 : 'bg-gray-200 text-gray-500'
             }`}>
@@ -106,7 +107,7 @@ export default function CaseDetailPage() {
             <div className={`w-10 h-10 rounded-full flex items-center justify-center ${
               caseData.status === 'awaiting_approval'
                 ? 'bg-yellow-500 text-white'
-                : caseData.status === 'mailed'
+                : ['mail_queued', 'mailed'].includes(caseData.status)
                 ? 'bg-primary-600 text-white'
                 : 'bg-gray-200 text-gray-500'
             }`}>
@@ -120,6 +121,8 @@ export default function CaseDetailPage() {
             <div className={`w-10 h-10 rounded-full flex items-center justify-center ${
               caseData.status === 'mailed'
                 ? 'bg-green-600 text-white'
+                : caseData.status === 'mail_queued'
+                ? 'bg-primary-600 text-white animate-pulse'
                 : 'bg-gray-200 text-gray-500'
             }`}>
               <Mail className="w-5 h-5" />
@@ -154,6 +157,7 @@ export default function CaseDetailPage() {
                   caseData.status === 'mailed' ? 'bg-green-100 text-green-800' :
                   caseData.status === 'awaiting_approval' ? 'bg-yellow-100 text-yellow-800' :
                   caseData.status === 'analyzing' ? 'bg-blue-100 text-blue-800' :
+                  caseData.status === 'mail_queued' ? 'bg-blue-100 text-blue-800' :
                   caseData.status === 'error' ? 'bg-red-100 text-red-800' :
                   'bg-gray-100 text-gray-800'
                 }`}>
@@ -254,6 +258,20 @@ export default function CaseDetailPage() {
             </div>
           )}
 
+          {caseData.status === 'mail_queued' && (
+            <div className="bg-white rounded-lg shadow p-6">
+              <div className="flex items-center">
+                <Loader2 className="w-5 h-5 animate-spin text-primary-600 mr-3" />
+                <div>
+                  <h2 className="text-xl font-semibold">Sending Letter...</h2>
+                  <p className="text-gray-600 text-sm">
+                    Your approved letter is queued for certified mail. Tracking details appear here once it is sent.
+                  </p>
+                </div>
+              </div>
+            </div>
+          )}
+
           {caseData.status === 'mailed' && caseData.agent_state?.lob_mail_id && (
             <div className="bg-white rounded-lg shadow p-6">
               <h2 className="text-xl font-semibold mb-4">✅ Letter Sent!</h2>
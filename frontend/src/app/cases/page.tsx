@@ -90,6 +90,7 @@ export default function CasesPage() {
                       caseItem.status === 'mailed' ? 'bg-green-100 text-green-800' :
                       caseItem.status === 'awaiting_approval' ? 'bg-yellow-100 text-yellow-800' :
                       caseItem.status === 'analyzing' ? 'bg-blue-100 text-blue-800' :
+                      caseItem.status === 'mail_queued' ? 'bg-blue-100 text-blue-800' :
                       caseItem.status === 'error' ? 'bg-red-100 text-red-800' :
                       'bg-gray-100 text-gray-800'
                     }`}>
@@ -19,11 +19,25 @@ export interface Case {
   dispute_description: string;
   evidence_urls: string[];
   agent_state: Record<string, any>;
-  status: 'draft' | 'analyzing' | 'analyzed' | 'awaiting_approval' | 'mailed' | 'error';
+  status: 'draft' | 'analyzing' | 'analyzed' | 'awaiting_approval' | 'mail_queued' | 'mailed' | 'error';
   created_at: string;
   updated_at: string;
 }
 
+// Row returned by GET /api/cases/ (no agent state or dispute text)
+export type CaseSummary = Pick<
+  Case,
+  | 'id'
+  | 'tenant_name'
+  | 'landlord_name'
+  | 'deposit_amount'
+  | 'withheld_amount'
+  | 'move_out_date'
+  | 'status'
+  | 'created_at'
+  | 'updated_at'
+>;
+
 export interface CreateCaseInput {
   tenant_name: string;
   landlord_name: string;